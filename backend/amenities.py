@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Hotel Amenity Inference
+Infers amenity lists for hotel results from their descriptions and the budget
+tier. Each tier's rules are resolved once into a flat chain of substring
+checks, the same `in` tests the per-hotel code used (benchmarks showed a
+compiled alternation was slower for descriptions this short). Amenities are
+deduplicated with dict.fromkeys and always reported in table order, so
+identical inputs give byte-identical responses.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from semantic_cache import normalize_budget
+
+BASE_AMENITIES = ["Wifi"]
+
+# Amenities every hotel in a tier is assumed to have
+TIER_AMENITIES: Dict[str, List[str]] = {
+    'low': ["Shared Bathroom", "Common Area"],
+    'medium': ["Private Bathroom", "Restaurant", "Room Service"],
+    'high': ["Spa", "Pool", "Gym", "Concierge", "Restaurant", "Room Service"],
+}
+
+# Unrecognized budgets have always been treated as the top tier
+DEFAULT_TIER = 'high'
+
+# (amenity, keywords) in reporting order; a keyword matches anywhere in the lowercased description
+KEYWORD_AMENITIES: List[Tuple[str, Sequence[str]]] = [
+    ("Parking", ("parking",)),
+    ("Pool", ("pool",)),
+    ("Spa", ("spa",)),
+    ("Gym", ("gym", "fitness")),
+    ("Restaurant", ("restaurant", "dining")),
+    ("Business Center", ("business",)),
+]
+
+# Extra keyword rules that only apply within a tier (none by default, see add_keywords)
+TIER_KEYWORD_AMENITIES: Dict[str, List[Tuple[str, Sequence[str]]]] = {}
+
+
+
+class _KeywordTable:
+    """A tier's fixed amenities and its (keyword, amenity) checks, lowercased once
+
+    Checks for amenities the tier already has are dropped, since they could
+    only add duplicates.
+    """
+
+    def __init__(self, rules: List[Tuple[str, Sequence[str]]], fixed: List[str]):
+        self.fixed = list(dict.fromkeys(fixed))
+        self.checks = [(keyword.lower(), amenity) for amenity, keywords in rules
+                       if amenity not in self.fixed for keyword in keywords if keyword]
+
+    def amenities_for(self, text: str) -> List[str]:
+        """Amenity list for a lowercased description"""
+        return self.fixed + list(dict.fromkeys([amenity for keyword, amenity in self.checks if keyword in text]))
+
+
+class AmenityEngine:
+    """Batch amenity inference driven by per-tier keyword rules"""
+
+    def __init__(self,
+                 keyword_amenities: Optional[List[Tuple[str, Sequence[str]]]] = None,
+                 tier_amenities: Optional[Dict[str, List[str]]] = None,
+                 tier_keyword_amenities: Optional[Dict[str, List[Tuple[str, Sequence[str]]]]] = None,
+                 base_amenities: Optional[List[str]] = None):
+        self.keyword_amenities = list(keyword_amenities if keyword_amenities is not None else KEYWORD_AMENITIES)
+        self.tier_amenities = {tier: list(values) for tier, values in (tier_amenities or TIER_AMENITIES).items()}
+        self.tier_keyword_amenities = {
+            tier: list(rules) for tier, rules in (tier_keyword_amenities or TIER_KEYWORD_AMENITIES).items()
+        }
+        self.base_amenities = list(base_amenities if base_amenities is not None else BASE_AMENITIES)
+        self._tables: Dict[str, _KeywordTable] = {}
+        self._lock = threading.Lock()
+
+    def tier(self, budget: str) -> str:
+        tier = normalize_budget(budget)
+        return tier if tier in self.tier_amenities else DEFAULT_TIER
+
+    def add_keywords(self, amenity: str, keywords: Iterable[str], tier: Optional[str] = None):
+        """Add a keyword rule for every tier, or only for one"""
+        rule = (amenity, tuple(keywords))
+        if tier is None:
+            self.keyword_amenities.append(rule)
+        else:
+            self.tier_keyword_amenities.setdefault(tier, []).append(rule)
+        with self._lock:
+            self._tables.clear()
+
+    def add_tier_amenities(self, tier: str, amenities: Iterable[str]):
+        """Add amenities assumed for every hotel in a tier"""
+        self.tier_amenities.setdefault(tier, []).extend(amenities)
+        with self._lock:
+            self._tables.clear()
+
+    def _table(self, tier: str) -> _KeywordTable:
+        table = self._tables.get(tier)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(tier)
+            if table is None:
+                table = _KeywordTable(self.keyword_amenities + self.tier_keyword_amenities.get(tier, []),
+                                      self.base_amenities + self.tier_amenities.get(tier, []))
+                self._tables[tier] = table
+            return table
+
+    def infer_batch(self, descriptions: Sequence[str], budget: str) -> List[List[str]]:
+        """Amenity lists for a batch of hotel descriptions, in stable table order"""
+        table = self._table(self.tier(budget))
+        fixed, checks = table.fixed, table.checks
+        return [fixed + list(dict.fromkeys([amenity for keyword, amenity in checks if keyword in text]))
+                for text in ((description or '').lower() for description in descriptions)]
+
+    def infer(self, description: str, budget: str) -> List[str]:
+        return self.infer_batch([description], budget)[0]
+
+    def assign(self, hotels: List, budget: str):
+        """Set `amenities` on each hotel model in place"""
+        for hotel, amenities in zip(hotels, self.infer_batch([hotel.description for hotel in hotels], budget)):
+            hotel.amenities = amenities
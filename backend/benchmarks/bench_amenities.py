@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Amenity Inference Benchmark
+Hotels/sec for the old per-hotel chain of `in` checks versus AmenityEngine's
+per-tier keyword chain, and a parity check that both infer the same
+amenities for every description.
+
+Usage: python benchmarks/bench_amenities.py [hotels]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amenities import AmenityEngine  # noqa: E402
+
+PHRASES = [
+    "Boutique hotel steps from the old town", "rooftop pool with city views", "free parking on site",
+    "full-service spa and sauna", "24h fitness center", "award-winning restaurant", "business lounge",
+    "airport shuttle every hour", "continental breakfast included", "cosy rooms with kitchenette",
+    "pet-friendly rooms", "private beach access", "quiet garden courtyard", "walking distance to museums",
+]
+
+
+def legacy_amenities(description: str, budget: str):
+    """The previous per-hotel inference from main.py"""
+    amenities = ["Wifi"]
+    if budget == "low":
+        amenities += ["Shared Bathroom", "Common Area"]
+    elif budget == "medium":
+        amenities += ["Private Bathroom", "Restaurant", "Room Service"]
+    else:
+        amenities += ["Spa", "Pool", "Gym", "Concierge", "Restaurant", "Room Service"]
+    description = description.lower()
+    if 'parking' in description:
+        amenities.append("Parking")
+    if 'pool' in description:
+        amenities.append("Pool")
+    if 'spa' in description:
+        amenities.append("Spa")
+    if 'gym' in description or 'fitness' in description:
+        amenities.append("Gym")
+    if 'restaurant' in description or 'dining' in description:
+        amenities.append("Restaurant")
+    if 'business' in description:
+        amenities.append("Business Center")
+    return list(set(amenities))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(42)
+    descriptions = [". ".join(rng.sample(PHRASES, 4)) for _ in range(count)]
+    engine = AmenityEngine()
+    engine.infer("warm up", "medium")
+
+    def best(run, repeats=5):
+        """Fastest of several runs, so one noisy run doesn't decide the comparison"""
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    legacy = best(lambda: [legacy_amenities(description, "medium") for description in descriptions])
+    single = best(lambda: [engine.infer(description, "medium") for description in descriptions])
+
+    # Search endpoints format a handful of hotels per call; large batches show the per-call overhead floor
+    results = {}
+    for batch_size in (3, 50, 1000):
+        results[batch_size] = best(lambda: [engine.infer_batch(descriptions[i:i + batch_size], "medium")
+                                            for i in range(0, count, batch_size)])
+
+    print(f"{'method':<22} {'hotels/sec':>12}")
+    print(f"{'legacy in-checks':<22} {count / legacy:>12,.0f}")
+    print(f"{'engine, single':<22} {count / single:>12,.0f}")
+    for batch_size, elapsed in results.items():
+        print(f"{f'engine, batch {batch_size}':<22} {count / elapsed:>12,.0f}")
+
+    # Same amenities as the chain it replaces (which returned them in set order)
+    for budget in ("low", "medium", "high"):
+        for description in descriptions[:2000]:
+            assert set(engine.infer(description, budget)) == set(legacy_amenities(description, budget))
+
+    # Same input, same output bytes
+    assert engine.infer_batch(descriptions[:100], "high") == engine.infer_batch(descriptions[:100], "high")
+
+
+if __name__ == '__main__':
+    main()
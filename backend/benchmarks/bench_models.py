@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Model Allocation Benchmark
+Compares per-request allocation of the old dict pipeline (parse to dicts,
+rebuild every dict with .get() defaults, build a response dict, json.dumps)
+against the slotted models serialized once with orjson.
+
+Usage: python benchmarks/bench_models.py [iterations]
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import DayPlan, Itinerary  # noqa: E402
+from travel_generator import AITravelItineraryGenerator  # noqa: E402
+
+HOTEL_OUTPUT = "\n".join(
+    f"HOTEL NAME: Hotel {i}\nDESCRIPTION: Central hotel with rooftop pool and free wifi\n"
+    f"PRICE: ${80 + i * 40}/night\nRATING: 4.{i}/5 stars\nLOCATION: Old Town\n"
+    for i in range(3)
+)
+ACTIVITY_OUTPUT = "\n".join(
+    f"ACTIVITY NAME: Activity {i}\nDESCRIPTION: Guided walking tour of the historic center\n"
+    f"PRICE: ${i * 10}\nHOURS: 9am-5pm\nDISTANCE: 2 km\nTRANSPORT: Walk\n"
+    for i in range(12)
+)
+# Clients send the chosen hotel back as plain JSON
+SELECTED_HOTEL = {'id': '1', 'name': 'Hotel 0', 'price': '$80/night', 'rating': '4.0/5 stars'}
+
+
+def legacy_request(generator):
+    """The pre-models flow: dicts parsed, copied with .get() defaults, copied again into the response"""
+    hotels = [
+        {'name': h.name, 'description': h.description, 'price': h.price, 'rating': h.rating, 'location': h.location}
+        for h in generator._parse_structured_hotels(HOTEL_OUTPUT)
+    ]
+    formatted_hotels = [
+        {
+            'id': str(i + 1),
+            'name': hotel.get('name', 'Unknown Hotel'),
+            'description': hotel.get('description', 'No description available'),
+            'price': hotel.get('price', 'Price varies'),
+            'rating': hotel.get('rating', 'Rating not available'),
+            'location': hotel.get('location', ''),
+            'amenities': ['Wifi', 'Pool'],
+        }
+        for i, hotel in enumerate(hotels)
+    ]
+    activities = [
+        {'name': a.name, 'description': a.description, 'price': a.price, 'hours': a.hours,
+         'distance': a.distance, 'transport': a.transport, 'type': 'activity'}
+        for a in generator._parse_structured_activities(ACTIVITY_OUTPUT)
+    ]
+    converted = [
+        {
+            'name': a.get('name', 'Unknown Activity'),
+            'description': a.get('description', 'No description available'),
+            'price': a.get('price', 'Price varies'),
+            'hours': a.get('hours', 'Check local timings'),
+            'distance': a.get('distance', 'Distance varies'),
+            'transport': a.get('transport', 'Multiple options available'),
+            'type': a.get('type', 'activity'),
+        }
+        for a in activities
+    ]
+    schedule = [
+        {'day': day + 1, 'date': f"2025-05-0{day + 1}", 'activities': converted[day * 2:day * 2 + 2], 'ai_suggestions': ''}
+        for day in range(6)
+    ]
+    response = {
+        'destination': 'Rome', 'dates': '2025-05-01 to 2025-05-07', 'duration': '6 days', 'budget': 'medium',
+        'selected_hotel': SELECTED_HOTEL,
+        'daily_schedule': [
+            {'day': d['day'], 'date': d['date'], 'ai_suggestions': d['ai_suggestions'],
+             'activities': [dict(a) for a in d['activities']]}
+            for d in schedule
+        ],
+        'generated_by': 'AI Agent with real-time web data',
+    }
+    return json.dumps(response).encode('utf-8')
+
+
+def model_request(generator):
+    """Models built once by the parsers and serialized once at the boundary"""
+    hotels = generator._parse_structured_hotels(HOTEL_OUTPUT)
+    for i, hotel in enumerate(hotels):
+        hotel.id = str(i + 1)
+        hotel.amenities = ['Wifi', 'Pool']
+    activities = generator._parse_structured_activities(ACTIVITY_OUTPUT)
+    schedule = [
+        DayPlan(day=day + 1, date=f"2025-05-0{day + 1}", activities=activities[day * 2:day * 2 + 2])
+        for day in range(6)
+    ]
+    itinerary = Itinerary(
+        destination='Rome', dates='2025-05-01 to 2025-05-07', duration='6 days', budget='medium',
+        selected_hotel=SELECTED_HOTEL, daily_schedule=schedule,
+    )
+    return orjson.dumps(itinerary)
+
+
+def measure(func, generator, iterations):
+    func(generator)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(generator)
+    elapsed = time.perf_counter() - start
+
+    # Peak bytes held while serving one request, from a fresh baseline
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = func(generator)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / iterations * 1e6, peak - baseline, len(result)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # The parsers don't touch the agent, so skip the LLM/tool setup in __init__
+    generator = AITravelItineraryGenerator.__new__(AITravelItineraryGenerator)
+
+    print(f"{'pipeline':<10} {'us/request':>11} {'peak B/request':>15} {'body B':>8}")
+    for name, func in (('dicts', legacy_request), ('models', model_request)):
+        per_request, peak, size = measure(func, generator, iterations)
+        print(f"{name:<10} {per_request:>11.1f} {peak:>15} {size:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Agent vs Pipeline Benchmark
+Replays a recorded hotel search (benchmarks/fixtures/replay_hotel_search.json)
+through the generator's ReAct agent and through the search-then-extract
+pipeline. LLM and search calls are served from the recording with simulated
+latency. Reports LLM calls, search calls, prompt tokens (search results go
+through the same observation compaction as in production) and wall time
+per request, and checks that both modes extract the same hotels.
+
+Usage: python benchmarks/bench_pipeline.py [requests] [--llm-latency S] [--search-latency S]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+from langchain.tools import Tool
+from langchain_community.llms.fake import FakeListLLM
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travel_generator import AITravelItineraryGenerator, TokenAccountingHandler  # noqa: E402
+from compaction import compacting_search  # noqa: E402
+from metrics import track_tokens  # noqa: E402
+from model_routing import TASKS, HOTELS  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'replay_hotel_search.json')
+
+
+class ReplayLLM(FakeListLLM):
+    """Recorded LLM responses, in order, each after a fixed delay"""
+
+    latency: float = 0.0
+    calls: int = 0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        return super()._call(prompt, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class ReplaySearch:
+    """Recorded search results for any query, after a fixed delay"""
+
+    def __init__(self, results, latency: float):
+        self.results = results
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        return self.results
+
+
+def build(mode: str, fixture, llm_latency: float, search_latency: float):
+    # Skip __init__: no API keys or network clients, just the mode's executor over replayed calls
+    generator = AITravelItineraryGenerator.__new__(AITravelItineraryGenerator)
+    responses = fixture['agent_turns'] if mode == 'agent' else [fixture['extraction']]
+    # One replayed LLM behind every model route
+    generator.llm = ReplayLLM(responses=responses, latency=llm_latency, callbacks=[TokenAccountingHandler()])
+    generator.llms = {task: generator.llm for task in TASKS}
+    search = ReplaySearch(fixture['search_results'], search_latency)
+    generator.search_tool = Tool(name="tavily_search_results_json", func=search, description="Web search")
+    generator.tools = [Tool(name=generator.search_tool.name, description=generator.search_tool.description,
+                            func=compacting_search(generator.search_tool))]
+    if mode == 'agent':
+        generator.setup_agent()
+        for executor in generator.executors.values():
+            executor.verbose = False
+    else:
+        generator.setup_pipeline()
+    return generator, search
+
+
+def run(mode: str, fixture, requests: int, llm_latency: float, search_latency: float):
+    generator, search = build(mode, fixture, llm_latency, search_latency)
+    names = None
+    start = time.perf_counter()
+    with track_tokens() as usage:
+        for _ in range(requests):
+            result = generator.executor(HOTELS).invoke({"input": fixture['request'], "searches": fixture['searches']})
+            names = [hotel.name for hotel in generator._extract_hotels(result['output'], 'Lisbon')]
+    elapsed = time.perf_counter() - start
+    return {
+        'llm_calls': generator.llm.calls / requests,
+        'search_calls': search.calls / requests,
+        'prompt_tokens': usage.prompt_tokens / requests,
+        'observation_raw_tokens': usage.observation_raw_tokens / requests,
+        'observation_tokens': usage.observation_tokens / requests,
+        'seconds': elapsed / requests,
+        'hotels': names,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('requests', type=int, nargs='?', default=5)
+    parser.add_argument('--llm-latency', type=float, default=1.0)
+    parser.add_argument('--search-latency', type=float, default=0.5)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    results = {mode: run(mode, fixture, args.requests, args.llm_latency, args.search_latency)
+               for mode in ('agent', 'pipeline')}
+
+    print(f"LLM latency {args.llm_latency}s, search latency {args.search_latency}s, {args.requests} requests per mode")
+    print(f"{'mode':<10} {'LLM calls':>10} {'searches':>9} {'prompt tok':>11} {'obs raw->kept':>15} {'s/request':>10}")
+    for mode, result in results.items():
+        observations = f"{result['observation_raw_tokens']:.0f}->{result['observation_tokens']:.0f}"
+        print(f"{mode:<10} {result['llm_calls']:>10.1f} {result['search_calls']:>9.1f} "
+              f"{result['prompt_tokens']:>11.0f} {observations:>15} {result['seconds']:>10.2f}")
+    same = results['agent']['hotels'] == results['pipeline']['hotels']
+    print(f"Same hotels extracted: {same} ({', '.join(results['pipeline']['hotels'] or [])})")
+
+
+if __name__ == '__main__':
+    main()
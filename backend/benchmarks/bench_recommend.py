@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Recommender Latency Benchmark
+Times Recommender.recommend over a synthetic candidate set, with and without
+region, expense, season and interest terms.
+
+Usage: python benchmarks/bench_recommend.py [candidates]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import Recommender, REGIONS, EXPENSE_LEVELS, ACTIVITY_TYPES  # noqa: E402
+
+SEASONS = ["April - October", "November - March", "March - May, September - November", "Year-round", ""]
+
+
+def synthetic(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    cities = [
+        {
+            'city': f"City {i}",
+            'country': f"Country {i % 180}",
+            'region': rng.choice(REGIONS),
+            'subregion': '',
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'expense': rng.choice(EXPENSE_LEVELS),
+            'image': '',
+            'best_time': rng.choice(SEASONS),
+        }
+        for i in range(count)
+    ]
+    activities = [
+        {'city': f"City {rng.randrange(count)}", 'type': rng.choice(ACTIVITY_TYPES)}
+        for _ in range(count * 2)
+    ]
+    return cities, activities
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    start = time.perf_counter()
+    recommender = Recommender(*synthetic(count))
+    print(f"Loaded {len(recommender):,} candidates in {time.perf_counter() - start:.2f}s")
+
+    cases = {
+        'rating only': {},
+        'region + expense': {'region': 'Asia', 'expense': 'budget'},
+        'all terms': {'region': 'Europe', 'expense': 'mid', 'month': 6, 'interests': ['food', 'culture']},
+    }
+    iterations = 200
+    for name, params in cases.items():
+        recommender.recommend(limit=8, **params)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            recommender.recommend(limit=8, **params)
+        elapsed = (time.perf_counter() - start) / iterations
+        print(f"{name:<18} {elapsed * 1000:.3f} ms/request")
+
+
+if __name__ == '__main__':
+    main()
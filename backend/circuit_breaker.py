@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Circuit Breakers for Upstream Services
+One breaker per upstream (Gemini, Tavily). After `failure_threshold`
+consecutive failures, or calls slower than `slow_call_seconds`, the breaker
+opens and calls fail immediately with CircuitOpenError instead of waiting
+out a degraded upstream. After `reset_seconds` a single trial call is let
+through (half-open); its outcome closes the breaker again or re-opens it.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import registry
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+DEFAULT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+def stopped_early(error: BaseException) -> bool:
+    """Whether an LLM run "failed" only because its caller stopped reading the stream
+
+    LangChain reports a stream closed early (enough results arrived, or the
+    client went away) through on_llm_error with GeneratorExit or a
+    cancellation; the upstream itself was fine.
+    """
+    return isinstance(error, (GeneratorExit, asyncio.CancelledError))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with slow-call detection"""
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS, slow_call_seconds: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.rejected = 0
+
+    def _transition(self, state: str):
+        if state != self._state:
+            print(f"🔌 Circuit for {self.name}: {self._state} -> {state}")
+            registry.inc('circuit_transitions_total', upstream=self.name, state=state)
+            self._state = state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without claiming the half-open trial)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            return time.monotonic() - self._opened_at >= self.reset_seconds and not self._trial_running
+
+    def before_call(self):
+        """Claim permission for a call; raises CircuitOpenError when the breaker is open"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if time.monotonic() - self._opened_at >= self.reset_seconds and not self._trial_running:
+                self._transition(HALF_OPEN)
+                self._trial_running = True
+                return
+            self.rejected += 1
+        registry.inc('circuit_rejected_total', upstream=self.name)
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self, seconds: float = 0.0):
+        if self.slow_call_seconds and seconds > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._transition(CLOSED)
+
+    def release(self):
+        """Give back a call's permission without a verdict on the upstream"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """fn guarded by this breaker"""
+        def call(*args, **kwargs) -> Any:
+            self.before_call()
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.record_failure()
+                raise
+            self.record_success(time.perf_counter() - start)
+            return result
+        return call
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {'state': state, 'consecutive_failures': self._failures, 'rejected': self.rejected}
+
+
+class CircuitBreakerHandler(BaseCallbackHandler):
+    """Guards LLM calls with a breaker from LangChain's callbacks
+
+    raise_error makes the CircuitOpenError raised in on_llm_start abort the
+    call before any request is sent.
+    """
+
+    raise_error = True
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self._started = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self.breaker.before_call()
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        started = self._started.pop(run_id, None)
+        self.breaker.record_success(time.perf_counter() - started if started is not None else 0.0)
+
+    def on_llm_error(self, error, *, run_id=None, response=None, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        if not stopped_early(error):
+            self.breaker.record_failure()
+        elif response is not None and response.generations:
+            # Output was arriving when the caller stopped: the upstream is healthy
+            self.breaker.record_success(time.perf_counter() - started)
+        else:
+            self.breaker.release()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Search Observation Compaction
+Sits between the web search tool and the LLM. Raw Tavily hits are stripped
+of page boilerplate (cookie banners, navigation, markdown links and images),
+sentences repeated or near-repeated across results are dropped, and what is
+left is cut to a per-observation token budget, taking sentences round-robin
+across results so every source keeps its most relevant lead.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+from metrics import estimate_tokens, record_observation
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv('OBSERVATION_TOKEN_BUDGET', '400'))
+
+# Near-duplicate threshold: share of a sentence's word 4-grams already seen
+NEAR_DUPLICATE_OVERLAP = 0.8
+SHINGLE_SIZE = 4
+
+_BOILERPLATE = re.compile(
+    r"cookie|privacy policy|terms of (?:use|service)|all rights reserved|\bsign (?:in|up)\b|\blog ?in\b"
+    r"|subscribe|newsletter|skip to (?:main )?content|advertisement|\bshare (?:on|this)\b|click here"
+    r"|read more|javascript|enable js|back to top|\bmenu\b",
+    re.IGNORECASE
+)
+_MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"https?://\S+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*[\n|•]+\s*|\s+-{2,}\s+")
+_WORDS = re.compile(r"[a-z0-9$€£]+")
+
+
+def clean_text(text: str) -> str:
+    text = _MARKDOWN_IMAGE.sub(' ', text or '')
+    text = _MARKDOWN_LINK.sub(r'\1', text)
+    return _URL.sub(' ', text)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Content sentences of a snippet, boilerplate removed"""
+    sentences = []
+    for sentence in _SENTENCE_BREAK.split(clean_text(text)):
+        sentence = ' '.join(sentence.split())
+        words = sentence.split()
+        # Fragments like "Home" or "Hotels > Europe" carry nothing unless they hold a number
+        if len(words) < 4 and not any(c.isdigit() for c in sentence):
+            continue
+        if _BOILERPLATE.search(sentence):
+            continue
+        sentences.append(sentence)
+    return sentences
+
+
+class _SeenSentences:
+    """Exact and near-duplicate detection over word shingles"""
+
+    def __init__(self):
+        self.exact = set()
+        self.shingles = set()
+
+    def add(self, sentence: str) -> bool:
+        """Record a sentence; False if it (nearly) repeats one already seen"""
+        words = _WORDS.findall(sentence.lower())
+        key = ' '.join(words)
+        if not key or key in self.exact:
+            return False
+        grams = {tuple(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+        if grams and len(grams & self.shingles) / len(grams) >= NEAR_DUPLICATE_OVERLAP:
+            return False
+        self.exact.add(key)
+        self.shingles |= grams
+        return True
+
+
+def _hits(results: Any) -> List[Dict[str, str]]:
+    """Flatten tool output (list of hits, several lists, or plain text) into hits"""
+    if isinstance(results, str):
+        return [{'url': '', 'content': results}]
+    hits = []
+    for item in results or []:
+        if isinstance(item, dict):
+            hits.append(item)
+        else:
+            hits.extend(_hits(item))
+    return hits
+
+
+def compact_observation(results: Any, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Compact search results into at most ~token_budget tokens of unique content"""
+    hits = []
+    urls = set()
+    seen = _SeenSentences()
+    for hit in _hits(results):
+        url = hit.get('url', '')
+        if url and url in urls:
+            continue
+        urls.add(url)
+        sentences = [s for s in split_sentences(hit.get('content', '')) if seen.add(s)]
+        if sentences:
+            hits.append((url, sentences))
+
+    # Round-robin over results so the budget isn't spent entirely on the first source
+    chosen: List[List[str]] = [[] for _ in hits]
+    used = 0
+    depth = 0
+    remaining = True
+    while remaining:
+        remaining = False
+        for index, (_, sentences) in enumerate(hits):
+            if depth >= len(sentences):
+                continue
+            remaining = True
+            cost = estimate_tokens(sentences[depth])
+            if used + cost > token_budget:
+                remaining = False
+                break
+            chosen[index].append(sentences[depth])
+            used += cost
+        depth += 1
+
+    blocks = []
+    for (url, _), sentences in zip(hits, chosen):
+        if sentences:
+            header = f"[{len(blocks) + 1}] {url}" if url else f"[{len(blocks) + 1}]"
+            blocks.append(header + "\n" + ' '.join(sentences))
+    compacted = '\n\n'.join(blocks)
+
+    # Uncompacted, the LLM would have seen the tool output's string form
+    raw_tokens = estimate_tokens(results if isinstance(results, str) else str(results))
+    record_observation(raw_tokens, estimate_tokens(compacted))
+    return compacted
+
+
+def compacting_search(search_tool, token_budget: int = DEFAULT_TOKEN_BUDGET):
+    """Wrap a search tool's invoke so the agent only ever sees compacted observations"""
+    def search(query: str) -> str:
+        return compact_observation(search_tool.invoke(query), token_budget)
+    return search
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Columnar Destination Store
+Compact on-disk format for the destination catalog that the backend memory-maps
+at startup. Low-cardinality columns (country, region, price_range) are
+dictionary-encoded into uint16 codes backed by a small string table; free-text
+columns are stored as uint32 offsets into a UTF-8 blob. Readers never copy the
+file: every column is a memoryview over the shared mmap, so all uvicorn workers
+share the same page cache and startup cost does not grow with catalog size.
+
+File layout:
+    MAGIC (8 bytes) | header length (uint32 LE) | JSON header | aligned column data
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from typing import Dict, List, Any, Optional, Iterator
+
+# Next to this module, wherever the backend or the ingestion script is run from
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'destinations.gtcol')
+
+MAGIC = b"GTCOL\x01\x00\x00"
+ALIGNMENT = 8
+
+# Columns with few distinct values are dictionary-encoded
+DICTIONARY_COLUMNS = ['country', 'region', 'price_range']
+STRING_COLUMNS = ['id', 'name', 'description', 'image_url', 'best_time', 'highlights']
+HIGHLIGHT_SEPARATOR = ';'
+
+
+def _pad(length: int) -> int:
+    """Number of padding bytes needed to align a section"""
+    return (-length) % ALIGNMENT
+
+
+def write_destination_store(destinations: List[Dict], path: str) -> None:
+    """Write destinations (as produced by the CSV ingestion step) to a columnar file"""
+    row_count = len(destinations)
+    sections = []
+    columns = {}
+
+    for column in DICTIONARY_COLUMNS:
+        table: List[str] = []
+        lookup: Dict[str, int] = {}
+        codes = array('H')
+        for dest in destinations:
+            value = (dest.get(column) or '').strip()
+            if value not in lookup:
+                if len(table) >= 0xFFFF:
+                    raise ValueError(f"Too many distinct values for dictionary column '{column}'")
+                lookup[value] = len(table)
+                table.append(value)
+            codes.append(lookup[value])
+        columns[column] = {'kind': 'dictionary', 'table': table, 'codes': len(sections)}
+        sections.append(codes.tobytes())
+
+    for column in STRING_COLUMNS:
+        offsets = array('I', [0])
+        blob = bytearray()
+        for dest in destinations:
+            value = dest.get(column) or ''
+            if isinstance(value, list):
+                value = HIGHLIGHT_SEPARATOR.join(value)
+            blob += str(value).encode('utf-8')
+            offsets.append(len(blob))
+        columns[column] = {'kind': 'string', 'offsets': len(sections), 'data': len(sections) + 1}
+        sections.append(offsets.tobytes())
+        sections.append(bytes(blob))
+
+    # Resolve section indexes into absolute (offset, length) pairs. The header
+    # size depends on those offsets, so iterate until it stops changing.
+    header_size = 0
+    while True:
+        position = len(MAGIC) + 4 + header_size
+        position += _pad(position)
+        layout = []
+        for section in sections:
+            layout.append([position, len(section)])
+            position += len(section) + _pad(len(section))
+
+        resolved = {}
+        for name, spec in columns.items():
+            entry = dict(spec)
+            for key in ('codes', 'offsets', 'data'):
+                if key in entry:
+                    entry[key] = layout[entry[key]]
+            resolved[name] = entry
+
+        header = json.dumps({
+            'row_count': row_count,
+            'byteorder': sys.byteorder,
+            'columns': resolved,
+        }, separators=(',', ':')).encode('utf-8')
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(b'\x00' * _pad(f.tell()))
+        for section in sections:
+            f.write(section)
+            f.write(b'\x00' * _pad(len(section)))
+    os.replace(tmp_path, path)
+
+
+class DestinationStore:
+    """Read-only, memory-mapped view over a columnar destination file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._tables: Dict[str, List[str]] = {}
+        self._codes: Dict[str, memoryview] = {}
+        self._offsets: Dict[str, memoryview] = {}
+        self._data: Dict[str, memoryview] = {}
+
+        if self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a destination store file")
+
+        (header_len,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(self._view[header_start:header_start + header_len]))
+
+        if header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+
+        self.row_count = header['row_count']
+
+        for name, spec in header['columns'].items():
+            if spec['kind'] == 'dictionary':
+                self._tables[name] = spec['table']
+                self._codes[name] = self._section(spec['codes']).cast('H')
+            else:
+                self._offsets[name] = self._section(spec['offsets']).cast('I')
+                self._data[name] = self._section(spec['data'])
+
+    def _section(self, location: List[int]) -> memoryview:
+        start, length = location
+        return self._view[start:start + length]
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def close(self):
+        """Release the memory map and file handle"""
+        for views in (self._codes, self._offsets, self._data):
+            for view in views.values():
+                view.release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def values(self, column: str) -> List[str]:
+        """Distinct values of a dictionary-encoded column"""
+        return list(self._tables[column])
+
+    def _string(self, column: str, row: int) -> str:
+        offsets = self._offsets[column]
+        return str(self._data[column][offsets[row]:offsets[row + 1]], 'utf-8')
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialize a single destination as a dict"""
+        if not 0 <= index < self.row_count:
+            raise IndexError(index)
+        destination: Dict[str, Any] = {}
+        for column in STRING_COLUMNS:
+            destination[column] = self._string(column, index)
+        for column, codes in self._codes.items():
+            destination[column] = self._tables[column][codes[index]]
+        highlights = destination['highlights']
+        destination['highlights'] = [h for h in highlights.split(HIGHLIGHT_SEPARATOR) if h] if highlights else []
+        return destination
+
+    def column(self, column: str) -> List[Any]:
+        """Every row's value for one column, decoding nothing else"""
+        if column in self._codes:
+            table = self._tables[column]
+            return [table[code] for code in self._codes[column]]
+        offsets = self._offsets[column].tolist()
+        data = bytes(self._data[column])
+        values = [str(data[start:end], 'utf-8') for start, end in zip(offsets, offsets[1:])]
+        if column == 'highlights':
+            return [[h for h in value.split(HIGHLIGHT_SEPARATOR) if h] if value else [] for value in values]
+        return values
+
+    def filter(self, region: Optional[str] = None, country: Optional[str] = None,
+               price_range: Optional[str] = None) -> List[int]:
+        """Return row indexes matching all given dictionary-column filters"""
+        criteria = {'region': region, 'country': country, 'price_range': price_range}
+        wanted = []
+        for column, value in criteria.items():
+            if value is None:
+                continue
+            table = self._tables[column]
+            # Compare case-insensitively against the (tiny) string table, then
+            # scan the integer codes rather than decoding any strings
+            matches = {code for code, entry in enumerate(table) if entry.lower() == value.lower()}
+            if not matches:
+                return []
+            wanted.append((self._codes[column], matches))
+
+        if not wanted:
+            return list(range(self.row_count))
+
+        (first_codes, first_matches), rest = wanted[0], wanted[1:]
+        rows = [i for i, code in enumerate(first_codes) if code in first_matches]
+        for codes, matches in rest:
+            rows = [i for i in rows if codes[i] in matches]
+        return rows
+
+    def iter_rows(self, indexes: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate materialized destinations, optionally restricted to given rows"""
+        for index in (range(self.row_count) if indexes is None else indexes):
+            yield self.row(index)
+
+    def search(self, region: Optional[str] = None, country: Optional[str] = None,
+               price_range: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Filter the catalog and materialize at most `limit` matching destinations"""
+        rows = self.filter(region=region, country=country, price_range=price_range)
+        if limit is not None:
+            rows = rows[:limit]
+        return list(self.iter_rows(rows))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Generator Pool
+Requests check a generator out of a fixed-size pool instead of sharing one
+global instance, so concurrent calls never share an agent executor, LLM
+client or its callback handlers. The pooled generators are clones sharing
+the cache, knowledge base and circuit breakers (see
+AITravelItineraryGenerator.clone), so a result cached by one is served by
+all of them.
+
+The pool size is also the concurrency limit for generator calls: when every
+instance is checked out, callers wait for one to be returned, and that wait
+is recorded as the generator_pool_wait_seconds metric. Work a generator runs
+beside its caller (fan-out threads, background refreshes) and speculative
+searches run on fresh clones instead, so they never hold a pool slot or use
+a generator another request has checked out. Every generator and clone
+shares one upstream limit of the pool's size, so that work doesn't raise
+the number of agent/LLM runs in flight beyond it.
+"""
+
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from metrics import registry
+
+DEFAULT_POOL_SIZE = int(os.getenv('GENERATOR_POOL_SIZE', '4'))
+# How long a request waits for a free generator before failing
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv('GENERATOR_POOL_TIMEOUT', '120'))
+
+
+class PoolExhaustedError(RuntimeError):
+    """No generator was returned to the pool within the checkout timeout"""
+
+
+class GeneratorPool:
+    """Fixed set of generators handed out one request at a time"""
+
+    def __init__(self, generator, size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_CHECKOUT_TIMEOUT):
+        self.size = max(size, 1)
+        self.timeout = timeout
+        # Shared state (cache, breakers, knowledge base) is read from here
+        self.primary = generator
+        generator.limit_upstream(self.size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._idle.put(generator)
+        for _ in range(self.size - 1):
+            self._idle.put(generator.clone())
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Borrow a generator for the duration of the block"""
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        try:
+            generator = self._idle.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            registry.inc('generator_pool_timeouts_total')
+            raise PoolExhaustedError(f"No generator free after {time.perf_counter() - start:.1f}s") from None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        registry.observe('generator_pool_wait_seconds', time.perf_counter() - start)
+        try:
+            yield generator
+        finally:
+            self._idle.put(generator)
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """generator.method(*args, **kwargs) on a checked-out generator"""
+        with self.checkout() as generator:
+            return getattr(generator, method)(*args, **kwargs)
+
+    def call_unpooled(self, method: str, *args, cancel: Optional[threading.Event] = None, **kwargs) -> Any:
+        """generator.method(*args, **kwargs) on a fresh clone, for speculative work that mustn't take a slot
+
+        Once `cancel` is set the clone stops at its next agent step or top-up round.
+        """
+        clone = self.primary.clone()
+        clone.cancel_event = cancel
+        return getattr(clone, method)(*args, **kwargs)
+
+    def stream(self, method: str, *args, **kwargs) -> Iterator:
+        """Items of a generator's streaming method, holding the generator until it is exhausted or closed"""
+        with self.checkout() as generator:
+            yield from getattr(generator, method)(*args, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        idle = self._idle.qsize()
+        with self._lock:
+            waiting = self._waiting
+        return {'size': self.size, 'in_use': self.size - idle, 'idle': idle, 'waiting': waiting}
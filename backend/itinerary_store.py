@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Persistent Itinerary Store
+Keeps generated itineraries in a local SQLite database under a content hash of
+the normalized request, so identical requests are answered from disk and
+itineraries can be fetched again by ID. Each response is stored with a
+gzip-compressed copy, so serving it never compresses it again. Eviction is least-recently-used,
+capped by total payload bytes. Reads record access times in memory and write
+them in batches, so serving a stored itinerary doesn't cost a disk write.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import orjson
+
+from semantic_cache import normalize_text, normalize_budget
+from responses import precompress
+
+DEFAULT_DB_PATH = os.getenv('ITINERARY_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'itineraries.db'))
+DEFAULT_MAX_BYTES = int(os.getenv('ITINERARY_STORE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Pending access times are written once this many accumulate or this old
+TOUCH_BATCH_SIZE = int(os.getenv('ITINERARY_STORE_TOUCH_BATCH', '256'))
+TOUCH_FLUSH_SECONDS = float(os.getenv('ITINERARY_STORE_TOUCH_SECONDS', '30'))
+
+
+def request_hash(request: Dict[str, Any]) -> str:
+    """Content hash of a whole itinerary request
+
+    Every field takes part, nested ones included; only the destination and
+    budget are normalized so "Paris" and " paris " share an entry.
+    """
+    canonical = dict(request)
+    if 'destination' in canonical:
+        canonical['destination'] = normalize_text(canonical['destination'] or '')
+    if 'budget' in canonical:
+        canonical['budget'] = normalize_budget(canonical['budget'] or '')
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:32]
+
+
+class ItineraryStore:
+    """SQLite-backed, size-capped store of generated itineraries"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # id -> last read time not yet written to accessed_at
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS itineraries (
+                id TEXT PRIMARY KEY,
+                request JSON NOT NULL,
+                response JSON NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                response_gzip BLOB
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(itineraries)")}
+        if 'response_gzip' not in columns:
+            # Stores from before precompression; their entries are compressed per request
+            self._conn.execute("ALTER TABLE itineraries ADD COLUMN response_gzip BLOB")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_itineraries_accessed ON itineraries(accessed_at)")
+        self._conn.commit()
+
+    def _read(self, key: str, columns: str) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {columns} FROM itineraries WHERE id = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH_SIZE or time.monotonic() - self._flushed_at >= TOUCH_FLUSH_SECONDS:
+                self._flush_touches()
+                self._conn.commit()
+        return row
+
+    def get_raw(self, key: str) -> Optional[str]:
+        """Stored response JSON text for an ID, or None"""
+        row = self._read(key, "response")
+        return row[0] if row is not None else None
+
+    def get_encoded(self, key: str) -> Optional[Tuple[str, Dict[str, bytes]]]:
+        """Stored response JSON text and its compressed copies by content coding, or None"""
+        row = self._read(key, "response, response_gzip")
+        if row is None:
+            return None
+        return row[0], ({'gzip': row[1]} if row[1] is not None else {})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.get_raw(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    def put(self, key: str, request: Dict[str, Any], response: Any):
+        """Store a response (dict or model) and evict least-recently-used entries over the size cap"""
+        response_bytes = orjson.dumps(response)
+        request_bytes = orjson.dumps(request)
+        response_gzip = precompress(response_bytes).get('gzip')
+        size = len(response_bytes) + len(request_bytes) + len(response_gzip or b'')
+        response_json = response_bytes.decode('utf-8')
+        request_json = request_bytes.decode('utf-8')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO itineraries (id, request, response, response_gzip, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, request_json, response_json, response_gzip, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """Write pending access times; call with the lock held"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE itineraries SET accessed_at = MAX(accessed_at, ?) WHERE id = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def _evict(self):
+        # Eviction order has to see every read so far
+        self._flush_touches()
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM itineraries").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT id, size FROM itineraries ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM itineraries WHERE id = ?", victims)
+        print(f"🧹 Evicted {len(victims)} stored itineraries ({freed} bytes)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM itineraries").fetchone()
+        return {'entries': count, 'bytes': total, 'max_bytes': self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
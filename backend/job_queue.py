@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Durable Job Queue
+Long-running work (itineraries for long trips, cache prefetch) is queued in a
+local SQLite database and run by a pool of worker threads separate from the
+request handlers. Clients get a job ID immediately and poll it, or follow it
+over server-sent events, instead of holding a request open past proxy
+timeouts.
+
+Jobs are claimed lowest priority number first, so interactive jobs always
+run before queued background prefetch. Workers can't interrupt a running
+upstream call, so background jobs are also capped below the pool size,
+leaving a worker free for interactive jobs at all times.
+
+Several server processes can share one database, so a claimed job holds a
+lease naming its owner, which the owner's workers renew while it runs. A
+job whose lease has expired was interrupted (its process died) and is
+claimed again; one that has already been attempted JOB_MAX_ATTEMPTS times
+is marked failed instead, so a job that kills its worker can't loop forever.
+"""
+
+import os
+import socket
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from metrics import registry, track_tokens
+
+DEFAULT_DB_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db'))
+DEFAULT_WORKERS = int(os.getenv('JOB_WORKERS', '3'))
+DEFAULT_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', str(24 * 60 * 60)))
+DEFAULT_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+POLL_SECONDS = 0.5
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED = (DONE, FAILED)
+
+_STATUS_FIELDS = 'id, kind, priority, status, error, created_at, started_at, finished_at, attempts'
+
+
+def _status_row(row) -> Dict[str, Any]:
+    return dict(zip(('job_id', 'kind', 'priority', 'status', 'error', 'created_at', 'started_at',
+                     'finished_at', 'attempts'), row))
+
+
+class JobQueue:
+    """SQLite-backed priority queue of jobs and their results"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(max_attempts, 1)
+        # Identifies this process's leases among every process sharing the database
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        # Signalled on submit so idle workers pick new jobs up without waiting out a poll
+        self.available = threading.Condition()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                dedupe_key TEXT,
+                payload JSON NOT NULL,
+                status TEXT NOT NULL,
+                result JSON,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                lease_owner TEXT,
+                lease_expires REAL
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (('lease_owner', 'TEXT'), ('lease_expires', 'REAL')):
+            if column not in columns:
+                # Databases from before leases; their running jobs have none, so they count as expired
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs(status, priority, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, status)")
+        self._conn.commit()
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = PRIORITY_INTERACTIVE,
+               dedupe_key: Optional[str] = None) -> str:
+        """Queue a job; an unfinished job with the same dedupe key is returned instead"""
+        now = time.time()
+        with self._lock:
+            if dedupe_key is not None:
+                row = self._conn.execute(
+                    "SELECT id, priority FROM jobs WHERE dedupe_key = ? AND status IN (?, ?)",
+                    (dedupe_key, QUEUED, RUNNING)
+                ).fetchone()
+                if row is not None:
+                    if priority < row[1]:
+                        # An interactive request for queued background work takes its priority
+                        self._conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row[0]))
+                        self._conn.commit()
+                    return row[0]
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, priority, dedupe_key, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, priority, dedupe_key, orjson.dumps(payload).decode('utf-8'), QUEUED, now)
+            )
+            self._conn.commit()
+        registry.inc('jobs_submitted_total', kind=kind)
+        with self.available:
+            self.available.notify()
+        return job_id
+
+    def claim(self, max_priority: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Lease the next queued or interrupted job to this process and return it, or None if there is none"""
+        claimable = "(status = ? OR (status = ? AND (lease_expires IS NULL OR lease_expires < ?)))"
+        now = time.time()
+        params: List[Any] = [QUEUED, RUNNING, now]
+        if max_priority is not None:
+            claimable += " AND priority <= ?"
+            params.append(max_priority)
+        with self._lock:
+            # Jobs out of attempts are failed rather than claimed again
+            abandoned = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL "
+                f"WHERE {claimable} AND attempts >= ? RETURNING id",
+                [FAILED, f"Gave up after {self.max_attempts} attempts", now, *params, self.max_attempts]
+            ).fetchall()
+            # One statement, so two processes can never claim the same job
+            job = self._conn.execute(
+                f"UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1, lease_owner = ?, "
+                f"lease_expires = ? WHERE id = (SELECT id FROM jobs WHERE {claimable} "
+                f"ORDER BY priority, created_at LIMIT 1) "
+                f"RETURNING id, kind, priority, payload, created_at, started_at, attempts",
+                [RUNNING, now, self.owner, now + self.lease_seconds, *params]
+            ).fetchone()
+            self._conn.commit()
+        for (job_id,) in abandoned:
+            print(f"❌ Job {job_id} failed: gave up after {self.max_attempts} attempts")
+        if job is None:
+            return None
+        job = dict(zip(('job_id', 'kind', 'priority', 'payload', 'created_at', 'started_at', 'attempts'), job))
+        if job['attempts'] > 1:
+            print(f"♻️  Reclaimed interrupted job {job['job_id']} (attempt {job['attempts']})")
+        return job
+
+    def renew(self) -> int:
+        """Extend the leases on this process's running jobs"""
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE status = ? AND lease_owner = ?",
+                (time.time() + self.lease_seconds, RUNNING, self.owner)
+            ).rowcount
+            self._conn.commit()
+        return renewed
+
+    def complete(self, job_id: str, result: bytes):
+        """Record a finished job's JSON result, unless another process has since reclaimed it"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, result.decode('utf-8'), time.time(), job_id, RUNNING, self.owner)
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (FAILED, error, time.time(), job_id, RUNNING, self.owner)
+            )
+            self._conn.commit()
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status without the result, or None for an unknown ID"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_STATUS_FIELDS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _status_row(row) if row is not None else None
+
+    def get_raw_result(self, job_id: str) -> Optional[str]:
+        """A finished job's result JSON text, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Number of queued jobs that will run before this one, or None if it isn't queued"""
+        with self._lock:
+            me = self._conn.execute(
+                "SELECT priority, created_at FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED)
+            ).fetchone()
+            if me is None:
+                return None
+            (ahead,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND (priority < ? OR (priority = ? AND created_at < ?))",
+                (QUEUED, me[0], me[0], me[1])
+            ).fetchone()
+        return ahead
+
+    def purge(self) -> int:
+        """Delete finished jobs past the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """Worker threads running queued jobs through a handler per job kind
+
+    Handlers take the job payload and return a JSON-serializable result.
+    At most `workers - 1` background jobs run at once, so an interactive job
+    never waits behind a pool full of prefetch work. A heartbeat thread renews
+    the leases on running jobs while the pool is up.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 workers: int = DEFAULT_WORKERS):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(workers, 1)
+        self.background_limit = max(self.workers - 1, 1)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._background_running = 0
+        self._count_lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        print(f"✅ Job workers started: {self.workers} ({self.background_limit} for background jobs)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        with self.queue.available:
+            self.queue.available.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.renew()
+            except sqlite3.Error as e:
+                print(f"⚠️  Job lease renewal failed: {e}")
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        with self._count_lock:
+            background_allowed = self._background_running < self.background_limit
+            job = self.queue.claim(None if background_allowed else PRIORITY_BACKGROUND - 1)
+            if job is not None and job['priority'] >= PRIORITY_BACKGROUND:
+                self._background_running += 1
+        return job
+
+    def _run(self):
+        idle_polls = 0
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                idle_polls += 1
+                if idle_polls % 1200 == 0:
+                    self.queue.purge()
+                with self.queue.available:
+                    self.queue.available.wait(POLL_SECONDS)
+                continue
+            idle_polls = 0
+            try:
+                self._execute(job)
+            finally:
+                if job['priority'] >= PRIORITY_BACKGROUND:
+                    with self._count_lock:
+                        self._background_running -= 1
+
+    def _execute(self, job: Dict[str, Any]):
+        kind = job['kind']
+        registry.observe('job_wait_seconds', job['started_at'] - job['created_at'], kind=kind)
+        handler = self.handlers.get(kind)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{kind}'")
+            with track_tokens() as usage:
+                result = handler(orjson.loads(job['payload']))
+            self.queue.complete(job['job_id'], orjson.dumps(result))
+            registry.inc('jobs_total', kind=kind, status=DONE)
+            registry.observe('job_prompt_tokens', usage.prompt_tokens, kind=kind)
+        except Exception as e:
+            print(f"❌ Job {job['job_id']} ({kind}) failed: {e}")
+            self.queue.fail(job['job_id'], str(e))
+            registry.inc('jobs_total', kind=kind, status=FAILED)
+        registry.observe('job_run_seconds', time.perf_counter() - start, kind=kind)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Local Knowledge Base
+Known hotels and activities per city, gathered from data we already ship
+(ACTIVITIES/CITIES in data/recommendations.ts, the destination catalog's
+highlights) plus an optional curated JSON file. A search location is
+resolved to a city through a BM25-ranked inverted index over city names and
+countries, so "Kyoto, Japan" and "kyoto" land on the same entry. The
+generator consults this before calling the agent.
+
+Only the catalog's name and country columns are read at startup; a city's
+highlights are turned into activities the first time it is looked up.
+
+Curated file format (LOCAL_KB_PATH):
+
+    {"cities": [{"city": "Lisbon", "country": "Portugal",
+                 "hotels": [{"name": ..., "price": ..., "rating": ...}],
+                 "activities": [{"name": ..., "price": ...}]}]}
+"""
+
+import os
+import json
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from semantic_cache import normalize_text
+from models import Hotel, Activity
+from normalization import normalize_hotels, normalize_prices
+from recommender import load_ts_array, DEFAULT_CITY_META_PATH
+
+DEFAULT_KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge_base.json')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class _BM25Index:
+    """Inverted index with BM25 scoring over short token lists"""
+
+    def __init__(self):
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+
+    def add(self, tokens: List[str]) -> int:
+        doc = len(self.lengths)
+        for token, frequency in Counter(tokens).items():
+            self.postings[token].append((doc, frequency))
+        self.lengths.append(len(tokens))
+        return doc
+
+    def search(self, tokens: List[str]) -> List[Tuple[int, float]]:
+        """(doc, score) pairs, best first"""
+        count = len(self.lengths)
+        if not count:
+            return []
+        average = sum(self.lengths) / count
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / average)
+                scores[doc] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def _activity_from_meta(meta: Dict) -> Activity:
+    cost = meta.get('avg_cost')
+    hours = meta.get('duration_hours')
+    kind = (meta.get('type') or 'activity').title()
+    description = f"{kind} in {meta.get('city', '')}"
+    if hours:
+        description += f", about {hours:g} hours"
+    return Activity.from_dict({
+        'name': meta.get('title', ''),
+        'description': description,
+        'price': ('Free' if cost == 0 else f"${cost:g}") if cost is not None else None,
+    })
+
+
+class LocalKnowledgeBase:
+    """Per-city hotels and activities with BM25 location lookup"""
+
+    def __init__(self):
+        self._index = _BM25Index()
+        self._cities: List[Dict] = []
+        self._by_name: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+
+    def _city(self, name: str, country: str = '') -> Dict:
+        key = normalize_text(name)
+        if key not in self._by_name:
+            entry = {'city': name, 'country': country, 'tokens': set(key.split()), 'hotels': [], 'activities': [], 'seen': set(),
+                     'store_rows': []}
+            self._by_name[key] = self._index.add(key.split() + normalize_text(country).split())
+            self._cities.append(entry)
+        entry = self._cities[self._by_name[key]]
+        if country and not entry['country']:
+            entry['country'] = country
+        return entry
+
+    def add(self, kind: str, city: str, item, country: str = ''):
+        """Add a hotel or activity model for a city, ignoring duplicate names"""
+        entry = self._city(city, country)
+        name = normalize_text(item.name)
+        if name and (kind, name) not in entry['seen']:
+            entry['seen'].add((kind, name))
+            entry[kind].append(item)
+
+    @classmethod
+    def load(cls, city_meta_path: str = DEFAULT_CITY_META_PATH, destination_store=None,
+             kb_path: str = DEFAULT_KB_PATH) -> "LocalKnowledgeBase":
+        kb = cls()
+
+        # Curated file first so its entries lead each city's list
+        if kb_path and os.path.exists(kb_path):
+            with open(kb_path, 'r', encoding='utf-8') as f:
+                curated = json.load(f)
+            for city in curated.get('cities', []):
+                for hotel in normalize_hotels([Hotel.from_dict(h) for h in city.get('hotels', [])]):
+                    kb.add('hotels', city['city'], hotel, city.get('country', ''))
+                for activity in normalize_prices([Activity.from_dict(a) for a in city.get('activities', [])]):
+                    kb.add('activities', city['city'], activity, city.get('country', ''))
+
+        if city_meta_path and os.path.exists(city_meta_path):
+            with open(city_meta_path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            for city in load_ts_array(source, 'CITIES'):
+                kb._city(city.get('city', ''), city.get('country', ''))
+            for meta in load_ts_array(source, 'ACTIVITIES'):
+                kb.add('activities', meta.get('city', ''), normalize_prices([_activity_from_meta(meta)])[0])
+
+        if destination_store is not None:
+            kb._store = destination_store
+            for index, (name, country) in enumerate(zip(destination_store.column('name'),
+                                                        destination_store.column('country'))):
+                if name:
+                    kb._city(name, country)['store_rows'].append(index)
+
+        return kb
+
+    def _load_highlights(self, entry: Dict):
+        """Add the catalog highlights of a city's store rows as activities (call with the lock held)"""
+        for index in entry['store_rows']:
+            row = self._store.row(index)
+            name, country = row['name'], row['country']
+            for highlight in row['highlights']:
+                activity = Activity.from_dict({
+                    'name': highlight,
+                    'description': f"One of the highlights of {name}, {country}" if country else f"One of the highlights of {name}",
+                })
+                self.add('activities', name, normalize_prices([activity])[0], country)
+        entry['store_rows'] = []
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def resolve(self, location: str) -> Optional[Dict]:
+        """Best matching city for a free-text location, or None
+
+        Every token of the city's name must appear in the location, so
+        "York" doesn't resolve to New York.
+        """
+        tokens = normalize_text(location).split()
+        present = set(tokens)
+        for doc, _ in self._index.search(tokens):
+            entry = self._cities[doc]
+            if entry['tokens'] and entry['tokens'] <= present:
+                return entry
+        return None
+
+    def lookup(self, kind: str, location: str) -> List:
+        """Copies of the known hotels or activities for a location"""
+        entry = self.resolve(location)
+        with self._lock:
+            if entry and entry['store_rows']:
+                self._load_highlights(entry)
+            items = list(entry[kind]) if entry else []
+            if items:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return [replace(item) for item in items]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'cities': len(self._cities),
+                'hotels': sum(len(entry['hotels']) for entry in self._cities),
+                'activities': sum(len(entry['activities']) for entry in self._cities),
+                # Catalog cities whose highlights haven't been needed yet
+                'unloaded': sum(1 for entry in self._cities if entry['store_rows']),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
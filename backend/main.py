@@ -5,18 +5,36 @@ Wraps the existing Python script with REST API endpoints
 """
 
 import os
+import hmac
 import json
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Depends, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import uvicorn
+import orjson
 
 # Import the existing travel generator
 from travel_generator import AITravelItineraryGenerator
+from generator_pool import GeneratorPool
+from models import Hotel, Activity, Itinerary
+from destination_store import DestinationStore, DEFAULT_STORE_PATH
+from prefetch import PrefetchScheduler, DEFAULT_HOTLIST_PATH, prefetch_item
+from job_queue import JobQueue, JobWorkerPool, PRIORITY_INTERACTIVE, DONE, FINISHED
+from speculation import SpeculativeSlots, activity_slot_key
+from itinerary_store import ItineraryStore, request_hash
+from responses import FastJSONResponse, NDJSONStreamingResponse, iterate_in_thread, sse_event
+from amenities import AmenityEngine
+from normalization import filter_and_sort
+from knowledge_base import LocalKnowledgeBase, DEFAULT_KB_PATH
+from profiler import profiler, ProfilingMiddleware, AttributingExecutor
+from metrics import RequestMetricsMiddleware, registry
+from recommender import Recommender, DEFAULT_CITY_META_PATH, REGIONS, EXPENSE_LEVELS, ACTIVITY_TYPES
 
-app = FastAPI(title="AI Travel Itinerary API", version="1.0.0")
+app = FastAPI(title="AI Travel Itinerary API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,6 +45,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-endpoint latency and LLM/search token usage, served at /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# Sampling profiler driven from /admin/profile (opt-in)
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+# Shared secret the /admin endpoints require in the X-Admin-Token header; unset disables them
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Pydantic models for request/response
 class TripRequest(BaseModel):
     destination: str
@@ -40,6 +68,9 @@ class HotelSearchRequest(BaseModel):
     end_date: str
     budget: str
 
+class BatchHotelSearchRequest(BaseModel):
+    searches: List[HotelSearchRequest]
+
 class ActivitySearchRequest(BaseModel):
     destination: str
     budget: str
@@ -55,231 +86,653 @@ class ItineraryRequest(BaseModel):
     selected_hotel: Dict
     activities: List[Dict]
 
-class Hotel(BaseModel):
-    id: str
-    name: str
-    description: str
-    price: str
-    rating: str
-    location: str
-    amenities: List[str]
-
-class Activity(BaseModel):
-    name: str
-    description: str
-    price: str
-    hours: str
-    distance: str
-    transport: str
-
-class DayPlan(BaseModel):
+class ItineraryLeg(BaseModel):
+    destination: str
+    start_date: str
+    end_date: str
+    selected_hotel: Dict
+    activities: List[Dict] = []
+    budget: Optional[str] = None  # defaults to the trip budget
+
+class MultiCityItineraryRequest(BaseModel):
+    budget: str
+    legs: List[ItineraryLeg]
+
+class ItineraryEdit(BaseModel):
+    op: str  # 'replace_activity', 'move_activity', 'change_hotel' or 'extend_dates'
+    day: Optional[int] = None
+    index: Optional[int] = None
+    to_day: Optional[int] = None
+    activity: Optional[Dict] = None
+    hotel: Optional[Dict] = None
+    end_date: Optional[str] = None
+    activities: Optional[List[Dict]] = None
+
+class DayPlanBody(BaseModel):
+    model_config = ConfigDict(extra='allow')
     day: int
     date: str
-    activities: List[Activity]
-    ai_suggestions: str
+    activities: List[Dict] = []
 
-class ItineraryResponse(BaseModel):
+class ItineraryBody(BaseModel):
+    """A previously generated itinerary response; fields the patch doesn't need pass through"""
+    model_config = ConfigDict(extra='allow')
     destination: str
     dates: str
     duration: str
     budget: str
-    selected_hotel: Dict
-    daily_schedule: List[DayPlan]
-    generated_by: str
+    selected_hotel: Dict = {}
+    daily_schedule: List[DayPlanBody]
+
+class ItineraryPatchRequest(BaseModel):
+    itinerary: ItineraryBody
+    edits: List[ItineraryEdit]
+
+def result_filters(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    sort: Optional[str] = Query(None, pattern="^(price|rating)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$")
+) -> Dict[str, Any]:
+    """Query params filtering/sorting search results on their normalized price and rating"""
+    return {
+        'min_price': min_price, 'max_price': max_price, 'min_rating': min_rating,
+        'currency': currency, 'sort': sort, 'order': order,
+    }
+
+# Pool of AI generators, one checked out per call (GENERATOR_POOL_SIZE)
+generator_pool = None
 
-# Initialize the AI generator
-generator = None
+amenity_engine = AmenityEngine()
+
+# Memory-mapped destination catalog written by scripts/analyze_csv_and_hardcode.py
+destination_store = None
+DESTINATION_STORE_PATH = os.getenv('DESTINATION_STORE_PATH', DEFAULT_STORE_PATH)
+
+# Generated itineraries persisted under a content hash of the request
+itinerary_store = None
+
+# Destination ranking behind the frontend's RECOMMENDER_URL hook
+recommender = None
+CITY_META_PATH = os.getenv('CITY_META_PATH', DEFAULT_CITY_META_PATH)
+
+# Curated hotels/activities file for the generator's local knowledge base tier
+LOCAL_KB_PATH = os.getenv('LOCAL_KB_PATH', DEFAULT_KB_PATH)
+
+# Durable queue and worker pool for long itineraries and background prefetch
+job_queue = None
+job_workers = None
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+# Off-peak cache warm-up for popular destinations (opt-in)
+prefetch_scheduler = None
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PREFETCH_HOTLIST_PATH = os.getenv('PREFETCH_HOTLIST_PATH', DEFAULT_HOTLIST_PATH)
+
+# Activity searches started speculatively when a hotel search begins
+SPECULATIVE_ACTIVITIES = os.getenv('SPECULATIVE_ACTIVITIES', 'true').lower() in ('1', 'true', 'yes')
+speculative_slots = SpeculativeSlots(timeout_seconds=float(os.getenv('SPECULATION_TIMEOUT', '90')))
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the AI generator on startup"""
-    global generator
+    global generator_pool, destination_store, prefetch_scheduler, itinerary_store, recommender, job_queue, job_workers
+    if PROFILER_ENABLED:
+        # asyncio.to_thread() work is sampled under the request that started it
+        asyncio.get_running_loop().set_default_executor(AttributingExecutor(thread_name_prefix='asyncio'))
+    
+    if os.path.exists(DESTINATION_STORE_PATH):
+        destination_store = DestinationStore(DESTINATION_STORE_PATH)
+        print(f"✅ Destination store mapped: {len(destination_store)} destinations")
+    else:
+        print(f"⚠️  Destination store not found at {DESTINATION_STORE_PATH}, /api/destinations disabled")
+    
+    recommender = Recommender.load(CITY_META_PATH, destination_store)
+    print(f"✅ Recommender ready: {len(recommender)} candidate cities")
+    
+    knowledge_base = LocalKnowledgeBase.load(CITY_META_PATH, destination_store, LOCAL_KB_PATH)
+    kb_stats = knowledge_base.stats()
+    print(f"✅ Local knowledge base: {kb_stats['activities']} activities, {kb_stats['hotels']} hotels in {kb_stats['cities']} cities "
+          f"({kb_stats['unloaded']} catalog cities load their highlights on first lookup)")
+    
+    itinerary_store = ItineraryStore()
+    print(f"✅ Itinerary store ready: {itinerary_store.stats()['entries']} stored itineraries")
+    
     try:
         # Set environment variables
         os.environ['GEMINI_API_KEY'] = ''
         os.environ['TAVILY_API_KEY'] = ''
         
-        generator = AITravelItineraryGenerator()
-        print("✅ AI Travel Generator initialized successfully")
+        generator_pool = GeneratorPool(AITravelItineraryGenerator(knowledge_base=knowledge_base))
+        print(f"✅ AI Travel Generator initialized successfully ({generator_pool.size} pooled instances)")
     except Exception as e:
         print(f"❌ Error initializing AI generator: {e}")
         raise
+    
+    job_queue = JobQueue()
+    job_workers = JobWorkerPool(job_queue, {
+        'itinerary': run_itinerary_job,
+        'prefetch': run_prefetch_job,
+    })
+    job_workers.start()
+    
+    if PREFETCH_ENABLED:
+        prefetch_scheduler = PrefetchScheduler(generator_pool.primary, PREFETCH_HOTLIST_PATH, jobs=job_queue)
+        prefetch_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work on shutdown"""
+    if prefetch_scheduler:
+        await prefetch_scheduler.stop()
+    speculative_slots.cancel_all()
+    profiler.stop()
+    if job_workers:
+        job_workers.stop()
+    if job_queue:
+        job_queue.close()
+    if itinerary_store:
+        itinerary_store.close()
 
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "AI Travel Itinerary API is running", "status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Request latency, token usage, cache counters and upstream circuit states"""
+    snapshot = registry.snapshot()
+    if generator_pool:
+        generator = generator_pool.primary
+        snapshot['generator_pool'] = generator_pool.stats()
+        snapshot['semantic_cache'] = generator.cache.stats()
+        snapshot['circuit_breakers'] = {name: breaker.stats() for name, breaker in generator.breakers.items()}
+        if generator.knowledge_base:
+            snapshot['knowledge_base'] = generator.knowledge_base.stats()
+    if itinerary_store:
+        snapshot['itinerary_store'] = itinerary_store.stats()
+    if job_queue:
+        snapshot['jobs'] = job_queue.stats()
+    if PROFILER_ENABLED:
+        snapshot['profiler'] = profiler.stats()
+    return FastJSONResponse(snapshot)
+
+def require_profiler_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding the profiler endpoints: enabled, and called with the admin token"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler not enabled")
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN not configured")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/profile/start", dependencies=[Depends(require_profiler_admin)])
+async def start_profile(
+    seconds: float = Query(30, gt=0),
+    sample_rate: float = Query(1.0, gt=0, le=1),
+    interval_ms: float = Query(5, ge=1, le=1000)
+):
+    """Sample the stacks serving `sample_rate` of requests every `interval_ms` for `seconds`"""
+    try:
+        profiler.start(seconds, sample_rate, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FastJSONResponse(profiler.stats())
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_profiler_admin)])
+async def stop_profile():
+    """End the running profile early"""
+    await asyncio.to_thread(profiler.stop)
+    return FastJSONResponse(profiler.stats())
+
+@app.get("/admin/profile", dependencies=[Depends(require_profiler_admin)])
+async def get_profile(endpoint: Optional[str] = None):
+    """Collapsed stacks of the current or last profile, for flamegraph.pl or speedscope
+    
+    Every stack is rooted at its endpoint's name; pass `endpoint` for one
+    endpoint's stacks alone.
+    """
+    return PlainTextResponse(profiler.collapsed(endpoint))
+
+@app.get("/api/destinations")
+async def list_destinations(
+    region: Optional[str] = None,
+    country: Optional[str] = None,
+    price_range: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """Filter the memory-mapped destination catalog"""
+    if not destination_store:
+        raise HTTPException(status_code=503, detail="Destination store not available")
+    
+    destinations = destination_store.search(region=region, country=country, price_range=price_range, limit=limit)
+    return FastJSONResponse({"destinations": destinations, "count": len(destinations)})
+
+@app.get("/recommend")
+async def recommend(
+    region: Optional[str] = Query(None),
+    expense: Optional[str] = Query(None),
+    limit: int = Query(8, ge=1, le=100),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    interests: Optional[str] = Query(None, description="Comma-separated activity types")
+):
+    """Ranked CityMeta list for the frontend's /api/recommend route"""
+    if not recommender:
+        raise HTTPException(status_code=503, detail="Recommender not available")
+    if region and region not in REGIONS:
+        raise HTTPException(status_code=400, detail=f"region must be one of {', '.join(REGIONS)}")
+    if expense and expense not in EXPENSE_LEVELS:
+        raise HTTPException(status_code=400, detail=f"expense must be one of {', '.join(EXPENSE_LEVELS)}")
+    
+    wanted = [kind.strip() for kind in (interests or '').split(',') if kind.strip()]
+    unknown = [kind for kind in wanted if kind not in ACTIVITY_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown activity types: {', '.join(unknown)}")
+    
+    return FastJSONResponse(recommender.recommend(region, expense, limit, month, wanted))
+
 @app.post("/api/search-hotels")
-async def search_hotels(request: HotelSearchRequest):
+async def search_hotels(request: HotelSearchRequest, filters: Dict[str, Any] = Depends(result_filters)):
     """Search for hotels using AI agent"""
     try:
-        if not generator:
+        if not generator_pool:
             raise HTTPException(status_code=500, detail="AI generator not initialized")
         
         print(f"🔍 Searching hotels in {request.destination} for {request.budget} budget...")
         
-        # Calculate duration
-        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
-        duration = (end_date - start_date).days
+        start_speculative_activities(request)
         
         # Use the existing search_hotels method
-        hotels_data = generator.search_hotels(
+        hotels_data = await asyncio.to_thread(
+            generator_pool.call,
+            'search_hotels',
             request.destination,
             request.start_date,
             request.end_date,
             request.budget
         )
         
-        # Convert to frontend format with IDs and amenities
-        hotels = []
-        for i, hotel in enumerate(hotels_data):
-            # Generate amenities based on hotel description and price
-            amenities = generate_amenities(hotel, request.budget)
-            
-            hotels.append({
-                "id": str(i + 1),
-                "name": hotel.get('name', f'Hotel {i+1}'),
-                "description": hotel.get('description', 'No description available'),
-                "price": hotel.get('price', 'Price varies'),
-                "rating": hotel.get('rating', 'Rating not available'),
-                "location": hotel.get('location', request.destination),
-                "amenities": amenities
-            })
+        # Models are serialized once, straight to JSON
+        hotels = filter_and_sort(format_hotels(hotels_data, request.budget), **filters)
+        return FastJSONResponse({"hotels": hotels})
         
-        return {"hotels": hotels}
+    except Exception as e:
+        print(f"❌ Error searching hotels: {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching hotels: {str(e)}")
+
+@app.post("/api/search-hotels/stream")
+async def stream_hotels(request: HotelSearchRequest):
+    """Search for hotels, sending each one as an NDJSON line as soon as it is found
+    
+    Lines are {"hotel": {...}} in the order found, then {"done": true, "count": n}.
+    """
+    try:
+        if not generator_pool:
+            raise HTTPException(status_code=500, detail="AI generator not initialized")
+        
+        print(f"🔍 Streaming hotels in {request.destination} for {request.budget} budget...")
         
+        start_speculative_activities(request)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error searching hotels: {e}")
         raise HTTPException(status_code=500, detail=f"Error searching hotels: {str(e)}")
+    
+    async def lines():
+        count = 0
+        hotels = generator_pool.stream('stream_hotels', request.destination, request.start_date, request.end_date, request.budget)
+        async for hotel in iterate_in_thread(hotels):
+            count += 1
+            yield {"hotel": format_hotels([hotel], request.budget, first_id=count)[0]}
+        yield {"done": True, "count": count}
+    
+    return NDJSONStreamingResponse(lines())
+
+@app.post("/api/search-hotels/batch")
+async def search_hotels_batch(request: BatchHotelSearchRequest, filters: Dict[str, Any] = Depends(result_filters)):
+    """Search hotels for several cities in one request (multi-city trips)"""
+    try:
+        if not generator_pool:
+            raise HTTPException(status_code=500, detail="AI generator not initialized")
+        if not request.searches:
+            return {"results": []}
+        
+        print(f"🔍 Batch searching hotels in {len(request.searches)} cities...")
+        
+        hotels_per_city = await asyncio.to_thread(
+            generator_pool.call,
+            'search_hotels_batch',
+            [{"location": search.destination, "budget": search.budget} for search in request.searches]
+        )
+        
+        results = []
+        for search, hotels_data in zip(request.searches, hotels_per_city):
+            results.append({
+                "destination": search.destination,
+                "budget": search.budget,
+                "hotels": filter_and_sort(format_hotels(hotels_data, search.budget), **filters)
+            })
+        
+        return FastJSONResponse({"results": results})
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error batch searching hotels: {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching hotels: {str(e)}")
 
 @app.post("/api/search-activities")
-async def search_activities(request: ActivitySearchRequest):
+async def search_activities(request: ActivitySearchRequest, filters: Dict[str, Any] = Depends(result_filters)):
     """Search for activities using AI agent"""
     try:
-        if not generator:
+        if not generator_pool:
             raise HTTPException(status_code=500, detail="AI generator not initialized")
         
         print(f"🔍 Searching activities in {request.destination}...")
         
-        # Use the existing search_activities method
-        activities_data = generator.search_activities(
-            request.destination,
-            request.budget,
-            request.duration,
-            request.selected_hotel
-        )
+        activities_data = None
+        speculative = speculative_slots.take(activity_slot_key(request.destination, request.budget, request.duration))
+        if speculative is not None:
+            try:
+                activities_data = await speculative
+                print(f"⚡ Served activities for {request.destination} from speculative search")
+            except Exception as e:
+                print(f"⚠️  Speculative activity search unusable, searching again: {e!r}")
         
-        # Convert to frontend format
-        activities = []
-        for activity in activities_data:
-            activities.append({
-                "name": activity.get('name', 'Unknown Activity'),
-                "description": activity.get('description', 'No description available'),
-                "price": activity.get('price', 'Price varies'),
-                "hours": activity.get('hours', 'Check local timings'),
-                "distance": activity.get('distance', 'Distance varies'),
-                "transport": activity.get('transport', 'Multiple options available')
-            })
+        if activities_data is None:
+            # Use the existing search_activities method
+            activities_data = await asyncio.to_thread(
+                generator_pool.call,
+                'search_activities',
+                request.destination,
+                request.budget,
+                request.duration,
+                request.selected_hotel
+            )
         
-        return {"activities": activities}
+        return FastJSONResponse({"activities": filter_and_sort(activities_data, **filters)})
         
     except Exception as e:
         print(f"❌ Error searching activities: {e}")
         raise HTTPException(status_code=500, detail=f"Error searching activities: {str(e)}")
 
+@app.post("/api/search-activities/stream")
+async def stream_activities(request: ActivitySearchRequest):
+    """Search for activities, sending each one as an NDJSON line as soon as it is found
+    
+    Lines are {"activity": {...}} in the order found, then {"done": true, "count": n}.
+    """
+    if not generator_pool:
+        raise HTTPException(status_code=500, detail="AI generator not initialized")
+    
+    print(f"🔍 Streaming activities in {request.destination}...")
+    
+    async def lines():
+        count = 0
+        activities = generator_pool.stream('stream_activities', request.destination, request.budget, request.duration)
+        async for activity in iterate_in_thread(activities):
+            count += 1
+            yield {"activity": activity}
+        yield {"done": True, "count": count}
+    
+    return NDJSONStreamingResponse(lines())
+
 @app.post("/api/generate-itinerary")
 async def generate_itinerary(request: ItineraryRequest):
     """Generate complete itinerary using AI agent"""
     try:
-        if not generator:
+        if not generator_pool:
             raise HTTPException(status_code=500, detail="AI generator not initialized")
         
-        print(f"🤖 Generating itinerary for {request.destination}...")
+        # Identical requests are answered from the persistent store
+        key = request_hash(request.model_dump())
+        if itinerary_store:
+            stored = itinerary_store.get_encoded(key)
+            if stored is not None:
+                print(f"⚡ Serving stored itinerary {key} for {request.destination}")
+                return FastJSONResponse.from_raw(*stored)
         
-        # Prepare trip data in the format expected by the generator
-        trip_data = {
-            'location': request.destination,
-            'start_date': request.start_date,
-            'end_date': request.end_date,
-            'duration': request.duration,
-            'budget': request.budget
-        }
+        itinerary = await asyncio.to_thread(create_itinerary, request.model_dump(), key)
+        return FastJSONResponse(itinerary)
         
-        # Use the existing generate_itinerary method
-        itinerary = generator.generate_itinerary(
-            trip_data,
-            request.selected_hotel,
-            request.activities
-        )
+    except Exception as e:
+        print(f"❌ Error generating itinerary: {e}")
+        raise HTTPException(status_code=500, detail=f"Error generating itinerary: {str(e)}")
+
+@app.get("/api/itineraries/{itinerary_id}")
+async def get_itinerary(itinerary_id: str):
+    """Fetch a previously generated itinerary by ID"""
+    if not itinerary_store:
+        raise HTTPException(status_code=503, detail="Itinerary store not available")
+    
+    stored = itinerary_store.get_encoded(itinerary_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return FastJSONResponse.from_raw(*stored)
+
+@app.post("/api/jobs/itinerary", status_code=202)
+async def submit_itinerary_job(request: ItineraryRequest):
+    """Queue itinerary generation (for long trips) and return a job ID to poll
+    
+    Identical requests still in the queue share one job.
+    """
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    payload = request.model_dump()
+    key = request_hash(payload)
+    job_id = job_queue.submit('itinerary', payload, priority=PRIORITY_INTERACTIVE, dedupe_key=f"itinerary:{key}")
+    print(f"📥 Queued itinerary job {job_id} for {request.destination} ({request.duration} days)")
+    return FastJSONResponse({
+        "job_id": job_id,
+        "status": job_queue.status(job_id)['status'],
+        "poll": f"/api/jobs/{job_id}",
+        "events": f"/api/jobs/{job_id}/events",
+    }, status_code=202)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, with the result once it is done"""
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    
+    body = job_body(job_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse.from_raw(body)
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: "status" on every change, then one "done" or "failed" with the result"""
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Job queue not available")
+    if job_queue.status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        last = None
+        idle = 0.0
+        while True:
+            status = job_queue.status(job_id)
+            if status is None:
+                return
+            if status['status'] in FINISHED:
+                yield sse_event(status['status'], job_body(job_id))
+                return
+            status['position'] = job_queue.position(job_id)
+            if status != last:
+                yield sse_event('status', orjson.dumps(status))
+                last, idle = status, 0.0
+            elif idle >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                # Comment line so proxies don't close an idle stream
+                yield b": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            idle += JOB_EVENTS_POLL_SECONDS
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/api/generate-itinerary/multi-city")
+async def generate_multi_city_itinerary(request: MultiCityItineraryRequest):
+    """Generate one day-indexed itinerary for an ordered list of city legs"""
+    try:
+        if not generator_pool:
+            raise HTTPException(status_code=500, detail="AI generator not initialized")
+        if not request.legs:
+            raise HTTPException(status_code=400, detail="At least one leg is required")
         
-        # Convert daily schedule to frontend format
-        daily_schedule = []
-        for day_plan in itinerary.get('daily_schedule', []):
-            activities = []
-            for activity in day_plan.get('activities', []):
-                activities.append({
-                    "name": activity.get('name', 'Unknown Activity'),
-                    "description": activity.get('description', 'No description available'),
-                    "price": activity.get('price', 'Price varies'),
-                    "hours": activity.get('hours', 'Check local timings'),
-                    "distance": activity.get('distance', 'Distance varies'),
-                    "transport": activity.get('transport', 'Multiple options available')
-                })
-            
-            daily_schedule.append({
-                "day": day_plan.get('day', 1),
-                "date": day_plan.get('date', ''),
-                "activities": activities,
-                "ai_suggestions": day_plan.get('ai_suggestions', '')
-            })
+        print(f"🤖 Generating multi-city itinerary for {len(request.legs)} legs...")
         
-        response = {
-            "destination": itinerary.get('destination', request.destination),
-            "dates": itinerary.get('dates', f"{request.start_date} to {request.end_date}"),
-            "duration": itinerary.get('duration', f"{request.duration} days"),
-            "budget": itinerary.get('budget', request.budget),
-            "selected_hotel": itinerary.get('selected_hotel', request.selected_hotel),
-            "daily_schedule": daily_schedule,
-            "generated_by": itinerary.get('generated_by', 'AI Agent with real-time web data')
-        }
+        legs = [
+            {
+                'location': leg.destination,
+                'start_date': leg.start_date,
+                'end_date': leg.end_date,
+                'budget': leg.budget,
+                'selected_hotel': leg.selected_hotel,
+                'activities': [Activity.from_dict(activity) for activity in leg.activities]
+            }
+            for leg in request.legs
+        ]
         
-        return response
+        itinerary = await asyncio.to_thread(generator_pool.call, 'generate_multi_city_itinerary', legs, request.budget)
         
+        return FastJSONResponse(itinerary)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid trip legs: {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error generating itinerary: {e}")
+        print(f"❌ Error generating multi-city itinerary: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating itinerary: {str(e)}")
 
-def generate_amenities(hotel: Dict, budget: str) -> List[str]:
-    """Generate realistic amenities based on hotel info and budget"""
-    base_amenities = ["Wifi"]
+@app.post("/api/itinerary/patch")
+async def patch_itinerary(request: ItineraryPatchRequest):
+    """Apply edits to an existing itinerary without regenerating it"""
+    try:
+        if not generator_pool:
+            raise HTTPException(status_code=500, detail="AI generator not initialized")
+        
+        edits = []
+        for edit in request.edits:
+            values = edit.model_dump(exclude_none=True)
+            if 'activity' in values:
+                values['activity'] = Activity.from_dict(values['activity'])
+            if 'activities' in values:
+                values['activities'] = [Activity.from_dict(activity) for activity in values['activities']]
+            edits.append(values)
+        
+        itinerary = await asyncio.to_thread(generator_pool.call, 'patch_itinerary', Itinerary.from_dict(request.itinerary.model_dump()), edits)
+        
+        # The patched itinerary is a new one: stored under the hash of the patch request, never the original's ID
+        payload = request.model_dump()
+        itinerary.id = None
+        if itinerary_store:
+            itinerary.id = request_hash(payload)
+            await asyncio.to_thread(itinerary_store.put, itinerary.id, payload, itinerary)
+        
+        return FastJSONResponse(itinerary)
+        
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid itinerary edit: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error patching itinerary: {e}")
+        raise HTTPException(status_code=500, detail=f"Error patching itinerary: {str(e)}")
+
+def create_itinerary(payload: Dict[str, Any], key: str) -> Itinerary:
+    """Generate an itinerary for an ItineraryRequest payload and store it under its request hash"""
+    print(f"🤖 Generating itinerary for {payload['destination']}...")
     
-    # Budget-based amenities
-    if budget == "low":
-        amenities = base_amenities + ["Shared Bathroom", "Common Area"]
-    elif budget == "medium":
-        amenities = base_amenities + ["Private Bathroom", "Restaurant", "Room Service"]
-    else:  # high budget
-        amenities = base_amenities + ["Spa", "Pool", "Gym", "Concierge", "Restaurant", "Room Service"]
+    # Prepare trip data in the format expected by the generator
+    trip_data = {
+        'location': payload['destination'],
+        'start_date': payload['start_date'],
+        'end_date': payload['end_date'],
+        'duration': payload['duration'],
+        'budget': payload['budget']
+    }
+    
+    # Use the existing generate_itinerary method
+    itinerary = generator_pool.call(
+        'generate_itinerary',
+        trip_data,
+        payload['selected_hotel'],
+        [Activity.from_dict(activity) for activity in payload['activities']]
+    )
+    itinerary.id = key
+    
+    if itinerary_store:
+        itinerary_store.put(key, payload, itinerary)
+    return itinerary
+
+def run_itinerary_job(payload: Dict[str, Any]) -> Any:
+    """Job handler: a stored itinerary for the same request, or a newly generated one"""
+    key = request_hash(payload)
+    if itinerary_store:
+        stored = itinerary_store.get(key)
+        if stored is not None:
+            return stored
+    return create_itinerary(payload, key)
+
+def run_prefetch_job(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: warm the cache for one hot-list item, within the hot list's rate limit"""
+    if not prefetch_scheduler:
+        # Queued before a restart with prefetch now disabled
+        return {"prefetched": None, "skipped": "prefetch disabled"}
+    if prefetch_scheduler.is_cached(item):
+        return {"prefetched": None, "skipped": "cached"}
+    # Wait for the limiter before checking out, so the wait doesn't hold a pool slot
+    prefetch_scheduler.limiter.acquire()
+    with generator_pool.checkout() as generator:
+        prefetch_item(generator, item)
+    return {"prefetched": item['destination']}
+
+def job_body(job_id: str) -> Optional[bytes]:
+    """Job status JSON, with the stored result spliced in as-is once the job is done"""
+    status = job_queue.status(job_id)
+    if status is None:
+        return None
+    if status['status'] != DONE:
+        status['position'] = job_queue.position(job_id)
+        return orjson.dumps(status)
+    return orjson.dumps(status)[:-1] + b',"result":' + job_queue.get_raw_result(job_id).encode('utf-8') + b'}'
+
+def start_speculative_activities(request: HotelSearchRequest):
+    """Start the activity search that almost always follows a hotel search
     
-    # Add amenities based on hotel description
-    description = hotel.get('description', '').lower()
-    if 'parking' in description:
-        amenities.append("Parking")
-    if 'pool' in description:
-        amenities.append("Pool")
-    if 'spa' in description:
-        amenities.append("Spa")
-    if 'gym' in description or 'fitness' in description:
-        amenities.append("Gym")
-    if 'restaurant' in description or 'dining' in description:
-        amenities.append("Restaurant")
-    if 'business' in description:
-        amenities.append("Business Center")
+    Same destination and budget, so it runs while the user picks a hotel.
+    """
+    start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
+    end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
+    duration = (end_date - start_date).days
     
-    # Remove duplicates and return
-    return list(set(amenities))
+    if SPECULATIVE_ACTIVITIES and duration > 0 and not generator_pool.primary.has_cached_activities(request.destination, request.budget, duration):
+        speculative_slots.start(
+            activity_slot_key(request.destination, request.budget, duration),
+            # Speculation runs on its own clone so it never holds up real requests for a pool slot
+            generator_pool.call_unpooled,
+            'search_activities',
+            request.destination,
+            request.budget,
+            duration,
+            None
+        )
+
+def format_hotels(hotels: List[Hotel], budget: str, first_id: int = 1) -> List[Hotel]:
+    """Assign frontend IDs and amenities to generator hotels"""
+    for i, hotel in enumerate(hotels):
+        hotel.id = str(first_id + i)
+    # Amenities inferred from descriptions and budget tier, one pass per batch
+    amenity_engine.assign(hotels, budget)
+    return hotels
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Service Metrics
+Process-wide counters and summaries (count/sum/max) keyed by name and labels,
+served by GET /metrics. Token usage is also tracked per HTTP request: the
+middleware opens a TokenUsage for each request in a context variable, LLM
+calls and search observations made while serving it add to that object, and
+the totals are recorded per endpoint when the response is done.
+
+Worker threads don't inherit context variables from ThreadPoolExecutor, so
+functions fanned out to a pool are wrapped with propagate(), which also
+keeps their stacks attributed to the request in a running profile.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from profiler import profiler
+
+# Rough tokens-per-character ratio for English prompts; good enough for budgets and trends
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class MetricsRegistry:
+    """Thread-safe labelled counters and summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._summaries: Dict[Tuple[str, Tuple], list] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                self._summaries[key] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                summary[2] = max(summary[2], value)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{name: {"label=value,...": value}} for counters and summaries"""
+        def label_text(labels):
+            return ','.join(f"{k}={v}" for k, v in labels) or 'all'
+
+        with self._lock:
+            counters: Dict[str, Dict] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, {})[label_text(labels)] = value
+            summaries: Dict[str, Dict] = {}
+            for (name, labels), (count, total, peak) in sorted(self._summaries.items()):
+                summaries.setdefault(name, {})[label_text(labels)] = {
+                    'count': count, 'sum': round(total, 6), 'avg': round(total / count, 6), 'max': round(peak, 6)
+                }
+        return {'counters': counters, 'summaries': summaries}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+registry = MetricsRegistry()
+
+
+class TokenUsage:
+    """Token totals for one request, shared by every thread serving it"""
+
+    __slots__ = ('_lock', 'prompt_tokens', 'completion_tokens', 'llm_calls', 'cost_usd',
+                 'observation_raw_tokens', 'observation_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.cost_usd = 0.0
+        self.observation_raw_tokens = 0
+        self.observation_tokens = 0
+
+    def add_llm_call(self, prompt_tokens: int, completion_tokens: int, cost: float = 0.0):
+        with self._lock:
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += cost
+
+    def add_observation(self, raw_tokens: int, tokens: int):
+        with self._lock:
+            self.observation_raw_tokens += raw_tokens
+            self.observation_tokens += tokens
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'llm_calls': self.llm_calls,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'cost_usd': self.cost_usd,
+                'observation_raw_tokens': self.observation_raw_tokens,
+                'observation_tokens': self.observation_tokens,
+            }
+
+
+_current_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar('token_usage', default=None)
+
+
+def current_usage() -> Optional[TokenUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def track_tokens() -> Iterator[TokenUsage]:
+    """Attribute LLM and search token usage in this context to a fresh TokenUsage"""
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def propagate(fn: Callable) -> Callable:
+    """Run fn in worker threads under the caller's context (and so its TokenUsage)"""
+    context = contextvars.copy_context()
+    fn = profiler.attributed(fn)
+
+    def run(*args, **kwargs):
+        # A Context can only be entered by one thread at a time; each call gets its own copy
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def record_llm_call(prompt_tokens: int, completion_tokens: int, route: str = 'default',
+                    seconds: Optional[float] = None, cost: float = 0.0):
+    """One LLM call on a model route (see model_routing.py)"""
+    registry.inc('llm_calls_total', route=route)
+    registry.inc('llm_prompt_tokens_total', prompt_tokens, route=route)
+    registry.inc('llm_completion_tokens_total', completion_tokens, route=route)
+    registry.inc('llm_cost_usd_total', cost, route=route)
+    if seconds is not None:
+        registry.observe('llm_seconds', seconds, route=route)
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add_llm_call(prompt_tokens, completion_tokens, cost)
+
+
+def record_observation(raw_tokens: int, tokens: int):
+    """A search observation compacted from raw_tokens down to tokens"""
+    registry.inc('observation_raw_tokens_total', raw_tokens)
+    registry.inc('observation_tokens_total', tokens)
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add_observation(raw_tokens, tokens)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency and token usage per endpoint"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track_tokens() as usage:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # The router stores the matched endpoint in the scope; fall back for 404s
+                endpoint = getattr(scope.get('endpoint'), '__name__', 'unmatched')
+                registry.inc('requests_total', endpoint=endpoint)
+                registry.observe('request_seconds', time.perf_counter() - start, endpoint=endpoint)
+                totals = usage.as_dict()
+                if totals['llm_calls'] or totals['observation_raw_tokens']:
+                    for name, value in totals.items():
+                        registry.observe(f"request_{name}", value, endpoint=endpoint)
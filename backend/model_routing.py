@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Model Routing
+Each generator task runs on its own model and output cap: hotel and activity
+extraction are short, structured answers that a small fast model handles,
+while day-by-day itinerary planning gets the stronger model and room for a
+long answer. Routes are config-driven; MODEL_ROUTES overrides any field of
+the defaults with inline JSON or the path of a JSON file:
+
+    MODEL_ROUTES='{"hotels": {"model": "gemini-2.0-flash-exp", "max_tokens": 1200}}'
+
+Costs are USD per million tokens and only feed the per-route cost metrics.
+"""
+
+import os
+import json
+from dataclasses import dataclass, fields, replace
+from typing import Dict
+
+HOTELS = 'hotels'
+ACTIVITIES = 'activities'
+ITINERARY = 'itinerary'
+TASKS = (HOTELS, ACTIVITIES, ITINERARY)
+
+
+@dataclass(slots=True, frozen=True)
+class ModelRoute:
+    model: str
+    max_tokens: int
+    temperature: float = 0.1
+    input_cost: float = 0.0
+    output_cost: float = 0.0
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.input_cost + completion_tokens * self.output_cost) / 1_000_000
+
+
+DEFAULT_ROUTES: Dict[str, ModelRoute] = {
+    # Up to ~4 hotels or ~8 activities in NAME/PRICE/RATING lines, plus ReAct turns
+    HOTELS: ModelRoute('gemini-1.5-flash-8b', max_tokens=800, input_cost=0.0375, output_cost=0.15),
+    ACTIVITIES: ModelRoute('gemini-1.5-flash-8b', max_tokens=1200, input_cost=0.0375, output_cost=0.15),
+    ITINERARY: ModelRoute('gemini-2.0-flash-exp', max_tokens=4000, input_cost=0.10, output_cost=0.40),
+}
+
+
+def load_routes(config: str = None) -> Dict[str, ModelRoute]:
+    """Default routes with MODEL_ROUTES overrides applied"""
+    if config is None:
+        config = os.getenv('MODEL_ROUTES', '')
+    config = config.strip()
+    if not config:
+        return dict(DEFAULT_ROUTES)
+
+    if not config.startswith('{'):
+        with open(config, 'r', encoding='utf-8') as f:
+            config = f.read()
+    overrides = json.loads(config)
+
+    known = {field.name for field in fields(ModelRoute)}
+    routes = dict(DEFAULT_ROUTES)
+    for task, values in overrides.items():
+        if task not in routes:
+            raise ValueError(f"Unknown model route '{task}'; expected one of {', '.join(TASKS)}")
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Unknown fields for model route '{task}': {', '.join(sorted(unknown))}")
+        routes[task] = replace(routes[task], **values)
+    return routes
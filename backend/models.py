@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Internal Models
+Slotted dataclasses passed end to end through the generator and API layer.
+They are built once by the parsers, travel through caching and scheduling
+unchanged, and are serialized straight to JSON (orjson handles dataclasses
+natively) at the HTTP boundary instead of being copied into response dicts.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Any, Optional
+
+
+# Values the API has always reported for fields missing from client-supplied data
+HOTEL_DEFAULTS = {
+    'description': 'No description available',
+    'price': 'Price varies',
+    'rating': 'Rating not available',
+}
+
+ACTIVITY_DEFAULTS = {
+    'name': 'Unknown Activity',
+    'description': 'No description available',
+    'price': 'Price varies',
+    'hours': 'Check local timings',
+    'distance': 'Distance varies',
+    'transport': 'Multiple options available',
+}
+
+
+def _known_fields(cls, data: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    names = {f.name for f in fields(cls)}
+    values = dict(defaults or {})
+    values.update((key, value) for key, value in data.items() if key in names and value is not None)
+    return values
+
+
+@dataclass(slots=True)
+class Hotel:
+    name: str = ''
+    description: str = ''
+    price: str = ''
+    rating: str = ''
+    location: str = ''
+    # Filled in by the API layer
+    id: str = ''
+    amenities: List[str] = field(default_factory=list)
+    # Parsed from price/rating by normalization.normalize_hotels
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    currency: Optional[str] = None
+    rating_value: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Hotel":
+        return cls(**_known_fields(cls, data, HOTEL_DEFAULTS))
+
+
+@dataclass(slots=True)
+class Activity:
+    name: str = ''
+    description: str = ''
+    price: str = ''
+    hours: str = ''
+    distance: str = ''
+    transport: str = ''
+    type: str = 'activity'
+    # Parsed from price by normalization.normalize_prices
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    currency: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Activity":
+        return cls(**_known_fields(cls, data, ACTIVITY_DEFAULTS))
+
+
+@dataclass(slots=True)
+class DayPlan:
+    day: int
+    date: str
+    activities: List[Activity]
+    ai_suggestions: str = ''
+    # Multi-city itineraries only
+    destination: Optional[str] = None
+    hotel: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DayPlan":
+        values = _known_fields(cls, data)
+        values['activities'] = [Activity.from_dict(a) for a in data.get('activities') or []]
+        return cls(**values)
+
+
+@dataclass(slots=True)
+class Itinerary:
+    destination: str
+    dates: str
+    duration: str
+    budget: str
+    selected_hotel: Dict[str, Any]
+    daily_schedule: List[DayPlan]
+    generated_by: str = 'AI Agent with real-time web data'
+    id: Optional[str] = None
+    legs: Optional[List[Dict[str, Any]]] = None
+    updated_days: Optional[List[int]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Itinerary":
+        values = _known_fields(cls, data)
+        values['daily_schedule'] = [DayPlan.from_dict(d) for d in data.get('daily_schedule') or []]
+        values.setdefault('selected_hotel', {})
+        return cls(**values)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Price and Rating Normalization
+Turns the free-text price and rating strings the agent returns ("$180/night",
+"€20-35", "Free", "4.6/5 stars", "8.7/10") into numeric fields on the models,
+so results can be filtered and sorted server-side without re-parsing, and
+enforces the budget tiers on them.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from semantic_cache import normalize_budget
+
+CURRENCY_SYMBOLS = {
+    '$': 'USD', 'us$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR', '₩': 'KRW',
+    '฿': 'THB', '₫': 'VND', '₱': 'PHP', 'a$': 'AUD', 'c$': 'CAD', 's$': 'SGD', 'r$': 'BRL',
+}
+CURRENCY_CODES = {
+    'usd', 'eur', 'gbp', 'jpy', 'inr', 'aud', 'cad', 'sgd', 'chf', 'cny', 'rmb', 'hkd', 'thb',
+    'aed', 'mxn', 'brl', 'krw', 'nzd', 'zar', 'idr', 'myr', 'vnd', 'php', 'sek', 'nok', 'dkk',
+}
+CURRENCY_WORDS = {
+    'dollar': 'USD', 'dollars': 'USD', 'euro': 'EUR', 'euros': 'EUR', 'pound': 'GBP', 'pounds': 'GBP',
+    'yen': 'JPY', 'rupee': 'INR', 'rupees': 'INR', 'baht': 'THB', 'dirham': 'AED', 'dirhams': 'AED',
+}
+
+_FREE = re.compile(r"\b(?:free|no charge|complimentary|no entry fee)\b", re.IGNORECASE)
+_AMOUNT = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+_RANGE_JOIN = re.compile(r"^\s*(?:-|–|—|to)\s*[^\d\s]{0,4}\s*$", re.IGNORECASE)
+_SYMBOL = re.compile(r"(?:us|a|c|s|r)?\$|[€£¥₹₩฿₫₱]", re.IGNORECASE)
+_WORD = re.compile(r"[a-z]+", re.IGNORECASE)
+_RATING = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/\s*(\d+(?:\.\d+)?)|out of\s*(\d+(?:\.\d+)?))?", re.IGNORECASE)
+
+RATING_SCALE = 5.0
+
+
+def parse_currency(text: str) -> Optional[str]:
+    """ISO code for the first currency symbol, code or word in text"""
+    symbol = _SYMBOL.search(text)
+    if symbol:
+        return CURRENCY_SYMBOLS.get(symbol.group(0).lower())
+    for word in _WORD.findall(text):
+        lowered = word.lower()
+        if lowered in CURRENCY_CODES:
+            return 'CNY' if lowered == 'rmb' else lowered.upper()
+        if lowered in CURRENCY_WORDS:
+            return CURRENCY_WORDS[lowered]
+    return None
+
+
+def parse_price(text: str) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(min, max, currency) from a price string; (None, None, None) if it has no amount"""
+    if not text:
+        return None, None, None
+    currency = parse_currency(text)
+    matches = list(_AMOUNT.finditer(text))
+    if not matches:
+        if _FREE.search(text):
+            return 0.0, 0.0, currency
+        return None, None, None
+
+    low = float(matches[0].group(0).replace(',', ''))
+    high = low
+    # "20-35", "$20 to $35": the second amount closes a range
+    if len(matches) > 1 and _RANGE_JOIN.match(text[matches[0].end():matches[1].start()]):
+        high = float(matches[1].group(0).replace(',', ''))
+    if high < low:
+        low, high = high, low
+    if _FREE.search(text[:matches[0].start()]):
+        low = 0.0
+    return low, high, currency
+
+
+def parse_rating(text: str) -> Optional[float]:
+    """Rating on a 0-5 scale; "8.7/10" becomes 4.35"""
+    if not text:
+        return None
+    match = _RATING.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    scale = match.group(2) or match.group(3)
+    if scale:
+        scale = float(scale)
+        if scale <= 0:
+            return None
+        value = value / scale * RATING_SCALE
+    elif value > RATING_SCALE:
+        # Bare scores above 5 are out of 10 ("Superb 9.1")
+        if value > 10:
+            return None
+        value = value / 10.0 * RATING_SCALE
+    return round(min(value, RATING_SCALE), 2)
+
+
+def normalize_prices(items: List) -> List:
+    """Fill price_min/price_max/currency on hotel or activity models in place"""
+    for item in items:
+        item.price_min, item.price_max, item.currency = parse_price(item.price)
+    return items
+
+
+def normalize_hotels(hotels: List) -> List:
+    normalize_prices(hotels)
+    for hotel in hotels:
+        hotel.rating_value = parse_rating(hotel.rating)
+    return hotels
+
+
+# Budget tiers in USD as (min, max), None meaning unbounded; these match the limits
+# given to the agent in the search prompts. Cheaper activities always fit, so only
+# hotels have a floor.
+HOTEL_BUDGET_TIERS: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    'low': (None, 100), 'medium': (100, 300), 'high': (300, None),
+}
+ACTIVITY_BUDGET_TIERS: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    'low': (None, 20), 'medium': (None, 100), 'high': (None, None),
+}
+
+
+def within_budget(item, tiers: Dict[str, Tuple[Optional[float], Optional[float]]], budget: str) -> bool:
+    """False only for items whose price is known, in USD, and clearly outside the tier"""
+    bounds = tiers.get(normalize_budget(budget))
+    if bounds is None or item.price_min is None or item.currency not in (None, 'USD'):
+        return True
+    low, high = bounds
+    if high is not None and item.price_min > high:
+        return False
+    if low is not None and item.price_max < low:
+        return False
+    return True
+
+
+def split_by_budget(items: Sequence, tiers: Dict[str, Tuple[Optional[float], Optional[float]]],
+                    budget: str) -> Tuple[List, List]:
+    """(in budget, out of budget), each in input order"""
+    fit, rejected = [], []
+    for item in items:
+        (fit if within_budget(item, tiers, budget) else rejected).append(item)
+    return fit, rejected
+
+
+SORT_FIELDS = {'price': 'price_min', 'rating': 'rating_value'}
+
+
+def filter_and_sort(items: Sequence, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                    min_rating: Optional[float] = None, currency: Optional[str] = None,
+                    sort: Optional[str] = None, order: str = 'asc') -> List:
+    """Filter models on their normalized fields and sort them; items missing a
+    filtered field are dropped, items missing the sort field go last"""
+    result = []
+    for item in items:
+        if min_price is not None and (item.price_max is None or item.price_max < min_price):
+            continue
+        if max_price is not None and (item.price_min is None or item.price_min > max_price):
+            continue
+        if min_rating is not None and (getattr(item, 'rating_value', None) is None or item.rating_value < min_rating):
+            continue
+        # No currency parsed means unknown, not a match; only free items fit any currency
+        if currency is not None and item.currency != currency.upper() and item.price_max != 0:
+            continue
+        result.append(item)
+
+    if sort:
+        field = SORT_FIELDS[sort]
+        present = [item for item in result if getattr(item, field, None) is not None]
+        missing = [item for item in result if getattr(item, field, None) is None]
+        present.sort(key=lambda item: getattr(item, field), reverse=(order == 'desc'))
+        result = present + missing
+    return result
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Search-then-Extract Pipeline
+Alternative to the ReAct agent loop. Instead of letting the LLM decide on
+searches one Thought/Action/Observation turn at a time, the generator's
+search queries are sent to Tavily directly and in parallel, the results are
+compacted (compaction.py), and the LLM is called exactly once to extract the
+answer.
+
+The pipeline exposes the same invoke({"input": ...}) -> {"output": ...}
+interface as AgentExecutor, so the generator can switch modes without
+touching its call sites. Callers pass the web queries to run as
+inputs["searches"]; an empty list means no search (pure LLM call). stream()
+takes the same inputs and yields the extraction's text as it is generated.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from circuit_breaker import CircuitOpenError
+from compaction import compact_observation
+from metrics import propagate
+
+# Token budget for the compacted results of all of a request's searches together
+MAX_CONTEXT_TOKENS = 1500
+
+EXTRACTION_PROMPT = """You are a professional travel planning assistant.
+Answer the request below using ONLY the web search results provided. Do not
+make up names, prices or ratings that are not supported by the results.
+Follow the output format requested exactly.
+
+Search results:
+{context}
+
+Request:
+{request}
+"""
+
+NO_SEARCH_PROMPT = """You are a professional travel planning assistant.
+Follow the output format requested exactly.
+
+Request:
+{request}
+"""
+
+
+def default_searches(request: str) -> List[str]:
+    """Fallback web query when the caller didn't supply any: the request's first line"""
+    for line in request.splitlines():
+        line = line.strip()
+        if line:
+            return [line.rstrip('.:')]
+    return []
+
+
+class SearchExtractPipeline:
+    """Parallel direct searches followed by a single LLM extraction call"""
+
+    def __init__(self, llm, search_tool, max_workers: int = 4, max_context_tokens: int = MAX_CONTEXT_TOKENS):
+        self.llm = llm
+        self.search_tool = search_tool
+        self.max_workers = max_workers
+        self.max_context_tokens = max_context_tokens
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.search_calls = 0
+
+    def _search(self, query: str) -> Any:
+        """Results for one query, or the exception if the search failed"""
+        try:
+            return self.search_tool.invoke(query)
+        except CircuitOpenError as e:
+            return e
+        except Exception as e:
+            print(f"⚠️  Search failed for '{query}': {e}")
+            return e
+
+    def _prompt(self, inputs: Dict[str, Any]) -> str:
+        """Run the searches and build the extraction prompt"""
+        request = inputs['input']
+        searches: Optional[List[str]] = inputs.get('searches')
+        if searches is None:
+            searches = default_searches(request)
+
+        with self._lock:
+            self.search_calls += len(searches)
+            self.llm_calls += 1
+
+        if not searches:
+            return NO_SEARCH_PROMPT.format(request=request.strip())
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(searches))) as executor:
+            results = list(executor.map(propagate(self._search), searches))
+        failures = [result for result in results if isinstance(result, Exception)]
+        if len(failures) == len(results):
+            # Search is down; don't let the LLM extract from nothing
+            raise failures[0]
+        results = [result for result in results if not isinstance(result, Exception)]
+        context = compact_observation(results, self.max_context_tokens)
+        return EXTRACTION_PROMPT.format(context=context or '(no results)', request=request.strip())
+
+    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, str]:
+        response = self.llm.invoke(self._prompt(inputs))
+        return {'output': getattr(response, 'content', response)}
+
+    def stream(self, inputs: Dict[str, Any]) -> Iterator[str]:
+        """Text chunks of the extraction answer as the LLM generates them"""
+        for chunk in self.llm.stream(self._prompt(inputs)):
+            yield getattr(chunk, 'content', chunk)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'llm_calls': self.llm_calls, 'search_calls': self.search_calls}
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Background Prefetch Scheduler
+Warms the search cache for popular destinations during off-peak hours so the
+first user of the day doesn't pay the full agent latency. Destinations, budget
+tiers, schedule and upstream rate limit are read from a hot-list JSON file.
+With a job queue, warm-ups are queued as background-priority jobs so they
+never hold up interactive work. The rate limit is applied where the searches
+actually run (in the prefetch job handler, or PrefetchScheduler.warm without
+a queue), not where they are queued.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from job_queue import PRIORITY_BACKGROUND
+
+DEFAULT_HOTLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hotlist.json')
+
+DEFAULT_CONFIG = {
+    'top_n': 10,
+    'budgets': ['low', 'medium', 'high'],
+    'activity_days': [3],
+    'off_peak_hours': [1, 2, 3, 4, 5],
+    'interval_minutes': 60,
+    'max_requests_per_minute': 6,
+    'destinations': [],
+}
+
+
+def load_hotlist(path: str = DEFAULT_HOTLIST_PATH) -> Dict[str, Any]:
+    """Load the hot-list file, filling in defaults for missing keys"""
+    config = dict(DEFAULT_CONFIG)
+    with open(path, 'r', encoding='utf-8') as f:
+        config.update(json.load(f))
+    return config
+
+
+def prefetch_item(generator, item: Dict[str, Any]):
+    """Run the search for one hot-list work item, caching its results"""
+    if item['kind'] == 'hotels':
+        # Hotel results don't depend on dates, any near-future window works
+        checkin = datetime.now() + timedelta(days=30)
+        checkout = checkin + timedelta(days=3)
+        generator.search_hotels(
+            item['destination'],
+            checkin.strftime("%Y-%m-%d"),
+            checkout.strftime("%Y-%m-%d"),
+            item['budget']
+        )
+    else:
+        generator.search_activities(item['destination'], item['budget'], item['days'])
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing upstream calls evenly to stay under a per-minute rate"""
+
+    def __init__(self, max_per_minute: float):
+        self.interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller's turn; each caller reserves its own slot"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed)
+            self._next_allowed = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class PrefetchScheduler:
+    """Periodically pre-computes hotel/activity results for top destinations x budget tiers"""
+
+    def __init__(self, generator, hotlist_path: str = DEFAULT_HOTLIST_PATH, jobs=None):
+        self.generator = generator
+        self.hotlist_path = hotlist_path
+        self.jobs = jobs
+        self.config = load_hotlist(hotlist_path)
+        self.limiter = RateLimiter(self.config['max_requests_per_minute'])
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[str] = None
+        self.prefetched = 0
+
+    def is_off_peak(self, now: Optional[datetime] = None) -> bool:
+        hour = (now or datetime.now()).hour
+        return hour in self.config['off_peak_hours']
+
+    def targets(self) -> List[Dict[str, Any]]:
+        """Work items for one warm-up round, most popular destinations first"""
+        items = []
+        for destination in self.config['destinations'][:self.config['top_n']]:
+            for budget in self.config['budgets']:
+                items.append({'kind': 'hotels', 'destination': destination, 'budget': budget})
+                for days in self.config['activity_days']:
+                    items.append({'kind': 'activities', 'destination': destination, 'budget': budget, 'days': days})
+        return items
+
+    def is_cached(self, item: Dict[str, Any]) -> bool:
+        if item['kind'] == 'hotels':
+            return self.generator.has_cached_hotels(item['destination'], item['budget'])
+        return self.generator.has_cached_activities(item['destination'], item['budget'], item['days'])
+
+    def warm(self, item: Dict[str, Any]) -> bool:
+        """Run one item's search within the rate limit, unless it was cached meanwhile
+
+        Blocks for the limiter, so call it from a worker thread. Returns
+        whether a search ran.
+        """
+        if self.is_cached(item):
+            return False
+        self.limiter.acquire()
+        prefetch_item(self.generator, item)
+        return True
+
+    async def run_once(self) -> int:
+        """Warm every hot-list entry that isn't already cached; returns searches run or queued"""
+        fetched = 0
+        for item in self.targets():
+            if self.is_cached(item):
+                continue
+            try:
+                if self.jobs is not None:
+                    key = f"prefetch:{item['kind']}:{item['destination']}:{item['budget']}:{item.get('days', '')}"
+                    self.jobs.submit('prefetch', item, priority=PRIORITY_BACKGROUND, dedupe_key=key)
+                    fetched += 1
+                elif await asyncio.to_thread(self.warm, item):
+                    fetched += 1
+            except Exception as e:
+                print(f"⚠️  Prefetch failed for {item['kind']} in {item['destination']}: {e}")
+
+        self.last_run = datetime.now().isoformat(timespec='seconds')
+        self.prefetched += fetched
+        print(f"🔥 Prefetch round complete: {fetched} searches warmed")
+        return fetched
+
+    async def _loop(self):
+        interval = self.config['interval_minutes'] * 60
+        while True:
+            if self.is_off_peak():
+                await self.run_once()
+            await asyncio.sleep(interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            print(f"🔥 Prefetch scheduler started for top {self.config['top_n']} destinations")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler
+Started from the admin endpoints for a number of seconds, optionally for only
+a fraction of requests. While it runs, a background thread snapshots the
+stacks of every thread serving a profiled request at a fixed interval and
+counts identical stacks, producing collapsed-stack output ("frame;frame
+count" per line) that flamegraph.pl, speedscope and similar tools read
+directly. Samples are split by the endpoint of the request they belong to.
+
+A thread is attributed to a request while it runs work handed over from
+that request: the event loop thread while the request's task is running,
+asyncio.to_thread() workers through AttributingExecutor, and pool fan-outs
+through metrics.propagate(). Samples are wall-clock, so time blocked on
+the LLM or search upstreams shows up alongside CPU time.
+
+When the profiler isn't running the only cost is one attribute check per
+request and one context variable lookup per hand-off to a thread.
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_INTERVAL_SECONDS = float(os.getenv('PROFILER_INTERVAL_MS', '5')) / 1000
+MAX_PROFILE_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '300'))
+
+# ASGI scope of the profiled request being served in this context
+_profiled_request: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar('profiled_request', default=None)
+
+
+def endpoint_name(scope: Dict) -> str:
+    """Name of the endpoint a request was routed to, as in the request metrics"""
+    return getattr(scope.get('endpoint'), '__name__', None) or 'unmatched'
+
+
+class SamplingProfiler:
+    """Periodic stack sampler for the threads serving profiled requests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Checked by the middleware on every request; plain attribute so it costs nothing
+        self.running = False
+        self.sample_rate = 1.0
+        self.interval = DEFAULT_INTERVAL_SECONDS
+        # Thread ident / event loop task -> scope of the profiled request it is serving
+        self._threads: Dict[int, Dict] = {}
+        self._tasks: Dict[Any, Dict] = {}
+        self._loop = None
+        self._loop_thread: Optional[int] = None
+        self._labels: Dict[Any, str] = {}
+        self._samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.ticks = 0
+        self.sampling_seconds = 0.0
+
+    def start(self, seconds: float, sample_rate: float = 1.0, interval: float = DEFAULT_INTERVAL_SECONDS,
+              loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Begin a new profile, discarding the previous one; call from the event loop thread"""
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Profiler is already running")
+            self._samples = Counter()
+            self.ticks = 0
+            self.sampling_seconds = 0.0
+            self.sample_rate = sample_rate
+            self.interval = interval
+            self._loop = loop or asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self.running = True
+            self._thread = threading.Thread(
+                target=self._run, args=(min(seconds, MAX_PROFILE_SECONDS),), name="profiler", daemon=True
+            )
+            self._thread.start()
+        print(f"🔬 Profiling {sample_rate * 100:g}% of requests for {min(seconds, MAX_PROFILE_SECONDS):.0f}s "
+              f"every {interval * 1000:.0f}ms")
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def wants(self) -> bool:
+        """Whether to profile the request now starting"""
+        return self.running and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def attributed(self, fn: Callable) -> Callable:
+        """fn with the thread running it attributed to this context's profiled request, if any"""
+        scope = _profiled_request.get()
+        if scope is None:
+            return fn
+
+        def run(*args, **kwargs):
+            ident = threading.get_ident()
+            previous = self._threads.get(ident)
+            self._threads[ident] = scope
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+        return run
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _sample(self):
+        me = threading.get_ident()
+        loop_task = asyncio.current_task(self._loop) if self._loop is not None else None
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if ident == self._loop_thread:
+                scope = self._tasks.get(loop_task) if loop_task is not None else None
+            else:
+                scope = self._threads.get(ident)
+            if scope is not None:
+                self._samples[(endpoint_name(scope), self._stack(frame))] += 1
+
+    def _run(self, seconds: float):
+        deadline = time.monotonic() + seconds
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                start = time.perf_counter()
+                self._sample()
+                self.ticks += 1
+                elapsed = time.perf_counter() - start
+                self.sampling_seconds += elapsed
+                self._stop.wait(max(self.interval - elapsed, 0.0))
+        finally:
+            self.running = False
+            self.stopped_at = time.time()
+            self._thread = None
+            self._tasks.clear()
+            self._threads.clear()
+            print(f"🔬 Profile finished: {sum(self._samples.values())} samples in {self.ticks} ticks")
+
+    def collapsed(self, endpoint: Optional[str] = None) -> str:
+        """Collapsed stacks, one "frame;frame count" line each
+
+        With an endpoint, only its stacks; otherwise every stack is rooted at
+        its endpoint's name so a single flamegraph splits by endpoint.
+        """
+        lines = []
+        # list() copies atomically; the sampler may still be adding stacks
+        for (name, stack), count in sorted(list(self._samples.items())):
+            if endpoint is None:
+                lines.append(f"{name};{stack} {count}")
+            elif name == endpoint:
+                lines.append(f"{stack} {count}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def stats(self) -> Dict[str, Any]:
+        per_endpoint: Counter = Counter()
+        for (name, _), count in list(self._samples.items()):
+            per_endpoint[name] += count
+        return {
+            'running': self.running,
+            'sample_rate': self.sample_rate,
+            'interval_ms': round(self.interval * 1000, 3),
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'ticks': self.ticks,
+            'sampling_seconds': round(self.sampling_seconds, 6),
+            'samples': dict(per_endpoint),
+        }
+
+
+profiler = SamplingProfiler()
+
+
+class AttributingExecutor(ThreadPoolExecutor):
+    """Thread pool attributing its work to the profiled request that submitted it
+
+    Installed as the event loop's default executor, so asyncio.to_thread()
+    work is sampled under the request that started it.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(profiler.attributed(fn), *args, **kwargs)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware marking the requests the running profile samples"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.running or scope['type'] != 'http' or not profiler.wants():
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        token = _profiled_request.set(scope)
+        profiler._tasks[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler._tasks.pop(task, None)
+            _profiled_request.reset(token)
+
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Destination Recommender
+Backs the frontend's RECOMMENDER_URL hook (app/api/recommend/route.ts). The
+curated CityMeta/ActivityMeta lists from data/recommendations.ts and the
+destination catalog are loaded once into NumPy arrays; each request scores
+every candidate in a few vectorized operations (rating, expense match,
+season from best_time, activity-type preferences) and selects the top k
+with argpartition.
+
+Candidates are stored grouped by region so a region filter is a slice, the
+rating/expense and season terms are precomputed per expense level and month,
+and top-k runs argpartition over block maxima first, so only the few blocks
+that can contain a winner are partitioned element by element.
+"""
+
+import os
+import re
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from semantic_cache import normalize_text, normalize_budget
+
+DEFAULT_CITY_META_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'recommendations.ts'
+)
+
+REGIONS = ["Europe", "Asia", "Americas", "Africa", "Oceania"]
+EXPENSE_LEVELS = ["budget", "mid", "premium"]
+ACTIVITY_TYPES = ["sightseeing", "adventure", "food", "culture", "nature", "nightlife"]
+
+# Catalog regions folded into the CityMeta region set
+REGION_ALIASES = {
+    'north america': 'Americas', 'south america': 'Americas', 'central america': 'Americas',
+    'latin america': 'Americas', 'caribbean': 'Americas', 'middle east': 'Asia',
+    'australia': 'Oceania', 'pacific': 'Oceania',
+}
+EXPENSE_BY_BUDGET = {'low': 'budget', 'medium': 'mid', 'high': 'premium'}
+
+# Catalog destinations carry no rating; rank them just below the curated cities
+DEFAULT_RATING = 4.0
+
+RATING_WEIGHT = 1.0
+EXPENSE_WEIGHT = 0.6
+SEASON_WEIGHT = 0.3
+INTEREST_WEIGHT = 0.5
+
+# Candidates per block when pruning top-k selection by block maxima
+TOP_K_BLOCK = 256
+
+MONTHS = {
+    name: index for index, names in enumerate([
+        ('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'), ('may',),
+        ('jun', 'june'), ('jul', 'july'), ('aug', 'august'), ('sep', 'sept', 'september'),
+        ('oct', 'october'), ('nov', 'november'), ('dec', 'december'),
+    ]) for name in names
+}
+ALL_MONTHS = (1 << 12) - 1
+
+_TS_ARRAY = r"export const {name}\s*:[^=]*=\s*\[(.*?)\n\]"
+_TS_OBJECT = re.compile(r"\{(.*?)\}", re.DOTALL)
+_TS_FIELD = re.compile(r"(\w+)\s*:\s*(\"(?:[^\"\\]|\\.)*\"|-?\d+(?:\.\d+)?)")
+_MONTH_WORD = re.compile(r"[a-z]+")
+
+
+def load_ts_array(source: str, name: str) -> List[Dict]:
+    """Parse a flat `export const NAME: T[] = [...]` array of object literals"""
+    match = re.search(_TS_ARRAY.format(name=name), source, re.DOTALL)
+    if not match:
+        return []
+    items = []
+    for body in _TS_OBJECT.findall(match.group(1)):
+        item = {}
+        for key, value in _TS_FIELD.findall(body):
+            item[key] = json.loads(value) if value.startswith('"') else float(value)
+        items.append(item)
+    return items
+
+
+def season_mask(best_time: str) -> int:
+    """12-bit month mask from text like "April - October, December"; 0 when unknown"""
+    text = (best_time or '').lower()
+    if not text:
+        return 0
+    if 'year' in text or 'any time' in text or 'anytime' in text:
+        return ALL_MONTHS
+    mask = 0
+    for part in re.split(r"[,;/&]| and ", text):
+        months = [MONTHS[word] for word in _MONTH_WORD.findall(part) if word in MONTHS]
+        if len(months) >= 2 and re.search(r"-|–|to|through", part):
+            start, end = months[0], months[-1]
+            length = (end - start) % 12 + 1
+            for offset in range(length):
+                mask |= 1 << ((start + offset) % 12)
+        else:
+            for month in months:
+                mask |= 1 << month
+    return mask
+
+
+def catalog_city(row: Dict) -> Dict:
+    """CityMeta-shaped record for a destination catalog row"""
+    region = row.get('region', '')
+    folded = region if region in REGIONS else REGION_ALIASES.get(region.lower(), region)
+    expense = EXPENSE_BY_BUDGET.get(normalize_budget(row.get('price_range', '')), 'mid')
+    return {
+        'city': row.get('name', ''),
+        'country': row.get('country', ''),
+        'region': folded,
+        'subregion': region,
+        'rating': DEFAULT_RATING,
+        'expense': expense,
+        'image': row.get('image_url', ''),
+        'best_time': row.get('best_time', ''),
+    }
+
+
+def top_k(score: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first
+    
+    The k-th largest block maximum is a lower bound on the k-th largest score
+    (each of those k blocks holds at least one score that high), so only
+    entries at or above it need the exact argpartition.
+    """
+    n = len(score)
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        candidates = None
+        if n >= TOP_K_BLOCK * k * 4:
+            block_max = np.maximum.reduceat(score, np.arange(0, n, TOP_K_BLOCK))
+            threshold = np.partition(block_max, len(block_max) - k)[len(block_max) - k]
+            candidates = np.flatnonzero(score >= threshold)
+        if candidates is None:
+            candidates = np.arange(n)
+        if len(candidates) > k:
+            best = np.argpartition(score[candidates], len(candidates) - k)[len(candidates) - k:]
+            candidates = np.sort(candidates[best])
+    return candidates[np.argsort(-score[candidates], kind='stable')]
+
+
+class Recommender:
+    """Vectorized top-k ranking over a fixed set of candidate cities"""
+
+    OUTPUT_FIELDS = ('city', 'country', 'region', 'subregion', 'rating', 'expense', 'image')
+
+    def __init__(self, cities: Sequence[Dict], activities: Iterable[Dict] = ()):
+        # Group by region (stable, so curated cities stay ahead of catalog ones)
+        cities = sorted(cities, key=lambda city: city.get('region') or '')
+        self.cities = [{field: city.get(field) for field in self.OUTPUT_FIELDS} for city in cities]
+        count = len(self.cities)
+
+        self.region_slices: Dict[str, slice] = {}
+        start = 0
+        for i in range(1, count + 1):
+            if i == count or (self.cities[i]['region'] or '') != (self.cities[start]['region'] or ''):
+                self.region_slices[self.cities[start]['region'] or ''] = slice(start, i)
+                start = i
+
+        rating = np.fromiter((city['rating'] or 0 for city in self.cities), dtype=np.float32, count=count)
+        expense = np.fromiter(
+            (EXPENSE_LEVELS.index(city['expense']) if city['expense'] in EXPENSE_LEVELS else 1
+             for city in self.cities),
+            dtype=np.float32, count=count
+        )
+        # Catalogs repeat a few best_time phrasings, so each is parsed once
+        masks = {text: season_mask(text) for text in {city.get('best_time', '') for city in cities}}
+        season = np.fromiter((masks[city.get('best_time', '')] for city in cities), dtype=np.int32, count=count)
+
+        # Rating plus expense match, one row per requested expense level and a last row for none
+        self._base = np.empty((len(EXPENSE_LEVELS) + 1, count), dtype=np.float32)
+        for level in range(len(EXPENSE_LEVELS)):
+            self._base[level] = rating * (RATING_WEIGHT / 5.0) + EXPENSE_WEIGHT * (1.0 - np.abs(expense - level) / 2.0)
+        self._base[-1] = rating * (RATING_WEIGHT / 5.0)
+
+        # Season term per month; unknown seasons get half credit
+        self._season = np.empty((12, count), dtype=np.float32)
+        for month in range(12):
+            in_season = ((season >> month) & 1).astype(np.float32)
+            self._season[month] = SEASON_WEIGHT * np.where(season == 0, np.float32(0.5), in_season)
+
+        # Share of each city's known activities per activity type, one row per type
+        row_of = {normalize_text(city['city']): i for i, city in enumerate(self.cities)}
+        self._interests = np.zeros((len(ACTIVITY_TYPES), count), dtype=np.float32)
+        for activity in activities:
+            row = row_of.get(normalize_text(activity.get('city', '')))
+            if row is not None and activity.get('type') in ACTIVITY_TYPES:
+                self._interests[ACTIVITY_TYPES.index(activity['type']), row] += 1.0
+        totals = self._interests.sum(axis=0)
+        np.divide(self._interests, totals, out=self._interests, where=totals > 0)
+
+    @classmethod
+    def load(cls, city_meta_path: str = DEFAULT_CITY_META_PATH, destination_store=None) -> "Recommender":
+        """Curated CityMeta cities first, then catalog destinations not already listed"""
+        cities, activities = [], []
+        if os.path.exists(city_meta_path):
+            with open(city_meta_path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            cities = load_ts_array(source, 'CITIES')
+            activities = load_ts_array(source, 'ACTIVITIES')
+
+        if destination_store is not None:
+            # Only the columns a candidate needs; descriptions and highlights are never decoded
+            columns = ('name', 'country', 'region', 'price_range', 'image_url', 'best_time')
+            by_name = {normalize_text(city['city']): city for city in cities}
+            for values in zip(*(destination_store.column(column) for column in columns)):
+                row = dict(zip(columns, values))
+                key = normalize_text(row['name'])
+                if key in by_name:
+                    # Curated entries have no best_time; borrow the catalog's
+                    by_name[key].setdefault('best_time', row['best_time'])
+                elif key:
+                    by_name[key] = catalog_city(row)
+                    cities.append(by_name[key])
+
+        return cls(cities, activities)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def scores(self, region: Optional[str] = None, expense: Optional[str] = None,
+               month: Optional[int] = None, interests: Sequence[str] = ()) -> Tuple[np.ndarray, int]:
+        """Scores for the candidates in scope, and the index of the first one"""
+        if region:
+            rows = self.region_slices.get(region, slice(0, 0))
+        else:
+            rows = slice(0, len(self.cities))
+
+        level = EXPENSE_LEVELS.index(expense) if expense in EXPENSE_LEVELS else -1
+        score = self._base[level, rows].copy()
+        if month is not None:
+            score += self._season[month - 1, rows]
+        for kind in dict.fromkeys(interests):
+            if kind in ACTIVITY_TYPES:
+                score += INTEREST_WEIGHT * self._interests[ACTIVITY_TYPES.index(kind), rows]
+        return score, rows.start
+
+    def recommend(self, region: Optional[str] = None, expense: Optional[str] = None, limit: int = 8,
+                  month: Optional[int] = None, interests: Sequence[str] = ()) -> List[Dict]:
+        """Top `limit` CityMeta records, best first"""
+        if limit <= 0:
+            return []
+        if month is None:
+            month = datetime.now().month
+        score, offset = self.scores(region, expense, month, interests)
+        return [self.cities[offset + i] for i in top_k(score, limit)]
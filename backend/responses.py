@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Fast JSON Responses
+Response class that serializes with orjson (dataclass models included, no
+jsonable_encoder pass), can send pre-serialized payloads such as stored
+itineraries as-is, and compresses bodies per request based on the client's
+Accept-Encoding. Brotli is used when the optional `brotli` package is
+installed, gzip otherwise. Payloads that are stored and served repeatedly
+are compressed once with precompress() and sent in that coding to any
+client accepting it. NDJSONStreamingResponse sends results one JSON
+line at a time as they are produced (uncompressed, so nothing is buffered).
+sse_event() frames a JSON payload as a server-sent event.
+"""
+
+import os
+import gzip
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import orjson
+from starlette.responses import Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def parse_accept_encoding(header: str) -> Tuple[str, ...]:
+    """Encodings the client accepts (q > 0), most preferred first"""
+    accepted = []
+    for position, part in enumerate(header.split(',')):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.append((-quality, position, name.strip().lower()))
+    return tuple(name for _, _, name in sorted(accepted))
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header, or None"""
+    for name in parse_accept_encoding(accept_encoding):
+        if name == 'br' and brotli is not None:
+            return 'br'
+        if name in ('gzip', '*'):
+            return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Compressed copies of a payload to store with it, by content coding
+
+    Only gzip is kept: every client that accepts compression accepts it.
+    """
+    if not COMPRESSION_ENABLED or len(body) < COMPRESSION_MIN_BYTES:
+        return {}
+    return {'gzip': compress(body, 'gzip')}
+
+
+class FastJSONResponse(Response):
+    """orjson-encoded JSON response with optional pre-serialized body and compression"""
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any = None, status_code: int = 200, headers=None,
+                 media_type: Optional[str] = None, background=None, raw: bool = False):
+        # raw=True: content is already-encoded JSON (bytes or str), sent without re-encoding
+        self.raw = raw
+        self.encoded: Dict[str, bytes] = {}
+        super().__init__(content, status_code, headers, media_type, background)
+
+    @classmethod
+    def from_raw(cls, payload, encoded: Optional[Dict[str, bytes]] = None, **kwargs) -> "FastJSONResponse":
+        """Pre-serialized JSON, with any precompressed copies of it from precompress()"""
+        response = cls(payload, raw=True, **kwargs)
+        response.encoded = encoded or {}
+        return response
+
+    def render(self, content: Any) -> bytes:
+        if self.raw:
+            return content.encode('utf-8') if isinstance(content, str) else content
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+    def _negotiate(self, scope):
+        if not COMPRESSION_ENABLED or len(self.body) < COMPRESSION_MIN_BYTES or 'content-encoding' in self.headers:
+            return
+        accept_encoding = ''
+        for name, value in scope.get('headers', []):
+            if name == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
+                break
+        accepted = parse_accept_encoding(accept_encoding)
+        # A stored compressed copy the client takes beats compressing again, even in its preferred coding
+        encoding = next((name for name in self.encoded if name in accepted or '*' in accepted), None)
+        if encoding is not None:
+            self.body = self.encoded[encoding]
+        else:
+            encoding = choose_encoding(accept_encoding)
+            if encoding is None:
+                return
+            self.body = compress(self.body, encoding)
+        self.headers['content-encoding'] = encoding
+        self.headers['content-length'] = str(len(self.body))
+        self.headers.add_vary_header('Accept-Encoding')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            self._negotiate(scope)
+        await super().__call__(scope, receive, send)
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """One server-sent event carrying a single-line JSON payload"""
+    return b"event: " + event.encode('utf-8') + b"\ndata: " + data + b"\n\n"
+
+
+async def iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """Drive a blocking iterator from worker threads, one item at a time
+
+    A generator left unfinished (client disconnected) is closed, releasing
+    whatever it holds.
+    """
+    done = object()
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Still running in its worker thread; it is closed once collected
+                pass
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Newline-delimited JSON, one orjson-encoded line per item as it arrives"""
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, items: AsyncIterable, status_code: int = 200, headers=None, background=None):
+        super().__init__(self._encode(items), status_code, headers, self.media_type, background)
+
+    @staticmethod
+    async def _encode(items: AsyncIterable) -> AsyncIterator[bytes]:
+        async for item in items:
+            yield orjson.dumps(item, option=ORJSON_OPTIONS) + b"\n"
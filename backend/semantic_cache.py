@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Semantic Cache for Travel Searches
+Serves cached agent results for near-duplicate queries ("NYC" vs "New York City",
+"medium" vs "mid-range"). Query text is normalized, embedded locally with hashed
+character n-grams (no network calls) and matched against a NumPy-backed vector
+index by cosine similarity.
+
+Expired entries are kept for a further stale window, so callers can serve
+them (get_stale) while a fresh result is fetched in the background.
+"""
+
+import os
+import re
+import copy
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DIMENSIONS = 256
+DEFAULT_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.88'))
+DEFAULT_TTL_SECONDS = float(os.getenv('SEMANTIC_CACHE_TTL', str(6 * 60 * 60)))
+DEFAULT_STALE_SECONDS = float(os.getenv('SEMANTIC_CACHE_STALE_TTL', str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '100000'))
+DEFAULT_MAX_PARTITIONS = int(os.getenv('SEMANTIC_CACHE_MAX_PARTITIONS', '10000'))
+
+# Common abbreviations and spellings, applied to whole phrases before embedding
+ALIASES = {
+    'nyc': 'new york city',
+    'ny': 'new york',
+    'la': 'los angeles',
+    'sf': 'san francisco',
+    'dc': 'washington dc',
+    'washington d c': 'washington dc',
+    'rio': 'rio de janeiro',
+    'cdmx': 'mexico city',
+    'kl': 'kuala lumpur',
+    'hk': 'hong kong',
+    'uk': 'united kingdom',
+    'usa': 'united states',
+    'us': 'united states',
+    'uae': 'united arab emirates',
+}
+
+BUDGET_ALIASES = {
+    'low': 'low', 'budget': 'low', 'cheap': 'low', 'economy': 'low', 'backpacker': 'low',
+    'medium': 'medium', 'mid': 'medium', 'mid-range': 'medium', 'midrange': 'medium',
+    'mid range': 'medium', 'moderate': 'medium', 'standard': 'medium',
+    'high': 'high', 'luxury': 'high', 'premium': 'high', 'expensive': 'high', 'upscale': 'high',
+}
+
+_NON_WORD = re.compile(r"[^\w\s-]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and expand a query that is itself a known alias
+
+    Aliases only replace the whole query: expanded word by word, "la" would
+    turn "La Paz" into "los angeles paz".
+    """
+    cleaned = _SPACES.sub(' ', _NON_WORD.sub(' ', (text or '').lower())).strip()
+    return ALIASES.get(cleaned, cleaned)
+
+
+def normalize_budget(budget: str) -> str:
+    """Map budget spellings ('mid-range', 'luxury', ...) onto low/medium/high"""
+    key = _SPACES.sub(' ', (budget or '').strip().lower())
+    return BUDGET_ALIASES.get(key, key)
+
+
+class HashedNgramEmbedder:
+    """Embeds text as an L2-normalized bag of hashed character n-grams and words"""
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS, ngram_sizes: Tuple[int, ...] = (2, 3, 4)):
+        self.dimensions = dimensions
+        self.ngram_sizes = ngram_sizes
+
+    def _features(self, text: str) -> List[str]:
+        padded = f" {text} "
+        features = [f"w:{word}" for word in text.split()]
+        for n in self.ngram_sizes:
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            # crc32 is stable across processes, unlike the builtin hash()
+            h = zlib.crc32(feature.encode('utf-8'))
+            vector[h % self.dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class _PartitionIndex:
+    """Contiguous vector matrix for one partition, so lookups only scan its rows"""
+
+    def __init__(self, dimensions: int):
+        self.vectors = np.zeros((16, dimensions), dtype=np.float32)
+        self.slots = np.zeros(16, dtype=np.int64)
+        self.size = 0
+
+    def add(self, slot: int, vector: np.ndarray) -> int:
+        if self.size == len(self.slots):
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+            self.slots = np.concatenate([self.slots, np.zeros_like(self.slots)])
+        position = self.size
+        self.vectors[position] = vector
+        self.slots[position] = slot
+        self.size += 1
+        return position
+
+    def remove(self, position: int) -> Optional[int]:
+        """Swap-remove a row; returns the slot that moved into `position`, if any"""
+        last = self.size - 1
+        self.size = last
+        if position == last:
+            return None
+        self.vectors[position] = self.vectors[last]
+        self.slots[position] = self.slots[last]
+        return int(self.slots[position])
+
+    def best_match(self, vector: np.ndarray) -> Tuple[int, float]:
+        scores = self.vectors[:self.size] @ vector
+        best = int(np.argmax(scores))
+        return int(self.slots[best]), float(scores[best])
+
+
+class SemanticCache:
+    """Similarity-matched result cache with a fixed-capacity vector index
+
+    Entries live in `max_entries` slots; when full, the least recently set
+    entry is evicted. Exact structured parameters (budget tier, activity
+    count, ...) form a partition that must match exactly; only the free-text
+    part of the query is matched semantically, and only against vectors in
+    the same partition. Partitions are created by set() and dropped once
+    empty; past `max_partitions` the least recently set one is evicted whole.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, threshold: float = DEFAULT_THRESHOLD,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, dimensions: int = DEFAULT_DIMENSIONS,
+                 stale_seconds: float = DEFAULT_STALE_SECONDS, max_partitions: int = DEFAULT_MAX_PARTITIONS):
+        self.max_entries = max_entries
+        self.max_partitions = max_partitions
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.embedder = HashedNgramEmbedder(dimensions)
+        self._lock = threading.Lock()
+
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._positions = np.zeros(max_entries, dtype=np.int64)
+        self._values: List[Any] = [None] * max_entries
+        self._keys: List[Optional[Tuple[int, str]]] = [None] * max_entries
+
+        # Occupied slots, least recently set first
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+        self._free_slots: List[int] = []
+        self._allocated = 0
+
+        self._partitions: Dict[Tuple, int] = {}
+        self._partition_keys: List[Optional[Tuple]] = []
+        self._indexes: List[Optional[_PartitionIndex]] = []
+        # Partition ids by most recent set(), least recent first
+        self._partition_order: "OrderedDict[int, None]" = OrderedDict()
+        self._free_partitions: List[int] = []
+        self._exact: Dict[Tuple[int, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def _partition_key(self, namespace: str, params: Dict[str, Any]) -> Tuple:
+        return (namespace,) + tuple(sorted(
+            (name, normalize_budget(value) if name == 'budget' else value)
+            for name, value in params.items()
+        ))
+
+    def _new_partition(self, key: Tuple) -> int:
+        if len(self._partitions) >= self.max_partitions:
+            oldest = next(iter(self._partition_order))
+            index = self._indexes[oldest]
+            for slot in [int(slot) for slot in index.slots[:index.size]]:
+                self._evict(slot)
+        if self._free_partitions:
+            partition = self._free_partitions.pop()
+            self._partition_keys[partition] = key
+            self._indexes[partition] = _PartitionIndex(self.embedder.dimensions)
+        else:
+            partition = len(self._indexes)
+            self._partition_keys.append(key)
+            self._indexes.append(_PartitionIndex(self.embedder.dimensions))
+        self._partitions[key] = partition
+        return partition
+
+    def _drop_partition(self, partition: int):
+        del self._partitions[self._partition_keys[partition]]
+        self._partition_keys[partition] = None
+        self._indexes[partition] = None
+        self._partition_order.pop(partition, None)
+        self._free_partitions.append(partition)
+
+    def _lookup(self, partition: Optional[int], text: str, vector: np.ndarray) -> Optional[int]:
+        if partition is None:
+            return None
+        slot = self._exact.get((partition, text))
+        if slot is not None:
+            return slot
+        slot, score = self._indexes[partition].best_match(vector)
+        return slot if score >= self.threshold else None
+
+    def _evict(self, slot: int):
+        partition, _ = key = self._keys[slot]
+        self._exact.pop(key, None)
+        index = self._indexes[partition]
+        moved = index.remove(int(self._positions[slot]))
+        if moved is not None:
+            self._positions[moved] = self._positions[slot]
+        self._values[slot] = None
+        self._keys[slot] = None
+        self._order.pop(slot, None)
+        self._free_slots.append(slot)
+        if index.size == 0:
+            self._drop_partition(partition)
+
+    def _find(self, namespace: str, text: str, params: Dict[str, Any]) -> Optional[int]:
+        """Slot of the entry matching a query (fresh or not); call with the lock held"""
+        normalized = normalize_text(text)
+        partition = self._partitions.get(self._partition_key(namespace, params))
+        if partition is None:
+            return None
+        return self._lookup(partition, normalized, self.embedder.embed(normalized))
+
+    def get(self, namespace: str, text: str, **params) -> Optional[Any]:
+        """Return a copy of the cached value for a similar query, or None"""
+        with self._lock:
+            slot = self._find(namespace, text, params)
+            if slot is None or time.time() - self._created[slot] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            value = self._values[slot]
+        return copy.deepcopy(value)
+
+    def get_stale(self, namespace: str, text: str, **params) -> Optional[Any]:
+        """Return a copy of an expired entry still within the stale window, or None"""
+        with self._lock:
+            slot = self._find(namespace, text, params)
+            if slot is None:
+                return None
+            age = time.time() - self._created[slot]
+            if age <= self.ttl_seconds or age > self.ttl_seconds + self.stale_seconds:
+                return None
+            self.stale_hits += 1
+            value = self._values[slot]
+        return copy.deepcopy(value)
+
+    def set(self, namespace: str, text: str, value: Any, **params):
+        """Store a value, replacing any entry for the same normalized query"""
+        normalized = normalize_text(text)
+        vector = self.embedder.embed(normalized)
+        value = copy.deepcopy(value)
+        with self._lock:
+            partition_key = self._partition_key(namespace, params)
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                partition = self._new_partition(partition_key)
+            key = (partition, normalized)
+            slot = self._exact.get(key)
+
+            if slot is None:
+                if not self._free_slots and self._allocated >= self.max_entries:
+                    self._evict(next(iter(self._order)))
+                    if self._indexes[partition] is None:
+                        # That was this partition's last entry, which dropped the partition
+                        partition = self._new_partition(partition_key)
+                        key = (partition, normalized)
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                else:
+                    slot = self._allocated
+                    self._allocated += 1
+                self._positions[slot] = self._indexes[partition].add(slot, vector)
+                self._keys[slot] = key
+                self._exact[key] = slot
+
+            # Re-set entries become the newest, both for eviction and partition recency
+            self._order[slot] = None
+            self._order.move_to_end(slot)
+            self._partition_order[partition] = None
+            self._partition_order.move_to_end(partition)
+            self._created[slot] = time.time()
+            self._values[slot] = value
+
+    def contains(self, namespace: str, text: str, **params) -> bool:
+        """Check for a fresh entry without copying it or counting a hit"""
+        with self._lock:
+            slot = self._find(namespace, text, params)
+            return slot is not None and time.time() - self._created[slot] <= self.ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            return {'entries': len(self._order), 'partitions': len(self._partitions), 'hits': self.hits, 'misses': self.misses, 'stale_hits': self.stale_hits}
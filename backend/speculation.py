@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Speculative Result Slots
+Short-lived slots for work started before anyone asked for it, e.g. the activity
+search that almost always follows a hotel search for the same destination.
+Unclaimed slots are cancelled and dropped after a timeout: the work is handed
+a threading.Event that is set then, and is expected to stop at its next
+checkpoint (see AITravelItineraryGenerator.cancel_event).
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from semantic_cache import normalize_text, normalize_budget
+
+
+def activity_slot_key(destination: str, budget: str, duration: int) -> tuple:
+    """Key shared by the hotel search that starts the work and the activity search that claims it"""
+    return (normalize_text(destination), normalize_budget(budget), int(duration))
+
+
+class SpeculativeSlots:
+    """Holds in-flight speculative tasks keyed by the request expected to claim them"""
+
+    def __init__(self, timeout_seconds: float = 60.0):
+        self.timeout_seconds = timeout_seconds
+        self._slots: Dict[Hashable, asyncio.Task] = {}
+        self._expiry: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._cancels: Dict[Hashable, threading.Event] = {}
+        self.started = 0
+        self.claimed = 0
+        self.expired = 0
+
+    def start(self, key: Hashable, func: Callable, *args) -> bool:
+        """Run func(*args, cancel=event) in a worker thread unless a slot for key already exists
+
+        The event is set if the slot expires unclaimed; func should stop then.
+        """
+        if key in self._slots:
+            return False
+
+        loop = asyncio.get_running_loop()
+        cancel = threading.Event()
+        task = loop.create_task(asyncio.to_thread(func, *args, cancel=cancel))
+        # Retrieve failures so an unclaimed failing task doesn't log "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._slots[key] = task
+        self._cancels[key] = cancel
+        self._expiry[key] = loop.call_later(self.timeout_seconds, self._expire, key)
+        self.started += 1
+        return True
+
+    def take(self, key: Hashable) -> Optional[asyncio.Task]:
+        """Claim the task for key, if one is pending"""
+        task = self._slots.pop(key, None)
+        self._cancels.pop(key, None)
+        handle = self._expiry.pop(key, None)
+        if handle:
+            handle.cancel()
+        if task is not None:
+            self.claimed += 1
+        return task
+
+    def _expire(self, key: Hashable):
+        self._expiry.pop(key, None)
+        task = self._slots.pop(key, None)
+        cancel = self._cancels.pop(key, None)
+        if cancel is not None:
+            # Cancelling the task only drops the await; the event stops the thread's upstream calls
+            cancel.set()
+        if task is not None:
+            task.cancel()
+            self.expired += 1
+
+    def cancel_all(self):
+        for key in list(self._slots):
+            self._expire(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self._slots),
+            'started': self.started,
+            'claimed': self.claimed,
+            'expired': self.expired,
+        }
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Incremental Record Parsing
+Consumes an LLM completion chunk by chunk as it streams in and hands back
+each labelled record ("HOTEL NAME: ..." / "ACTIVITY NAME: ...") as soon as it
+is complete, i.e. once the next record's marker has arrived, instead of
+waiting for the whole answer. Completed record text is parsed with the same
+structured parsers as the buffered path, so both produce identical models.
+"""
+
+from typing import Callable, List
+
+HOTEL_MARKER = 'HOTEL NAME:'
+ACTIVITY_MARKER = 'ACTIVITY NAME:'
+
+
+class RecordStreamParser:
+    """Splits a streamed completion into records as each one completes"""
+
+    def __init__(self, marker: str, parse: Callable[[str], List]):
+        self.marker = marker
+        self.parse = parse
+        self._buffer = ''
+        # Where to resume looking for the marker that ends the current record
+        self._scan = 0
+        self.records = 0
+
+    def feed(self, chunk: str) -> List:
+        """Add streamed text; returns the records it completed"""
+        self._buffer += chunk
+        completed = []
+        while True:
+            start = self._buffer.find(self.marker)
+            if start < 0:
+                # Preamble before the first record; keep only what could be a split marker
+                self._buffer = self._buffer[-(len(self.marker) - 1):]
+                self._scan = 0
+                break
+            if start:
+                self._buffer = self._buffer[start:]
+                self._scan = 0
+            end = self._buffer.find(self.marker, max(self._scan, len(self.marker)))
+            if end < 0:
+                self._scan = max(len(self.marker), len(self._buffer) - len(self.marker) + 1)
+                break
+            completed.extend(self.parse(self._buffer[:end]))
+            self._buffer = self._buffer[end:]
+            self._scan = 0
+        self.records += len(completed)
+        return completed
+
+    def close(self) -> List:
+        """End of the completion: the last record is complete"""
+        text, self._buffer, self._scan = self._buffer, '', 0
+        completed = self.parse(text) if text.startswith(self.marker) else []
+        self.records += len(completed)
+        return completed
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Backend modules import each other by bare name, as when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from semantic_cache import SemanticCache
+from travel_generator import AITravelItineraryGenerator
+
+
+@pytest.fixture
+def offline_clients(monkeypatch):
+    """Keep generators built in a test from creating LLM and search clients
+
+    Returns a function setting how each new generator or clone gets its agent
+    executor, from the generator itself; by default it has none.
+    """
+    make_executor = [lambda generator: None]
+
+    def setup_clients(self):
+        self.llms = {}
+        self.executors = {}
+        self.agent_executor = make_executor[0](self)
+
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    monkeypatch.setenv('TAVILY_API_KEY', 'test')
+    monkeypatch.setattr(AITravelItineraryGenerator, 'setup_clients', setup_clients)
+
+    def use_executor(factory):
+        make_executor[0] = factory
+    return use_executor
+
+
+@pytest.fixture
+def generator(offline_clients):
+    return AITravelItineraryGenerator(cache=SemanticCache(max_entries=64))
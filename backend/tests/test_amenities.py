@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from amenities import AmenityEngine
+
+
+def legacy_amenities(description, budget):
+    """The per-hotel chain of `in` checks AmenityEngine replaced"""
+    amenities = ["Wifi"]
+    if budget == "low":
+        amenities += ["Shared Bathroom", "Common Area"]
+    elif budget == "medium":
+        amenities += ["Private Bathroom", "Restaurant", "Room Service"]
+    else:
+        amenities += ["Spa", "Pool", "Gym", "Concierge", "Restaurant", "Room Service"]
+    description = description.lower()
+    if 'parking' in description:
+        amenities.append("Parking")
+    if 'pool' in description:
+        amenities.append("Pool")
+    if 'spa' in description:
+        amenities.append("Spa")
+    if 'gym' in description or 'fitness' in description:
+        amenities.append("Gym")
+    if 'restaurant' in description or 'dining' in description:
+        amenities.append("Restaurant")
+    if 'business' in description:
+        amenities.append("Business Center")
+    return set(amenities)
+
+
+FRAGMENTS = [
+    "Rooftop POOL", "free parking", "spacious rooms", "Fitness centre", "fine dining", "business lounge",
+    "airport shuttle", "breakfast included", "kitchenette", "lounge bar", "businesspa", "fitnesspa",
+    "parkingym", "diningym", "sparking", "quiet garden", "", "Gym & Spa",
+]
+
+
+@pytest.mark.parametrize("budget", ["low", "medium", "high"])
+def test_matches_legacy_chain(budget):
+    engine = AmenityEngine()
+    rng = random.Random(7)
+    for _ in range(500):
+        description = " ".join(rng.sample(FRAGMENTS, 3)) if rng.random() < 0.5 else "".join(rng.sample(FRAGMENTS, 2))
+        assert set(engine.infer(description, budget)) == legacy_amenities(description, budget), description
+
+
+def test_overlapping_keywords_all_match():
+    assert "Spa" in AmenityEngine().infer("businesspa", "low")
+    assert {"Parking", "Gym"} <= set(AmenityEngine().infer("parkingym", "low"))
+
+
+def test_stable_order_and_no_duplicates():
+    engine = AmenityEngine()
+    amenities = engine.infer("Spa, pool and fine dining with free parking", "high")
+    assert amenities == ["Wifi", "Spa", "Pool", "Gym", "Concierge", "Restaurant", "Room Service", "Parking"]
+    assert amenities is not engine.infer("Spa, pool and fine dining with free parking", "high")
+
+
+def test_empty_batch():
+    assert AmenityEngine().infer_batch([], "low") == []
+
+
+def test_batch_matches_single():
+    engine = AmenityEngine()
+    descriptions = ["pool", None, "business hotel", "Gym"]
+    assert engine.infer_batch(descriptions, "medium") == [engine.infer(d or "", "medium") for d in descriptions]
+
+
+def test_added_keywords():
+    engine = AmenityEngine()
+    engine.add_keywords("Lockers", ["locker"], tier="low")
+    assert "Lockers" in engine.infer("Lockers in every dorm", "low")
+    assert "Lockers" not in engine.infer("Lockers in every dorm", "high")
+
+
+def test_rules_with_several_matching_keywords_report_once():
+    assert AmenityEngine().infer("Gym and fitness centre, dining and a restaurant", "low") == [
+        "Wifi", "Shared Bathroom", "Common Area", "Gym", "Restaurant"]
@@ -0,0 +1,81 @@
+import pytest
+
+from models import Hotel
+from normalization import HOTEL_BUDGET_TIERS, normalize_prices, split_by_budget, within_budget
+
+
+def hotel(name, price):
+    return normalize_prices([Hotel(name=name, price=price, rating='4', location='Testville')])[0]
+
+
+def hotels(*prices):
+    return "\n".join(f"HOTEL NAME: Hotel {price}\nPRICE: {price}/night\nRATING: 4\n" for price in prices)
+
+
+@pytest.mark.parametrize('price, budget, fits', [
+    ('$80', 'low', True),
+    ('$150', 'low', False),
+    ('$150', 'mid-range', True),
+    ('$60', 'medium', False),
+    ('$80-120', 'medium', True),
+    ('$250', 'luxury', False),
+    ('$400', 'high', True),
+    # Unknown prices and other currencies can't be compared, so they are kept
+    ('Varies', 'low', True),
+    ('€500', 'low', True),
+])
+def test_within_budget(price, budget, fits):
+    assert within_budget(hotel('Hotel', price), HOTEL_BUDGET_TIERS, budget) is fits
+
+
+def test_split_by_budget_keeps_order():
+    items = [hotel(str(price), f"${price}") for price in (50, 150, 90, 300, 20)]
+    fit, rejected = split_by_budget(items, HOTEL_BUDGET_TIERS, 'low')
+    assert [item.name for item in fit] == ['50', '90', '20']
+    assert [item.name for item in rejected] == ['150', '300']
+
+
+class ScriptedExecutor:
+    """Answers the full search with `first` and top-ups with `top_up`, recording prompts and web queries"""
+
+    def __init__(self, first, top_up, prompts):
+        self.first = first
+        self.top_up = top_up
+        self.prompts = prompts
+
+    def invoke(self, inputs):
+        self.prompts.append((inputs['input'], inputs['searches']))
+        return {'output': self.top_up if 'more hotels' in inputs['input'] else self.first}
+
+
+def test_out_of_budget_hotels_are_replaced_by_a_top_up(offline_clients, generator):
+    prompts = []
+    executor = ScriptedExecutor(hotels('$80', '$450', '$95'), hotels('$70', '$600'), prompts)
+    offline_clients(lambda clone: executor)
+    generator.agent_executor = executor
+
+    found = generator.search_hotels('Testville', '', '', 'low')
+    assert [hotel.name for hotel in found] == ['Hotel $80', 'Hotel $95', 'Hotel $70']
+    # One top-up for the single missing hotel, excluding everything already seen
+    top_ups = [prompt for prompt, _ in prompts if 'more hotels' in prompt]
+    assert len(top_ups) == 1
+    assert 'Find 1 more hotels' in top_ups[0]
+    assert 'Hotel $450' in top_ups[0]
+
+
+def test_out_of_budget_hotels_are_kept_when_nothing_fits(offline_clients, generator):
+    executor = ScriptedExecutor(hotels('$450', '$600'), '', [])
+    offline_clients(lambda clone: executor)
+    generator.agent_executor = executor
+    found = generator.search_hotels('Testville', '', '', 'low')
+    assert [hotel.name for hotel in found] == ['Hotel $450', 'Hotel $600']
+
+
+def test_hotel_top_up_pages_search_different_places(offline_clients, generator):
+    prompts = []
+    executor = ScriptedExecutor('', hotels('$70', '$80', '$90', '$95'), prompts)
+    offline_clients(lambda clone: executor)
+    generator._top_up('hotels', 'Testville', 'low', 8, [])
+    first_round = prompts[:2]
+    assert len({prompt for prompt, _ in first_round}) == 2
+    assert len({tuple(searches) for _, searches in first_round}) == 2
@@ -0,0 +1,153 @@
+import time
+
+import pytest
+from langchain_community.chat_models.fake import FakeListChatModel
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from pipeline import SearchExtractPipeline
+from semantic_cache import SemanticCache
+from travel_generator import AITravelItineraryGenerator
+
+HOTELS = "HOTEL NAME: Fresh Hotel\nPRICE: $150/night\nRATING: 4\n"
+
+
+def failing(breaker):
+    def call():
+        raise RuntimeError('503')
+    return breaker.wrap(call)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_seconds=60)
+    call = failing(breaker)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            call()
+    # A success in between resets the count
+    assert breaker.wrap(lambda: 'ok')() == 'ok'
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            call()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.wrap(lambda: 'ok')()
+    assert breaker.stats() == {'state': OPEN, 'consecutive_failures': 3, 'rejected': 1}
+    assert not breaker.available()
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=0.02)
+    breaker.record_failure()
+    time.sleep(0.03)
+    assert breaker.state == HALF_OPEN
+    assert breaker.available()
+    breaker.before_call()
+    # Only one trial at a time
+    assert not breaker.available()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_opens_again():
+    breaker = CircuitBreaker('test', failure_threshold=5, reset_seconds=0.02)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.03)
+    with pytest.raises(RuntimeError):
+        failing(breaker)()
+    assert breaker.state == OPEN
+
+
+def test_released_trial_lets_another_through():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=0.02)
+    breaker.record_failure()
+    time.sleep(0.03)
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker('test', failure_threshold=2, slow_call_seconds=0.5)
+    breaker.record_success(seconds=1.0)
+    breaker.record_success(seconds=0.1)
+    assert breaker.stats()['consecutive_failures'] == 0
+    breaker.record_success(seconds=1.0)
+    breaker.record_success(seconds=2.0)
+    assert breaker.state == OPEN
+
+
+def test_get_stale_serves_copies_within_the_window():
+    cache = SemanticCache(max_entries=4, ttl_seconds=0.02, stale_seconds=0.1)
+    cache.set('hotels', 'Lisbon', [{'name': 'Hotel Avenida'}], budget='medium')
+    time.sleep(0.03)
+    stale = cache.get_stale('hotels', 'lisbon', budget='mid-range')
+    assert stale == [{'name': 'Hotel Avenida'}]
+    stale[0]['name'] = 'Changed'
+    assert cache.get_stale('hotels', 'Lisbon', budget='medium') == [{'name': 'Hotel Avenida'}]
+    assert cache.get_stale('hotels', 'Lisbon', budget='low') is None
+    assert cache.stats()['stale_hits'] == 2
+    time.sleep(0.1)
+    assert cache.get_stale('hotels', 'Lisbon', budget='medium') is None
+
+
+class CountingExecutor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def invoke(self, inputs):
+        self.calls.append(inputs['input'])
+        return {'output': HOTELS}
+
+
+def test_stale_results_are_served_while_the_upstream_is_down(offline_clients):
+    calls = []
+    offline_clients(lambda generator: CountingExecutor(calls))
+    generator = AITravelItineraryGenerator(cache=SemanticCache(max_entries=8, ttl_seconds=0.01, stale_seconds=60))
+    generator.cache.set('hotels', 'Lisbon', generator._extract_hotels(HOTELS.replace('Fresh', 'Old'), 'Lisbon'),
+                        budget='medium')
+    time.sleep(0.02)
+    generator.breakers['gemini'].failure_threshold = 1
+    generator.breakers['gemini'].record_failure()
+
+    hotels = generator.search_hotels('Lisbon', '', '', 'medium')
+    generator._refresher.shutdown(wait=True)
+    assert [hotel.name for hotel in hotels] == ['Old Hotel']
+    # The background refresh failed fast on the open circuit instead of calling the agent
+    assert calls == []
+
+
+@pytest.fixture
+def failing_search(monkeypatch):
+    """A generator with its real clients, whose Tavily API calls fail"""
+    def results(self, query, *args, **kwargs):
+        raise RuntimeError('502 Bad Gateway')
+
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    monkeypatch.setenv('TAVILY_API_KEY', 'test')
+    monkeypatch.setattr(TavilySearchAPIWrapper, 'results', results)
+    return AITravelItineraryGenerator(mode='pipeline')
+
+
+def test_failed_searches_reach_the_breaker(failing_search):
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match='502'):
+            failing_search.search_tool.invoke('hotels in Lisbon')
+    assert failing_search.breakers['tavily'].stats()['consecutive_failures'] == 3
+
+
+def test_pipeline_refuses_to_extract_from_failed_searches(failing_search):
+    llm = FakeListChatModel(responses=['HOTEL NAME: Made Up Hotel'])
+    pipeline = SearchExtractPipeline(llm, failing_search.search_tool)
+    with pytest.raises(RuntimeError, match='502'):
+        pipeline.invoke({'input': 'Find hotels in Lisbon', 'searches': ['hotels in Lisbon', 'Lisbon prices']})
+    assert llm.i == 0
+
+
+def test_agent_sees_failed_searches_as_observations(failing_search):
+    observation = failing_search.tools[0].run('hotels in Lisbon')
+    assert observation.startswith('Search failed: 502')
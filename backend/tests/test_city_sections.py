@@ -0,0 +1,33 @@
+def section(header, hotel):
+    return f"CITY: {header}\nHOTEL NAME: {hotel}\nPRICE: $150/night\nRATING: 4\n"
+
+
+def group(*searches):
+    return [((city.lower(), budget), {'location': city, 'budget': budget}) for city, budget in searches]
+
+
+def hotel_names(sections):
+    return {key: [hotel.name for hotel in hotels] for key, hotels in sections.items()}
+
+
+def test_full_city_names_win_over_substrings(generator):
+    output = section('York (medium budget)', 'Minster Inn') + section('New York (medium budget)', 'Hudson Hotel')
+    sections = generator._parse_city_sections(output, group(('New York', 'medium'), ('York', 'medium')))
+    assert hotel_names(sections) == {
+        ('new york', 'medium'): ['Hudson Hotel'],
+        ('york', 'medium'): ['Minster Inn'],
+    }
+
+
+def test_partial_names_need_a_single_candidate(generator):
+    searches = group(('New York', 'medium'), ('York', 'medium'))
+    assert generator._parse_city_sections(section('New York City', 'Hudson Hotel'), searches) == {}
+
+    sections = generator._parse_city_sections(section('New York City', 'Hudson Hotel'), searches[:1])
+    assert hotel_names(sections) == {('new york', 'medium'): ['Hudson Hotel']}
+
+
+def test_budget_in_the_header_picks_between_duplicate_cities(generator):
+    output = section('Paris (high budget)', 'Ritz') + section('Paris (low budget)', 'Generator Hostel')
+    sections = generator._parse_city_sections(output, group(('Paris', 'low'), ('Paris', 'high')))
+    assert hotel_names(sections) == {('paris', 'high'): ['Ritz'], ('paris', 'low'): ['Generator Hostel']}
@@ -0,0 +1,67 @@
+from compaction import clean_text, compact_observation, compacting_search, split_sentences
+from metrics import estimate_tokens, track_tokens
+
+LISBON = ("Hotel Avenida offers rooms from $150 per night near Rossio. Accept cookies to continue. "
+          "Breakfast is served daily on the rooftop terrace. Subscribe to our newsletter for deals.")
+
+
+def test_boilerplate_links_and_fragments_are_dropped():
+    text = "Home\nHotels > Europe\n[Book now](https://example.com/book) for the best rates in town! " \
+           "![logo](https://example.com/logo.png) See https://example.com for details on every room. " + LISBON
+    sentences = split_sentences(text)
+    assert sentences == [
+        'Book now for the best rates in town!',
+        'See for details on every room.',
+        'Hotel Avenida offers rooms from $150 per night near Rossio.',
+        'Breakfast is served daily on the rooftop terrace.',
+    ]
+    assert clean_text('[Alfama](https://example.com/alfama)') == 'Alfama'
+
+
+def test_short_fragments_with_numbers_are_kept():
+    assert split_sentences('From $89\nMenu') == ['From $89']
+
+
+def test_repeated_and_near_repeated_sentences_are_dropped():
+    results = [
+        {'url': 'https://a.example', 'content': LISBON},
+        {'url': 'https://b.example', 'content': 'Hotel Avenida offers rooms from $150 per night near Rossio square. '
+                                                'The rooftop bar opens at 6pm every evening.'},
+        {'url': 'https://a.example', 'content': 'A repeated URL is skipped entirely, whatever it says.'},
+    ]
+    compacted = compact_observation(results)
+    assert compacted.count('Hotel Avenida offers rooms') == 1
+    assert 'rooftop bar opens at 6pm' in compacted
+    assert 'repeated URL' not in compacted
+    assert compacted.startswith('[1] https://a.example\n')
+    assert '[2] https://b.example\n' in compacted
+
+
+def test_budget_is_shared_round_robin_across_sources():
+    results = [{'url': f"https://{source}.example",
+                'content': ' '.join(f"Source {source} fact number {i} about the old town of Lisbon." for i in range(30))}
+               for source in 'abc']
+    compacted = compact_observation(results, token_budget=60)
+    assert estimate_tokens(compacted) <= 80  # headers come on top of the sentence budget
+    for source in 'abc':
+        assert f"Source {source} fact number 0" in compacted
+    assert 'fact number 29' not in compacted
+
+
+def test_plain_text_and_nested_results():
+    assert compact_observation('Rooms at Hotel Avenida start from $150 per night.') == \
+        '[1]\nRooms at Hotel Avenida start from $150 per night.'
+    nested = [[{'url': 'https://a.example', 'content': LISBON}], [{'url': 'https://b.example', 'content': LISBON}]]
+    assert compact_observation(nested).count('[') == 1
+    assert compact_observation([]) == ''
+
+
+def test_observations_are_accounted_to_the_request():
+    class Search:
+        def invoke(self, query):
+            return [{'url': 'https://a.example', 'content': LISBON * 3}]
+
+    with track_tokens() as usage:
+        compacted = compacting_search(Search())('hotels in Lisbon')
+    assert usage.observation_tokens == estimate_tokens(compacted)
+    assert usage.observation_raw_tokens > usage.observation_tokens
@@ -0,0 +1,49 @@
+import pytest
+
+from destination_store import DestinationStore, write_destination_store
+
+DESTINATIONS = [
+    {'id': 'lis', 'name': 'Lisbon', 'country': 'Portugal', 'region': 'Europe', 'price_range': 'medium',
+     'description': 'Hills, trams and pastéis de nata', 'image_url': 'https://example.com/lisbon.jpg',
+     'best_time': 'March - May', 'highlights': ['Alfama', 'Belém Tower']},
+    {'id': 'kyo', 'name': 'Kyoto', 'country': 'Japan', 'region': 'Asia', 'price_range': 'high',
+     'description': '', 'image_url': '', 'best_time': '', 'highlights': []},
+    {'id': 'opo', 'name': 'Porto', 'country': 'Portugal', 'region': 'Europe', 'price_range': 'low',
+     'description': 'Port cellars', 'image_url': '', 'best_time': 'June', 'highlights': ['Ribeira']},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'destinations.gtcol')
+    write_destination_store(DESTINATIONS, path)
+    store = DestinationStore(path)
+    yield store
+    store.close()
+
+
+def test_rows_round_trip(store):
+    assert len(store) == 3
+    assert list(store.iter_rows()) == DESTINATIONS
+    with pytest.raises(IndexError):
+        store.row(3)
+
+
+def test_columns_match_rows(store):
+    for column in DESTINATIONS[0]:
+        assert store.column(column) == [destination[column] for destination in DESTINATIONS]
+    assert store.values('country') == ['Portugal', 'Japan']
+
+
+def test_filter_and_search(store):
+    assert store.filter(country='portugal') == [0, 2]
+    assert store.filter(country='Portugal', price_range='low') == [2]
+    assert store.filter(region='Oceania') == []
+    assert [row['name'] for row in store.search(region='Europe', limit=1)] == ['Lisbon']
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'destinations.json'
+    path.write_bytes(b'{"destinations": []}')
+    with pytest.raises(ValueError):
+        DestinationStore(str(path))
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from generator_pool import GeneratorPool, PoolExhaustedError
+from semantic_cache import SemanticCache
+import travel_generator
+from travel_generator import AITravelItineraryGenerator
+
+HOTELS = "\n".join(f"HOTEL NAME: Hotel {i}\nPRICE: $150/night\nRATING: 4\n" for i in range(3))
+
+
+class RecordingExecutor:
+    """Stands in for an agent executor, recording which generator ran each call on which thread"""
+
+    def __init__(self, generator, calls):
+        self.generator = generator
+        self.calls = calls
+
+    def invoke(self, inputs):
+        self.calls.append((id(self.generator), threading.get_ident()))
+        time.sleep(0.01)
+        if 'EACH of these cities' in inputs['input']:
+            return {'output': ''}
+        return {'output': HOTELS}
+
+
+@pytest.fixture
+def calls(offline_clients):
+    calls = []
+    offline_clients(lambda generator: RecordingExecutor(generator, calls))
+    return calls
+
+
+@pytest.fixture
+def generator(calls):
+    return AITravelItineraryGenerator(cache=SemanticCache(max_entries=64))
+
+
+def test_pooled_instances_share_state_not_clients(generator):
+    pool = GeneratorPool(generator, size=3)
+    instances = list(pool._idle.queue)
+    assert len({id(instance) for instance in instances}) == 3
+    assert len({id(instance.agent_executor) for instance in instances}) == 3
+    assert all(instance.cache is generator.cache for instance in instances)
+    assert all(instance.breakers is generator.breakers for instance in instances)
+
+
+def test_checkout_limits_concurrency(generator):
+    pool = GeneratorPool(generator, size=2, timeout=0.05)
+    with pool.checkout(), pool.checkout():
+        assert pool.stats()['in_use'] == 2
+        with pytest.raises(PoolExhaustedError):
+            with pool.checkout():
+                pass
+    assert pool.stats()['idle'] == 2
+
+
+def test_batch_fan_out_never_uses_checked_out_generator(generator, calls, monkeypatch):
+    monkeypatch.setattr(travel_generator, 'HOTEL_BATCH_SIZE', 2)
+    pool = GeneratorPool(generator, size=2)
+    with pool.checkout() as checked_out:
+        results = checked_out.search_hotels_batch(
+            [{'location': city, 'budget': 'medium'} for city in ('Oslo', 'Lima', 'Rome', 'Kyiv')]
+        )
+    assert all(results)
+    assert calls
+    assert id(checked_out) not in {generator_id for generator_id, _ in calls}
+    # No generator is ever driven from two threads
+    threads = {}
+    for generator_id, thread in calls:
+        assert threads.setdefault(generator_id, thread) == thread
+
+
+def test_top_up_runs_on_clones(generator, calls):
+    added = generator._top_up('activities', 'Oslo', 'medium', 8, [])
+    assert added is not None
+    assert len(calls) >= 2
+    assert id(generator) not in {generator_id for generator_id, _ in calls}
+
+
+def test_stale_refresh_runs_on_clone(generator, calls):
+    generator.cache = SemanticCache(max_entries=8, ttl_seconds=0.01, stale_seconds=60)
+    generator.cache.set('hotels', 'Oslo', generator._extract_hotels(HOTELS, 'Oslo'), budget='medium')
+    time.sleep(0.02)
+    pool = GeneratorPool(generator, size=1)
+    with pool.checkout() as checked_out:
+        assert checked_out.search_hotels('Oslo', '', '', 'medium')
+    generator._refresher.shutdown(wait=True)
+    assert calls
+    assert id(checked_out) not in {generator_id for generator_id, _ in calls}
+
+
+def test_unpooled_call_takes_no_slot(generator, calls):
+    pool = GeneratorPool(generator, size=1)
+    with pool.checkout():
+        assert pool.call_unpooled('search_hotels', 'Oslo', '', '', 'medium')
+    assert id(generator) not in {generator_id for generator_id, _ in calls}
+
+
+def test_clones_share_the_pools_upstream_limit(offline_clients, monkeypatch):
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, peak
+
+    class CountingExecutor:
+        def invoke(self, inputs):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return {'output': HOTELS}
+
+    offline_clients(lambda generator: CountingExecutor())
+    monkeypatch.setattr(travel_generator, 'HOTEL_BATCH_SIZE', 1)
+    pool = GeneratorPool(AITravelItineraryGenerator(cache=SemanticCache(max_entries=64)), size=2)
+    with pool.checkout() as generator:
+        results = generator.search_hotels_batch(
+            [{'location': city, 'budget': 'medium'} for city in ('Oslo', 'Lima', 'Rome', 'Kyiv', 'Bern', 'Baku')]
+        )
+    assert all(results)
+    assert in_flight == [0, 2]
@@ -0,0 +1,115 @@
+import gzip
+import sqlite3
+
+import orjson
+import pytest
+
+import itinerary_store
+from itinerary_store import ItineraryStore, request_hash
+from models import Itinerary
+
+REQUEST = {
+    'destination': 'Lisbon',
+    'start_date': '2025-05-01',
+    'end_date': '2025-05-04',
+    'duration': 3,
+    'budget': 'medium',
+    'selected_hotel': {'name': 'Hotel Avenida', 'price': '$150/night', 'rating': 4.2},
+    'activities': [{'name': 'Belem Tower', 'price': '$10'}],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ItineraryStore(str(tmp_path / 'itineraries.db'))
+    yield store
+    store.close()
+
+
+def test_hash_covers_the_whole_request():
+    assert request_hash(REQUEST) == request_hash(dict(reversed(list(REQUEST.items()))))
+    assert request_hash(REQUEST) == request_hash({**REQUEST, 'destination': '  LISBON '})
+
+    other_price = {**REQUEST, 'selected_hotel': {**REQUEST['selected_hotel'], 'price': '$90/night'}}
+    other_activity = {**REQUEST, 'activities': [{'name': 'Belem Tower', 'price': 'Free'}]}
+    extra_field = {**REQUEST, 'travelers': 2}
+    hashes = {request_hash(r) for r in (REQUEST, other_price, other_activity, extra_field)}
+    assert len(hashes) == 4
+
+
+def test_round_trip_survives_reopening(tmp_path):
+    path = str(tmp_path / 'itineraries.db')
+    key = request_hash(REQUEST)
+    itinerary = Itinerary(
+        id=key, destination='Lisbon', dates='2025-05-01 to 2025-05-04', duration='3 days', budget='medium',
+        selected_hotel=REQUEST['selected_hotel'], daily_schedule=[]
+    )
+
+    store = ItineraryStore(path)
+    store.put(key, REQUEST, itinerary)
+    assert store.get(key)['destination'] == 'Lisbon'
+    store.close()
+
+    reopened = ItineraryStore(path)
+    try:
+        stored = reopened.get(key)
+        assert stored['id'] == key
+        assert stored['dates'] == '2025-05-01 to 2025-05-04'
+        assert reopened.get('missing') is None
+    finally:
+        reopened.close()
+
+
+def test_reads_do_not_write_until_a_batch_is_due(store, monkeypatch):
+    monkeypatch.setattr(itinerary_store, 'TOUCH_BATCH_SIZE', 3)
+    monkeypatch.setattr(itinerary_store, 'TOUCH_FLUSH_SECONDS', 3600)
+    for key in 'abc':
+        store.put(key, {'key': key}, {'key': key})
+
+    changes = store._conn.total_changes
+    store.get('a')
+    store.get('b')
+    assert store._conn.total_changes == changes
+    store.get('c')
+    assert store._conn.total_changes == changes + 3
+
+
+def test_eviction_sees_pending_reads(store, monkeypatch):
+    monkeypatch.setattr(itinerary_store, 'TOUCH_FLUSH_SECONDS', 3600)
+    for key in 'abc':
+        store.put(key, {'key': key}, {'key': key})
+    store.get('a')
+
+    # Room for two of the three entries: the oldest unread one goes
+    store.max_bytes = store.stats()['bytes'] * 2 // 3 + 1
+    store.put('b', {'key': 'b'}, {'key': 'b'})
+    assert store.get('a') is not None
+    assert store.get('c') is None
+
+
+def test_large_responses_are_stored_with_a_gzip_copy(store):
+    big = {'daily_schedule': [{'day': day, 'activities': [f"Activity {i}" for i in range(20)]} for day in range(30)]}
+    store.put('big', REQUEST, big)
+    store.put('small', REQUEST, {'ok': True})
+
+    text, encoded = store.get_encoded('big')
+    assert orjson.loads(text) == big
+    assert orjson.loads(gzip.decompress(encoded['gzip'])) == big
+    assert store.get_encoded('small') == ('{"ok":true}', {})
+    assert store.get_encoded('missing') is None
+
+
+def test_stores_from_before_precompression_still_open(tmp_path):
+    path = str(tmp_path / 'itineraries.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE itineraries (id TEXT PRIMARY KEY, request JSON NOT NULL, response JSON NOT NULL, "
+                 "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+    conn.execute("INSERT INTO itineraries VALUES ('old', '{}', '{\"ok\":true}', 20, 0, 0)")
+    conn.commit()
+    conn.close()
+
+    store = ItineraryStore(path)
+    try:
+        assert store.get_encoded('old') == ('{"ok":true}', {})
+    finally:
+        store.close()
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import orjson
+import pytest
+
+from job_queue import JobQueue, JobWorkerPool, PRIORITY_BACKGROUND, RUNNING, DONE, FAILED
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+def test_interrupted_jobs_are_reclaimed_once_their_lease_expires(path):
+    queue = JobQueue(path, lease_seconds=0.05)
+    interrupted = queue.submit('itinerary', {'destination': 'Lisbon'}, dedupe_key='itinerary:lisbon')
+    finished = queue.submit('itinerary', {'destination': 'Porto'})
+    assert queue.claim()['job_id'] == interrupted
+    assert queue.claim()['job_id'] == finished
+    queue.complete(finished, orjson.dumps({'ok': True}))
+    # The process dies here with the first job still running
+    queue.close()
+
+    queue = JobQueue(path, lease_seconds=0.05)
+    try:
+        assert queue.status(finished)['status'] == DONE
+        # Still deduplicated against, and claimed again with its attempt counted
+        assert queue.submit('itinerary', {'destination': 'Lisbon'}, dedupe_key='itinerary:lisbon') == interrupted
+        time.sleep(0.1)
+        job = queue.claim()
+        assert job['job_id'] == interrupted
+        assert orjson.loads(job['payload']) == {'destination': 'Lisbon'}
+        assert queue.status(interrupted)['attempts'] == 2
+    finally:
+        queue.close()
+
+
+def test_starting_a_process_leaves_live_leases_alone(path):
+    running = JobQueue(path)
+    job_id = running.submit('itinerary', {'destination': 'Lisbon'})
+    assert running.claim()['job_id'] == job_id
+
+    # Another worker process starting up against the same database
+    starting = JobQueue(path)
+    try:
+        assert starting.status(job_id)['status'] == RUNNING
+        assert starting.claim() is None
+        # Nor can it finish a job it doesn't hold
+        starting.complete(job_id, orjson.dumps({'stolen': True}))
+        assert starting.status(job_id)['status'] == RUNNING
+        running.complete(job_id, orjson.dumps({'ok': True}))
+        assert orjson.loads(starting.get_raw_result(job_id)) == {'ok': True}
+    finally:
+        starting.close()
+        running.close()
+
+
+def test_renewed_leases_are_not_reclaimed(path):
+    running = JobQueue(path, lease_seconds=0.5)
+    job_id = running.submit('itinerary', {})
+    running.claim()
+    other = JobQueue(path, lease_seconds=0.5)
+    try:
+        for _ in range(3):
+            time.sleep(0.2)
+            assert running.renew() == 1
+            assert other.claim() is None
+        time.sleep(0.6)
+        assert other.claim()['job_id'] == job_id
+    finally:
+        other.close()
+        running.close()
+
+
+def test_jobs_out_of_attempts_fail(path):
+    queue = JobQueue(path, lease_seconds=0.01, max_attempts=2)
+    job_id = queue.submit('itinerary', {})
+    try:
+        for _ in range(2):
+            assert queue.claim()['job_id'] == job_id
+            time.sleep(0.02)
+        assert queue.claim() is None
+        status = queue.status(job_id)
+        assert status['status'] == FAILED
+        assert status['attempts'] == 2
+        assert 'Gave up after 2 attempts' in status['error']
+    finally:
+        queue.close()
+
+
+def test_workers_finish_recovered_jobs(path):
+    queue = JobQueue(path, lease_seconds=0.05)
+    job_id = queue.submit('itinerary', {'destination': 'Lisbon'})
+    queue.claim()
+    queue.close()
+
+    queue = JobQueue(path, lease_seconds=0.05)
+    ran = threading.Event()
+
+    def handler(payload):
+        ran.set()
+        return {'destination': payload['destination']}
+
+    workers = JobWorkerPool(queue, {'itinerary': handler}, workers=1)
+    workers.start()
+    try:
+        assert ran.wait(5)
+    finally:
+        workers.stop()
+    assert queue.status(job_id)['status'] == DONE
+    assert orjson.loads(queue.get_raw_result(job_id)) == {'destination': 'Lisbon'}
+    queue.close()
+
+
+def test_workers_keep_their_jobs_leased_while_running(path):
+    queue = JobQueue(path, lease_seconds=0.15)
+    other = JobQueue(path, lease_seconds=0.15)
+    job_id = queue.submit('itinerary', {})
+    release = threading.Event()
+    workers = JobWorkerPool(queue, {'itinerary': lambda payload: release.wait(5) and {}}, workers=1)
+    workers.start()
+    try:
+        time.sleep(0.5)
+        assert queue.status(job_id)['status'] == RUNNING
+        assert other.claim() is None
+    finally:
+        release.set()
+        workers.stop()
+        other.close()
+    assert queue.status(job_id)['status'] == DONE
+    queue.close()
+
+
+def test_interactive_jobs_are_claimed_before_background_ones(path):
+    queue = JobQueue(path)
+    background = queue.submit('prefetch', {}, priority=PRIORITY_BACKGROUND)
+    interactive = queue.submit('itinerary', {})
+    assert [queue.claim()['job_id'], queue.claim()['job_id']] == [interactive, background]
+    queue.close()
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from destination_store import DestinationStore, write_destination_store
+from knowledge_base import LocalKnowledgeBase
+from semantic_cache import SemanticCache
+from travel_generator import AITravelItineraryGenerator
+
+CURATED = {'cities': [
+    {'city': 'Lisbon', 'country': 'Portugal',
+     'hotels': [{'name': f"Hotel {i}", 'price': f"${120 + i * 10}/night", 'rating': '4.5/5'} for i in range(3)],
+     'activities': [{'name': 'Tram 28', 'price': '€3'}, {'name': 'Alfama walk', 'price': 'Free'}]},
+    {'city': 'New York', 'country': 'United States', 'hotels': [], 'activities': [{'name': 'High Line', 'price': 'Free'}]},
+]}
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = tmp_path / 'knowledge_base.json'
+    path.write_text(json.dumps(CURATED))
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'destinations.gtcol')
+    write_destination_store([
+        {'id': '1', 'name': 'Lisbon', 'country': 'Portugal', 'highlights': ['Belém Tower', 'Tram 28']},
+        {'id': '2', 'name': 'Kyoto', 'country': 'Japan', 'highlights': ['Fushimi Inari', 'Gion']},
+    ], path)
+    store = DestinationStore(path)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def kb(kb_path, store, tmp_path):
+    return LocalKnowledgeBase.load(str(tmp_path / 'missing.ts'), store, kb_path)
+
+
+def test_locations_resolve_to_cities(kb):
+    assert kb.resolve('Lisbon, Portugal')['city'] == 'Lisbon'
+    assert kb.resolve('  kyoto ')['city'] == 'Kyoto'
+    assert kb.resolve('New York City')['city'] == 'New York'
+    # Every token of the city's name has to be present
+    assert kb.resolve('York') is None
+    assert kb.resolve('Atlantis') is None
+
+
+def test_lookups_merge_sources_and_count_hits(kb):
+    hotels = kb.lookup('hotels', 'Lisbon')
+    assert [hotel.name for hotel in hotels] == ['Hotel 0', 'Hotel 1', 'Hotel 2']
+    assert hotels[0].price_min == 120 and hotels[0].rating_value == 4.5
+    # Curated entries lead, and catalog highlights with the same name aren't repeated
+    assert [activity.name for activity in kb.lookup('activities', 'Lisbon')] == ['Tram 28', 'Alfama walk', 'Belém Tower']
+    assert kb.lookup('hotels', 'Kyoto') == []
+    assert kb.stats()['hits'] == 2 and kb.stats()['misses'] == 1
+
+
+def test_lookups_return_copies(kb):
+    kb.lookup('hotels', 'Lisbon')[0].name = 'Changed'
+    assert kb.lookup('hotels', 'Lisbon')[0].name == 'Hotel 0'
+
+
+def test_catalog_highlights_load_on_first_lookup(kb):
+    assert kb.stats()['unloaded'] == 2
+    activities = kb.lookup('activities', 'Kyoto')
+    assert [activity.name for activity in activities] == ['Fushimi Inari', 'Gion']
+    assert activities[0].description == 'One of the highlights of Kyoto, Japan'
+    assert kb.stats()['unloaded'] == 1
+
+
+class FailingExecutor:
+    def invoke(self, inputs):
+        raise AssertionError('the agent was called')
+
+
+def test_generator_serves_known_cities_without_the_agent(offline_clients, kb):
+    offline_clients(lambda clone: FailingExecutor())
+    generator = AITravelItineraryGenerator(cache=SemanticCache(max_entries=64), knowledge_base=kb)
+    hotels = generator.search_hotels('Lisbon, Portugal', '', '', 'medium')
+    assert [hotel.name for hotel in hotels] == ['Hotel 0', 'Hotel 1', 'Hotel 2']
+    assert generator.search_hotels_batch([{'location': 'Lisbon', 'budget': 'medium'}])[0] == hotels
+
+
+class CountingExecutor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def invoke(self, inputs):
+        self.calls.append(inputs['input'])
+        return {'output': "HOTEL NAME: Agent Hotel\nPRICE: $150/night\nRATING: 4\n"}
+
+
+def test_batch_caches_local_results_topped_up_by_the_agent(offline_clients, tmp_path):
+    calls = []
+    offline_clients(lambda clone: CountingExecutor(calls))
+    path = tmp_path / 'knowledge_base.json'
+    path.write_text(json.dumps({'cities': [{'city': 'Lisbon', 'hotels': CURATED['cities'][0]['hotels'][:2]}]}))
+    kb = LocalKnowledgeBase.load(str(tmp_path / 'missing.ts'), None, str(path))
+    generator = AITravelItineraryGenerator(cache=SemanticCache(max_entries=64), knowledge_base=kb)
+
+    hotels = generator.search_hotels_batch([{'location': 'Lisbon', 'budget': 'medium'}])[0]
+    assert [hotel.name for hotel in hotels] == ['Hotel 0', 'Hotel 1', 'Agent Hotel']
+    assert len(calls) == 1
+    assert generator.search_hotels_batch([{'location': 'Lisbon', 'budget': 'medium'}])[0] == hotels
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from model_routing import DEFAULT_ROUTES, HOTELS, ITINERARY, ModelRoute, load_routes
+
+
+def test_defaults_without_config(monkeypatch):
+    monkeypatch.delenv('MODEL_ROUTES', raising=False)
+    assert load_routes() == DEFAULT_ROUTES
+    assert load_routes('  ') == DEFAULT_ROUTES
+
+
+def test_inline_overrides_change_only_the_given_fields():
+    routes = load_routes('{"hotels": {"model": "gemini-2.0-flash-exp", "max_tokens": 1200}}')
+    assert routes[HOTELS] == ModelRoute('gemini-2.0-flash-exp', max_tokens=1200, temperature=0.1,
+                                        input_cost=DEFAULT_ROUTES[HOTELS].input_cost,
+                                        output_cost=DEFAULT_ROUTES[HOTELS].output_cost)
+    assert routes[ITINERARY] == DEFAULT_ROUTES[ITINERARY]
+    # The defaults themselves are untouched
+    assert DEFAULT_ROUTES[HOTELS].model == 'gemini-1.5-flash-8b'
+
+
+def test_overrides_from_a_file_and_the_environment(tmp_path, monkeypatch):
+    path = tmp_path / 'routes.json'
+    path.write_text(json.dumps({'itinerary': {'temperature': 0.4}}))
+    monkeypatch.setenv('MODEL_ROUTES', str(path))
+    assert load_routes()[ITINERARY].temperature == 0.4
+
+
+@pytest.mark.parametrize('config, message', [
+    ('{"flights": {"model": "x"}}', "Unknown model route 'flights'"),
+    ('{"hotels": {"model": "x", "top_p": 0.9}}', "Unknown fields for model route 'hotels': top_p"),
+])
+def test_unknown_routes_and_fields_are_rejected(config, message):
+    with pytest.raises(ValueError, match=message):
+        load_routes(config)
+
+
+def test_cost():
+    route = ModelRoute('model', max_tokens=100, input_cost=0.10, output_cost=0.40)
+    assert route.cost(1_000_000, 500_000) == pytest.approx(0.30)
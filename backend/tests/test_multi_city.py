@@ -0,0 +1,46 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from generator_pool import GeneratorPool
+
+
+@pytest.fixture
+def client(generator, monkeypatch):
+    monkeypatch.setattr(main, 'generator_pool', GeneratorPool(generator, size=1))
+    return TestClient(main.app)
+
+
+def leg(destination, start_date, end_date):
+    return {'destination': destination, 'start_date': start_date, 'end_date': end_date,
+            'selected_hotel': {'name': f"{destination} Hotel"}}
+
+
+def post(client, *legs):
+    return client.post('/api/generate-itinerary/multi-city', json={'budget': 'medium', 'legs': list(legs)})
+
+
+def test_consecutive_legs_share_the_travel_day(client):
+    response = post(client, leg('Lisbon', '2025-05-01', '2025-05-04'), leg('Porto', '2025-05-04', '2025-05-06'))
+    assert response.status_code == 200
+    itinerary = response.json()
+    assert itinerary['dates'] == '2025-05-01 to 2025-05-06'
+    assert [day['destination'] for day in itinerary['daily_schedule']] == ['Lisbon'] * 3 + ['Porto'] * 2
+    assert [day['day'] for day in itinerary['daily_schedule']] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('legs, problem', [
+    ([leg('Lisbon', '2025-05-01', 'next friday')], 'YYYY-MM-DD'),
+    ([leg('Lisbon', '2025-02-30', '2025-03-02')], 'YYYY-MM-DD'),
+    ([leg('Lisbon', '2025-05-04', '2025-05-01')], 'ends before it starts'),
+    ([leg('Lisbon', '2025-05-04', '2025-05-06'), leg('Porto', '2025-05-01', '2025-05-03')], 'date order'),
+    ([leg('Lisbon', '2025-05-01', '2025-05-05'), leg('Porto', '2025-05-03', '2025-05-07')], 'overlaps leg 1'),
+])
+def test_bad_leg_dates_are_rejected(client, legs, problem):
+    response = post(client, *legs)
+    assert response.status_code == 400
+    assert problem in response.json()['detail']
+
+
+def test_a_trip_needs_legs(client):
+    assert post(client).status_code == 400
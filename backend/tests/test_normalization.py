@@ -0,0 +1,61 @@
+import pytest
+
+from models import Activity
+from normalization import filter_and_sort, normalize_prices, parse_price, parse_rating
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$180/night', (180.0, 180.0, 'USD')),
+    ('€20-35', (20.0, 35.0, 'EUR')),
+    ('$20 to $35', (20.0, 35.0, 'USD')),
+    ('35-20 USD', (20.0, 35.0, 'USD')),
+    ('1,200 THB', (1200.0, 1200.0, 'THB')),
+    ('around 15 euros', (15.0, 15.0, 'EUR')),
+    ('Free', (0.0, 0.0, None)),
+    ('Free - $10 donation', (0.0, 10.0, 'USD')),
+    # A second amount that doesn't close a range is a different charge
+    ('$50 per person, $10 parking', (50.0, 50.0, 'USD')),
+    ('Varies', (None, None, None)),
+    ('', (None, None, None)),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('4.6/5 stars', 4.6),
+    ('8.7/10', 4.35),
+    ('4 out of 5', 4.0),
+    ('Superb 9.1', 4.55),
+    ('4.5', 4.5),
+    ('12', None),
+    ('0/0', None),
+    ('Excellent', None),
+    ('', None),
+])
+def test_parse_rating(text, expected):
+    assert parse_rating(text) == expected
+
+
+def priced(*prices):
+    return normalize_prices([Activity(name=price, price=price) for price in prices])
+
+
+def names(items):
+    return [item.name for item in items]
+
+
+def test_currency_filter_drops_unknown_currencies():
+    items = priced('€25', '$30', '40', 'About 15 per person', '25 EUR')
+    assert names(filter_and_sort(items, currency='eur')) == ['€25', '25 EUR']
+    assert names(filter_and_sort(items, currency='USD')) == ['$30']
+
+
+def test_free_items_fit_any_currency():
+    items = priced('Free', '€25', '$30')
+    assert names(filter_and_sort(items, currency='EUR')) == ['Free', '€25']
+
+
+def test_without_a_currency_filter_nothing_is_dropped():
+    items = priced('€25', '40', '')
+    assert names(filter_and_sort(items)) == ['€25', '40', '']
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from generator_pool import GeneratorPool
+from itinerary_store import ItineraryStore
+from models import Activity
+from travel_generator import AITravelItineraryGenerator
+
+
+def activities(*numbers):
+    return [Activity(name=f"Sight {n}", price='$10') for n in numbers]
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    searches = []
+
+    def search_activities(self, location, budget, duration, selected_hotel=None):
+        searches.append(duration)
+        return activities(*range(100, 100 + duration * 2))
+
+    monkeypatch.setattr(AITravelItineraryGenerator, 'search_activities', search_activities)
+    return searches
+
+
+@pytest.fixture
+def generator(searches, generator):
+    # The list cached when the two-day itinerary was generated
+    generator.cache.set('activities', 'Lisbon', activities(1, 2, 3, 4, 5, 6), budget='medium', count=4)
+    return generator
+
+
+def two_day_itinerary(generator):
+    return generator.generate_itinerary(
+        {'location': 'Lisbon', 'start_date': '2025-05-01', 'end_date': '2025-05-03', 'duration': 2, 'budget': 'medium'},
+        {'name': 'Hotel Avenida'}, activities(1, 2, 3, 4)
+    )
+
+
+def scheduled_names(itinerary, day):
+    return [a.name for a in itinerary.daily_schedule[day - 1].activities if a.type == 'activity']
+
+
+def test_extension_uses_the_cached_list_first(generator, searches):
+    patched = generator.patch_itinerary(two_day_itinerary(generator), [{'op': 'extend_dates', 'end_date': '2025-05-04'}])
+    assert patched.updated_days == [3]
+    assert scheduled_names(patched, 3) == ['Sight 5', 'Sight 6']
+    assert searches == []
+
+
+def test_extension_searches_only_for_the_shortfall(generator, searches):
+    edit = {'op': 'extend_dates', 'end_date': '2025-05-07', 'activities': activities(7)}
+    patched = generator.patch_itinerary(two_day_itinerary(generator), [edit])
+    # 8 needed for four new days: one supplied, two cached, five searched (rounded up to whole days)
+    assert searches == [3]
+    names = [name for day in (3, 4, 5, 6) for name in scheduled_names(patched, day)]
+    assert names[:3] == ['Sight 7', 'Sight 5', 'Sight 6']
+    assert len(names) == len(set(names)) == 8
+
+
+def test_patched_itinerary_is_stored_under_a_new_id(generator, tmp_path, monkeypatch):
+    store = ItineraryStore(str(tmp_path / 'itineraries.db'))
+    monkeypatch.setattr(main, 'generator_pool', GeneratorPool(generator, size=1))
+    monkeypatch.setattr(main, 'itinerary_store', store)
+    client = TestClient(main.app)
+
+    original = main.orjson.loads(main.orjson.dumps(two_day_itinerary(generator)))
+    original['id'] = 'original'
+    store.put('original', {'destination': 'Lisbon'}, original)
+
+    body = {'itinerary': original, 'edits': [{'op': 'extend_dates', 'end_date': '2025-05-04'}]}
+    patched = client.post('/api/itinerary/patch', json=body).json()
+    assert patched['id'] not in (None, 'original')
+    assert patched['duration'] == '3 days'
+
+    fetched = client.get(f"/api/itineraries/{patched['id']}").json()
+    assert fetched == patched
+    assert client.get('/api/itineraries/original').json()['duration'] == '2 days'
+    # The same patch of the same itinerary gets the same ID
+    assert client.post('/api/itinerary/patch', json=body).json()['id'] == patched['id']
+    store.close()
+
+
+@pytest.mark.parametrize('itinerary', [
+    {},
+    {'destination': 'Lisbon', 'dates': '2025-05-01 to 2025-05-03', 'duration': '2 days', 'budget': 'medium'},
+    {'destination': 'Lisbon', 'dates': '2025-05-01 to 2025-05-03', 'duration': '2 days', 'budget': 'medium',
+     'daily_schedule': [{'date': '2025-05-01'}]},
+])
+def test_malformed_itineraries_are_rejected(generator, monkeypatch, itinerary):
+    monkeypatch.setattr(main, 'generator_pool', GeneratorPool(generator, size=1))
+    response = TestClient(main.app).post('/api/itinerary/patch', json={'itinerary': itinerary, 'edits': []})
+    assert response.status_code == 422
+
+
+def test_unusable_itineraries_are_bad_requests(generator, monkeypatch):
+    monkeypatch.setattr(main, 'generator_pool', GeneratorPool(generator, size=1))
+    itinerary = {'destination': 'Lisbon', 'dates': 'early May', 'duration': '2 days', 'budget': 'medium',
+                 'daily_schedule': []}
+    body = {'itinerary': itinerary, 'edits': [{'op': 'extend_dates', 'end_date': '2025-05-04'}]}
+    assert TestClient(main.app).post('/api/itinerary/patch', json=body).status_code == 400
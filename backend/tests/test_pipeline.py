@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+from langchain.tools import Tool
+from langchain_community.chat_models.fake import FakeListChatModel
+
+from pipeline import SearchExtractPipeline, default_searches
+from travel_generator import AITravelItineraryGenerator
+
+HOTELS = "HOTEL NAME: Hotel Avenida\nPRICE: $150/night\nRATING: 4.5\n"
+
+
+class RecordingLLM:
+    """Returns a canned answer, recording every prompt"""
+
+    def __init__(self, answer=HOTELS):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return FakeListChatModel(responses=[self.answer]).invoke(prompt)
+
+
+@pytest.fixture
+def queries():
+    return []
+
+
+@pytest.fixture
+def search_tool(queries):
+    lock = threading.Lock()
+
+    def search(query):
+        with lock:
+            queries.append(query)
+        if 'broken' in query:
+            raise RuntimeError('502 Bad Gateway')
+        return [{'url': f"https://example.com/{len(query)}", 'content': f"Results for {query} with rooms from $150 per night."}]
+    return Tool(name='search', description='web search', func=search)
+
+
+def test_searches_run_directly_and_the_llm_once(search_tool, queries):
+    llm = RecordingLLM()
+    pipeline = SearchExtractPipeline(llm, search_tool)
+    result = pipeline.invoke({'input': 'Find 3 hotels in Lisbon', 'searches': ['hotels in Lisbon', 'Lisbon prices']})
+    assert result == {'output': HOTELS}
+    assert sorted(queries) == ['Lisbon prices', 'hotels in Lisbon']
+    assert len(llm.prompts) == 1
+    assert 'Results for hotels in Lisbon' in llm.prompts[0] and 'Results for Lisbon prices' in llm.prompts[0]
+    assert pipeline.stats() == {'llm_calls': 1, 'search_calls': 2}
+
+
+def test_no_searches_means_a_plain_llm_call(search_tool, queries):
+    llm = RecordingLLM('Day 1: arrive')
+    assert SearchExtractPipeline(llm, search_tool).invoke({'input': 'Plan a day', 'searches': []}) == {'output': 'Day 1: arrive'}
+    assert queries == []
+    assert 'Search results' not in llm.prompts[0]
+
+
+def test_missing_searches_fall_back_to_the_first_line(search_tool, queries):
+    SearchExtractPipeline(RecordingLLM(), search_tool).invoke({'input': '\n  Find hotels in Porto.\n  Return ONLY:'})
+    assert queries == ['Find hotels in Porto']
+    assert default_searches('') == []
+
+
+def test_partly_failed_searches_still_extract(search_tool):
+    llm = RecordingLLM()
+    pipeline = SearchExtractPipeline(llm, search_tool)
+    assert pipeline.invoke({'input': 'Find hotels', 'searches': ['broken search', 'hotels in Porto']})['output'] == HOTELS
+    assert 'Results for hotels in Porto' in llm.prompts[0]
+
+
+def test_stream_yields_the_extraction_text(search_tool):
+    llm = FakeListChatModel(responses=[HOTELS])
+    chunks = list(SearchExtractPipeline(llm, search_tool).stream({'input': 'Find hotels', 'searches': ['hotels in Porto']}))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == HOTELS
+
+
+def test_pipeline_mode_replaces_the_agent_on_every_route(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test')
+    monkeypatch.setenv('TAVILY_API_KEY', 'test')
+    generator = AITravelItineraryGenerator(mode='pipeline')
+    assert set(generator.executors) == set(generator.routes)
+    for task, executor in generator.executors.items():
+        assert isinstance(executor, SearchExtractPipeline)
+        assert executor.llm is generator.llms[task]
+        assert executor.search_tool is generator.search_tool
+    assert generator.clone().executor('hotels') is not generator.executor('hotels')
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import threading
+import time
+
+from prefetch import PrefetchScheduler, RateLimiter
+
+
+class UncachedGenerator:
+    def __init__(self):
+        self.searches = []
+
+    def has_cached_hotels(self, destination, budget):
+        return False
+
+    def has_cached_activities(self, destination, budget, days):
+        return False
+
+    def search_hotels(self, destination, checkin, checkout, budget):
+        self.searches.append((time.monotonic(), destination, budget))
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, kind, payload, priority=0, dedupe_key=None):
+        self.submitted.append(dedupe_key)
+
+
+def scheduler(tmp_path, per_minute, jobs=None):
+    hotlist = tmp_path / 'hotlist.json'
+    hotlist.write_text(json.dumps({
+        'destinations': ['Lisbon', 'Porto'], 'budgets': ['low'], 'activity_days': [],
+        'max_requests_per_minute': per_minute,
+    }))
+    return PrefetchScheduler(UncachedGenerator(), str(hotlist), jobs=jobs)
+
+
+def test_limiter_spaces_callers_across_threads():
+    limiter = RateLimiter(max_per_minute=1200)
+    times = []
+    threads = [threading.Thread(target=lambda: (limiter.acquire(), times.append(time.monotonic()))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
+
+
+def test_queueing_is_not_rate_limited(tmp_path):
+    jobs = RecordingQueue()
+    prefetch = scheduler(tmp_path, per_minute=1, jobs=jobs)
+    start = time.monotonic()
+    assert asyncio.run(prefetch.run_once()) == 2
+    assert time.monotonic() - start < 1
+    assert len(jobs.submitted) == 2
+    assert prefetch.generator.searches == []
+
+
+def test_searches_are_rate_limited(tmp_path):
+    prefetch = scheduler(tmp_path, per_minute=1200)
+    assert asyncio.run(prefetch.run_once()) == 2
+    (first, *_), (second, *_) = prefetch.generator.searches
+    assert second - first >= 0.045
@@ -0,0 +1,38 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+ROUTES = [('post', '/admin/profile/start?seconds=0.05'), ('post', '/admin/profile/stop'), ('get', '/admin/profile')]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_ENABLED', True)
+    monkeypatch.setattr(main, 'ADMIN_TOKEN', 'secret')
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize('method, url', ROUTES)
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'guess'}])
+def test_profiler_endpoints_need_the_admin_token(client, method, url, headers):
+    assert getattr(client, method)(url, headers=headers).status_code == 401
+
+
+@pytest.mark.parametrize('method, url', ROUTES)
+def test_profiler_endpoints_are_closed_without_a_configured_token(client, monkeypatch, method, url):
+    monkeypatch.setattr(main, 'ADMIN_TOKEN', '')
+    assert getattr(client, method)(url, headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_profiler_endpoints_are_hidden_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(main, 'PROFILER_ENABLED', False)
+    assert client.get('/admin/profile', headers={'X-Admin-Token': 'secret'}).status_code == 404
+
+
+def test_admin_can_profile(client):
+    headers = {'X-Admin-Token': 'secret'}
+    started = client.post('/admin/profile/start?seconds=0.05', headers=headers)
+    assert started.status_code == 200
+    assert client.post('/admin/profile/stop', headers=headers).json()['running'] is False
+    assert client.get('/admin/profile', headers=headers).status_code == 200
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from destination_store import DestinationStore, write_destination_store
+from recommender import Recommender, TOP_K_BLOCK, top_k
+
+CITIES = [
+    {'city': 'Lisbon', 'country': 'Portugal', 'region': 'Europe', 'rating': 4.6, 'expense': 'mid', 'best_time': 'March - May'},
+    {'city': 'Paris', 'country': 'France', 'region': 'Europe', 'rating': 4.8, 'expense': 'premium', 'best_time': 'April - June'},
+    {'city': 'Krakow', 'country': 'Poland', 'region': 'Europe', 'rating': 4.4, 'expense': 'budget', 'best_time': 'May - September'},
+    {'city': 'Kyoto', 'country': 'Japan', 'region': 'Asia', 'rating': 4.9, 'expense': 'premium', 'best_time': 'November'},
+    {'city': 'Hanoi', 'country': 'Vietnam', 'region': 'Asia', 'rating': 4.3, 'expense': 'budget', 'best_time': 'October - April'},
+    {'city': 'Lima', 'country': 'Peru', 'region': 'Americas', 'rating': 4.2, 'expense': 'mid', 'best_time': ''},
+]
+ACTIVITIES = [
+    {'city': 'Krakow', 'type': 'nightlife'},
+    {'city': 'Kyoto', 'type': 'culture'},
+]
+
+
+def names(cities):
+    return [city['city'] for city in cities]
+
+
+@pytest.mark.parametrize('n, k', [(10, 3), (10, 20), (TOP_K_BLOCK * 40, 5), (TOP_K_BLOCK * 40 + 7, 1)])
+def test_top_k_matches_a_full_sort(n, k):
+    score = np.random.default_rng(n).random(n).astype(np.float32)
+    score[::97] = score[0]  # ties keep index order
+    expected = np.argsort(-score, kind='stable')[:k]
+    assert top_k(score, k).tolist() == expected.tolist()
+
+
+def test_region_filter_and_limit():
+    recommender = Recommender(CITIES, ACTIVITIES)
+    europe = recommender.recommend(region='Europe', limit=2, month=5)
+    assert names(europe) == ['Paris', 'Lisbon']
+    assert {city['region'] for city in recommender.recommend(region='Asia', limit=10)} == {'Asia'}
+    assert recommender.recommend(region='Oceania') == []
+    assert len(recommender.recommend(limit=100)) == len(CITIES)
+
+
+def test_expense_season_and_interests_shift_the_ranking():
+    recommender = Recommender(CITIES, ACTIVITIES)
+    assert names(recommender.recommend(region='Europe', limit=1, month=5)) == ['Paris']
+    assert names(recommender.recommend(region='Europe', expense='budget', limit=1, month=5)) == ['Krakow']
+    assert names(recommender.recommend(region='Asia', limit=1, month=11)) == ['Kyoto']
+    assert names(recommender.recommend(region='Asia', limit=1, month=1)) == ['Hanoi']
+    nightlife = recommender.recommend(region='Europe', limit=1, month=4, interests=['nightlife'])
+    assert names(nightlife) == ['Krakow']
+
+
+def test_load_adds_catalog_destinations(tmp_path):
+    path = str(tmp_path / 'destinations.gtcol')
+    write_destination_store([
+        {'id': '1', 'name': 'Lisbon', 'country': 'Portugal', 'region': 'Europe', 'price_range': 'medium',
+         'best_time': 'March - May', 'highlights': ['Alfama']},
+        {'id': '2', 'name': 'Bergen', 'country': 'Norway', 'region': 'Europe', 'price_range': 'high',
+         'best_time': 'June - August', 'image_url': 'https://example.com/bergen.jpg'},
+    ], path)
+    store = DestinationStore(path)
+    try:
+        recommender = Recommender.load(city_meta_path=str(tmp_path / 'missing.ts'), destination_store=store)
+    finally:
+        store.close()
+    assert sorted(names(recommender.cities)) == ['Bergen', 'Lisbon']
+    bergen = recommender.recommend(region='Europe', expense='premium', limit=1, month=7)[0]
+    assert bergen == {'city': 'Bergen', 'country': 'Norway', 'region': 'Europe', 'subregion': 'Europe',
+                      'rating': 4.0, 'expense': 'premium', 'image': 'https://example.com/bergen.jpg'}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'recommender', Recommender(CITIES, ACTIVITIES))
+    return TestClient(main.app)
+
+
+def test_recommend_endpoint(client):
+    response = client.get('/recommend', params={'region': 'Europe', 'limit': 2, 'month': 5})
+    assert response.status_code == 200
+    assert names(response.json()) == ['Paris', 'Lisbon']
+    everything = client.get('/recommend', params={'limit': 3, 'interests': 'culture, food'}).json()
+    assert len(everything) == 3
+
+
+@pytest.mark.parametrize('params', [{'region': 'Atlantis'}, {'expense': 'cheap'}, {'interests': 'shopping'}])
+def test_recommend_rejects_unknown_filters(client, params):
+    assert client.get('/recommend', params=params).status_code == 400
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import responses
+from responses import FastJSONResponse, choose_encoding, parse_accept_encoding, precompress
+
+BIG = {'activities': [{'name': f"Activity {i}", 'price': '$20'} for i in range(200)]}
+
+
+@dataclass
+class Place:
+    name: str
+    rating: float
+
+
+@pytest.fixture
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    # Compressed once, as when the payload is stored
+    stored_body = orjson.dumps(BIG)
+    stored_encoded = precompress(stored_body)
+
+    @app.get('/big')
+    def big():
+        return FastJSONResponse(BIG)
+
+    @app.get('/small')
+    def small():
+        return FastJSONResponse({'ok': True})
+
+    @app.get('/raw')
+    def raw():
+        return FastJSONResponse.from_raw(orjson.dumps(BIG).decode('utf-8'))
+
+    @app.get('/stored')
+    def stored():
+        return FastJSONResponse.from_raw(stored_body.decode('utf-8'), stored_encoded)
+
+    @app.get('/model')
+    def model():
+        return FastJSONResponse([Place('Alfama', 4.5)])
+
+    return TestClient(app)
+
+
+def test_parse_accept_encoding_orders_by_quality():
+    assert parse_accept_encoding('gzip;q=0.5, br, identity;q=0') == ('br', 'gzip')
+    assert parse_accept_encoding('deflate, gzip;q=bad') == ('deflate',)
+    assert parse_accept_encoding('') == ()
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('*', 'gzip'),
+    ('identity', None),
+    ('gzip;q=0', None),
+    ('', None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, 'brotli', None)
+    assert choose_encoding('br, gzip;q=0.8') == 'gzip'
+    assert choose_encoding('br') is None
+
+
+def test_large_bodies_are_compressed_for_clients_that_accept_it(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert response.json() == BIG
+
+
+def test_uncompressed_without_accept_encoding(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+    assert int(response.headers['content-length']) == len(orjson.dumps(BIG))
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers
+    assert response.json() == {'ok': True}
+
+
+def test_raw_payloads_are_sent_as_is(client):
+    response = client.get('/raw', headers={'Accept-Encoding': 'identity'})
+    assert response.content == orjson.dumps(BIG)
+    compressed = client.get('/raw', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['content-encoding'] == 'gzip'
+    assert compressed.content == orjson.dumps(BIG)
+
+
+def test_dataclasses_serialize(client):
+    assert client.get('/model').json() == [{'name': 'Alfama', 'rating': 4.5}]
+
+
+def test_stored_payloads_are_not_compressed_again(client, monkeypatch):
+    def compress(body, encoding):
+        raise AssertionError('compressed per request')
+
+    monkeypatch.setattr(responses, 'compress', compress)
+    response = client.get('/stored', headers={'Accept-Encoding': 'br, gzip;q=0.5'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.json() == BIG
+    assert client.get('/stored', headers={'Accept-Encoding': 'identity'}).content == orjson.dumps(BIG)
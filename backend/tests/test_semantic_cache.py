@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from semantic_cache import SemanticCache, normalize_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("NYC", "new york city"),
+    ("  LA ", "los angeles"),
+    ("Washington, D.C.", "washington dc"),
+    ("La Paz", "la paz"),
+    ("Rio Grande", "rio grande"),
+    ("LA CA", "la ca"),
+    ("Sydney, US", "sydney us"),
+])
+def test_aliases_only_replace_whole_query(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_alias_hits_cache():
+    cache = SemanticCache(max_entries=16)
+    cache.set('hotels', 'New York City', ['h'], budget='medium')
+    assert cache.get('hotels', 'NYC', budget='mid-range') == ['h']
+
+
+@pytest.mark.parametrize("query", ["La Paz", "LA CA", "Lagos"])
+def test_names_containing_aliases_miss(query):
+    cache = SemanticCache(max_entries=16)
+    cache.set('hotels', 'Los Angeles CA', ['la'], budget='medium')
+    cache.set('hotels', 'Los Angeles', ['la'], budget='medium')
+    assert cache.get('hotels', query, budget='medium') is None
+
+
+def test_threshold():
+    cache = SemanticCache(max_entries=16, threshold=0.88)
+    cache.set('activities', 'Paris France', ['p'], budget='low')
+    assert cache.get('activities', 'paris, france!', budget='low') == ['p']
+    assert cache.get('activities', 'Perth Australia', budget='low') is None
+    assert SemanticCache(max_entries=16, threshold=1.01).get('activities', 'Paris France', budget='low') is None
+
+
+def test_partitions_match_exactly():
+    cache = SemanticCache(max_entries=16)
+    cache.set('activities', 'Rome', ['r'], budget='low', count=5)
+    assert cache.get('activities', 'Rome', budget='low', count=6) is None
+    assert cache.get('hotels', 'Rome', budget='low', count=5) is None
+
+
+def test_lookups_do_not_create_partitions():
+    cache = SemanticCache(max_entries=16)
+    for i in range(50):
+        assert cache.get('hotels', 'Rome', budget=f'tier{i}') is None
+        assert not cache.contains('hotels', 'Rome', budget=f'tier{i}')
+        assert cache.get_stale('hotels', 'Rome', budget=f'tier{i}') is None
+    assert cache.stats()['partitions'] == 0
+
+
+def test_partition_cap_evicts_least_recent():
+    cache = SemanticCache(max_entries=16, max_partitions=2)
+    cache.set('hotels', 'Rome', 1, budget='low')
+    cache.set('hotels', 'Oslo', 2, budget='medium')
+    cache.set('hotels', 'Rome', 1, budget='low')  # low is now the most recent
+    cache.set('hotels', 'Lima', 3, budget='high')
+    assert cache.stats()['partitions'] == 2
+    assert cache.get('hotels', 'Oslo', budget='medium') is None
+    assert cache.get('hotels', 'Rome', budget='low') == 1
+    assert cache.get('hotels', 'Lima', budget='high') == 3
+
+
+def test_empty_partitions_are_dropped():
+    cache = SemanticCache(max_entries=2)
+    cache.set('hotels', 'Rome', 1, budget='low')
+    cache.set('hotels', 'Oslo', 2, budget='medium')
+    cache.set('hotels', 'Lima', 3, budget='high')
+    assert len(cache) == 2
+    assert cache.stats()['partitions'] == 2
+
+
+def test_reset_moves_entry_to_newest():
+    cache = SemanticCache(max_entries=2)
+    cache.set('hotels', 'Rome', 1, budget='low')
+    cache.set('hotels', 'Oslo', 2, budget='low')
+    cache.set('hotels', 'Rome', 10, budget='low')
+    cache.set('hotels', 'Lima', 3, budget='low')
+    assert cache.get('hotels', 'Rome', budget='low') == 10
+    assert cache.get('hotels', 'Oslo', budget='low') is None
+    assert len(cache) == 2
+
+
+def test_eviction_of_own_partition():
+    cache = SemanticCache(max_entries=1)
+    cache.set('hotels', 'Rome', 1, budget='low')
+    cache.set('hotels', 'Oslo', 2, budget='low')
+    assert cache.get('hotels', 'Oslo', budget='low') == 2
+    assert cache.get('hotels', 'Rome', budget='low') is None
+    assert cache.stats()['partitions'] == 1
+
+
+def test_stale_window():
+    cache = SemanticCache(max_entries=4, ttl_seconds=0.05, stale_seconds=10)
+    cache.set('hotels', 'Rome', ['r'], budget='low')
+    assert cache.get_stale('hotels', 'Rome', budget='low') is None
+    time.sleep(0.06)
+    assert cache.get('hotels', 'Rome', budget='low') is None
+    assert cache.get_stale('hotels', 'Rome', budget='low') == ['r']
+
+
+def test_returns_copies():
+    cache = SemanticCache(max_entries=4)
+    cache.set('hotels', 'Rome', [{'name': 'a'}], budget='low')
+    cache.get('hotels', 'Rome', budget='low')[0]['name'] = 'b'
+    assert cache.get('hotels', 'Rome', budget='low') == [{'name': 'a'}]
@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+import threading
+
+import pytest
+from langchain_community.chat_models.fake import FakeListChatModel
+
+from circuit_breaker import CircuitBreakerHandler
+from generator_pool import GeneratorPool
+from speculation import SpeculativeSlots
+from travel_generator import CancellationHandler, SearchCancelled
+
+
+def test_expired_slots_cancel_their_work():
+    stopped = threading.Event()
+
+    def work(cancel):
+        if cancel.wait(2):
+            stopped.set()
+
+    async def run():
+        slots = SpeculativeSlots(timeout_seconds=0.05)
+        slots.start('key', work)
+        await asyncio.sleep(0.2)
+        return slots.stats()
+
+    stats = asyncio.run(run())
+    assert stopped.is_set()
+    assert stats['expired'] == 1
+
+
+def test_claimed_slots_run_to_completion():
+    def work(value, cancel):
+        return value, cancel.wait(0.05)
+
+    async def run():
+        slots = SpeculativeSlots(timeout_seconds=0.01)
+        slots.start('key', work, 'result')
+        return await slots.take('key')
+
+    assert asyncio.run(run()) == ('result', False)
+
+
+class CountingExecutor:
+    def __init__(self, calls, cancel=None):
+        self.calls = calls
+        self.cancel = cancel
+
+    def invoke(self, inputs):
+        number = next(self.calls)
+        if self.cancel is not None:
+            self.cancel.set()
+        return {'output': f"ACTIVITY NAME: Sight {number}\nPRICE: $30\n"}
+
+
+def test_cancelled_speculation_makes_no_agent_calls(offline_clients, generator):
+    calls = itertools.count()
+    offline_clients(lambda clone: CountingExecutor(calls))
+    cancel = threading.Event()
+    cancel.set()
+    activities = GeneratorPool(generator, size=1).call_unpooled('search_activities', 'Oslo', 'medium', 2, None, cancel=cancel)
+    assert next(calls) == 0
+    assert activities  # the cancelled search gives placeholders, which nobody claims
+
+
+def test_top_up_stops_between_rounds(offline_clients, generator):
+    calls = itertools.count()
+    cancel = threading.Event()
+    offline_clients(lambda clone: CountingExecutor(calls, cancel))
+    generator.cancel_event = cancel
+    with pytest.raises(SearchCancelled):
+        # Two pages of four, each returning one activity: without the cancel a second round would run
+        generator._top_up('activities', 'Oslo', 'medium', 8, [])
+    assert next(calls) <= 2
+
+
+def test_cancelled_agent_steps_stop_before_the_llm(generator):
+    breaker_handler = CircuitBreakerHandler(generator.breakers['gemini'])
+    llm = FakeListChatModel(responses=['Final Answer: done'], callbacks=[CancellationHandler(generator), breaker_handler])
+    generator.cancel_event = threading.Event()
+    assert llm.invoke('step one').content == 'Final Answer: done'
+
+    generator.cancel_event.set()
+    with pytest.raises(SearchCancelled):
+        llm.invoke('step two')
+    assert breaker_handler._started == {}
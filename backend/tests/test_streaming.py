@@ -0,0 +1,106 @@
+import random
+
+import pytest
+from langchain.tools import Tool
+from langchain_community.chat_models.fake import FakeListChatModel
+
+from circuit_breaker import CircuitBreakerHandler, CLOSED
+from metrics import track_tokens
+from pipeline import SearchExtractPipeline
+from streaming import ACTIVITY_MARKER, HOTEL_MARKER, RecordStreamParser
+from travel_generator import TokenAccountingHandler
+
+HOTELS = "".join(f"HOTEL NAME: Hotel {i}\nPRICE: $150/night\nRATING: 4\n\n" for i in range(6))
+
+COMPLETIONS = {
+    HOTEL_MARKER: (
+        "Here are the hotels I found:\n\n"
+        "HOTEL NAME: Hotel Avenida\nPRICE: $150/night\nRATING: 4.5/5\nDESCRIPTION: Near Rossio,\nwith a rooftop\n\n"
+        "HOTEL NAME: Casa HOTEL NAME Lisboa\nLOCATION: Alfama\nPRICE: €90\n"
+        "HOTEL NAME:\nMemmo Principe Real\nRATING: 9.1\n"
+    ),
+    ACTIVITY_MARKER: (
+        "ACTIVITY NAME: Tram 28\nPRICE: €3\nHOURS: 7am-11pm\n"
+        "ACTIVITY NAME: Belém Tower\nPRICE: $10\nDISTANCE: 6 km\nTRANSPORT: Tram 15\n"
+    ),
+}
+
+
+def buffered_parse(generator, marker):
+    return generator._parse_structured_hotels if marker == HOTEL_MARKER else generator._parse_structured_activities
+
+
+def chunked(text, rng):
+    chunks, start = [], 0
+    while start < len(text):
+        size = rng.choice([1, 2, 3, 5, 8, 13, 40])
+        chunks.append(text[start:start + size])
+        start += size
+    return chunks
+
+
+@pytest.mark.parametrize('marker', [HOTEL_MARKER, ACTIVITY_MARKER])
+def test_stream_parser_matches_the_buffered_parser(generator, marker):
+    parse = buffered_parse(generator, marker)
+    text = COMPLETIONS[marker]
+    rng = random.Random(11)
+    for _ in range(50):
+        parser = RecordStreamParser(marker, parse)
+        records = []
+        for chunk in chunked(text, rng):
+            records.extend(parser.feed(chunk))
+        records.extend(parser.close())
+        assert records == parse(text)
+        assert parser.records == len(records)
+
+
+def test_records_are_released_once_the_next_marker_arrives(generator):
+    parser = RecordStreamParser(HOTEL_MARKER, generator._parse_structured_hotels)
+    assert parser.feed("Intro text\nHOTEL NAME: Hotel A\nPRICE: $150\n") == []
+    assert parser.feed("HOTEL NA") == []
+    [hotel] = parser.feed("ME: Hotel B\n")
+    assert (hotel.name, hotel.price) == ('Hotel A', '$150')
+    assert [hotel.name for hotel in parser.close()] == ['Hotel B']
+
+
+def test_completions_without_records_give_nothing(generator):
+    parser = RecordStreamParser(HOTEL_MARKER, generator._parse_structured_hotels)
+    assert parser.feed("I could not find any hotels matching ") == []
+    assert parser.feed("that budget.") == []
+    assert parser.close() == []
+    assert parser.records == 0
+
+
+def streaming_llm(generator, response):
+    llm = FakeListChatModel(responses=[response], callbacks=[
+        CircuitBreakerHandler(generator.breakers['gemini']), TokenAccountingHandler('hotels'),
+    ])
+    search_tool = Tool(name='search', description='web search', func=lambda query: f"Hotels for {query}")
+    generator.llms = {'hotels': llm}
+    generator.executors = {'hotels': SearchExtractPipeline(llm, search_tool)}
+    generator.search_tool = search_tool
+
+
+def test_streams_stopped_early_keep_the_breaker_closed(generator):
+    streaming_llm(generator, HOTELS)
+    breaker = generator.breakers['gemini']
+
+    for trip in range(breaker.failure_threshold + 1):
+        with track_tokens() as usage:
+            hotels = list(generator.stream_hotels(f"City {trip}", '', '', 'medium'))
+        assert [hotel.name for hotel in hotels] == ['Hotel 0', 'Hotel 1', 'Hotel 2']
+        # Tokens generated before the stream was closed are still accounted
+        assert usage.llm_calls == 1
+        assert usage.completion_tokens > 0
+
+    assert breaker.stats() == {'state': CLOSED, 'consecutive_failures': 0, 'rejected': 0}
+
+
+def test_stream_errors_still_count_as_failures(generator):
+    streaming_llm(generator, HOTELS)
+    breaker = generator.breakers['gemini']
+    handler = generator.llms['hotels'].callbacks[0]
+
+    handler.on_llm_start({}, ['prompt'], run_id='run')
+    handler.on_llm_error(RuntimeError('503'), run_id='run')
+    assert breaker.stats()['consecutive_failures'] == 1
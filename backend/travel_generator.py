@@ -6,27 +6,221 @@ comprehensive travel itineraries based on real-time web data.
 """
 
 import os
+import copy
+import time
+import threading
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.agents import create_react_agent, AgentExecutor
+from langchain.tools import Tool
+from langchain_core.tools import ToolException
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain.prompts import PromptTemplate
 from langchain.schema import AgentAction, AgentFinish
+from semantic_cache import SemanticCache, normalize_text, normalize_budget
+from models import Hotel, Activity, DayPlan, Itinerary
+from knowledge_base import LocalKnowledgeBase
+from pipeline import SearchExtractPipeline
+from generator_pool import DEFAULT_POOL_SIZE
+from compaction import compacting_search
+from streaming import RecordStreamParser, HOTEL_MARKER, ACTIVITY_MARKER
+from circuit_breaker import CircuitBreaker, CircuitBreakerHandler, CircuitOpenError, stopped_early
+from metrics import estimate_tokens, propagate, record_llm_call, registry
+from model_routing import ModelRoute, load_routes, HOTELS, ACTIVITIES, ITINERARY
+from normalization import (
+    normalize_hotels, normalize_prices, split_by_budget, HOTEL_BUDGET_TIERS, ACTIVITY_BUDGET_TIERS
+)
 import warnings
 warnings.filterwarnings("ignore")
 
+# 'agent' runs the ReAct loop; 'pipeline' searches directly and makes one LLM extraction call
+GENERATOR_MODE = os.getenv('GENERATOR_MODE', 'agent').lower()
+
+# Cities sharing one agent prompt in batched hotel searches
+HOTEL_BATCH_SIZE = int(os.getenv('HOTEL_BATCH_SIZE', '4'))
+
+# Price limits quoted to the agent in top-up searches, per budget tier
+HOTEL_BUDGET_LABELS = {'low': 'under $100/night', 'medium': '$100-300/night', 'high': '$300+/night'}
+ACTIVITY_BUDGET_LABELS = {'low': 'free or under $20', 'medium': 'under $100', 'high': 'any price'}
+
+# Top-up searches for results still missing: results per concurrent search, and rounds
+TOP_UP_PAGE_SIZE = int(os.getenv('TOP_UP_PAGE_SIZE', '4'))
+TOP_UP_ROUNDS = int(os.getenv('TOP_UP_ROUNDS', '2'))
+
+# Rotated across concurrent activity top-up searches so each page finds different places
+ACTIVITY_FOCUSES = [
+    'landmarks and attractions',
+    'museums and galleries',
+    'parks and outdoor activities',
+    'food, markets and local specialties',
+    'neighborhoods and walking tours',
+    'day trips and unique experiences',
+]
+
+# The same for hotel top-up pages, varying the area and kind of hotel searched
+HOTEL_FOCUSES = [
+    'the city center',
+    'boutique and independent hotels',
+    'areas near public transport',
+    'quieter residential neighborhoods',
+    'the historic old town',
+    'the best-reviewed options for the price',
+]
+
+# Upstream calls slower than this count as failures towards opening their circuit breaker
+LLM_SLOW_CALL_SECONDS = float(os.getenv('LLM_SLOW_CALL_SECONDS', '30'))
+SEARCH_SLOW_CALL_SECONDS = float(os.getenv('SEARCH_SLOW_CALL_SECONDS', '10'))
+
+# Background workers re-fetching stale cache entries that were just served
+REFRESH_WORKERS = int(os.getenv('CACHE_REFRESH_WORKERS', '2'))
+
 # Load environment variables from .env file
 load_dotenv()
 
+
+class TokenAccountingHandler(BaseCallbackHandler):
+    """Records tokens, latency and cost of every LLM call on a route in metrics
+    
+    Uses the provider's reported usage when there is one, otherwise estimates
+    from the prompt and generated text.
+    """
+    
+    def __init__(self, route_name: str = 'default', route: Optional[ModelRoute] = None):
+        self.route_name = route_name
+        self.route = route
+        self._started = {}
+    
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self._started[run_id] = (time.perf_counter(), sum(estimate_tokens(prompt) for prompt in prompts))
+    
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        started, prompt_tokens = self._started.pop(run_id, (None, 0))
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        prompt_tokens = usage.get('prompt_tokens', prompt_tokens)
+        completion_tokens = usage.get('completion_tokens') or sum(
+            estimate_tokens(generation.text) for generations in response.generations for generation in generations
+        )
+        record_llm_call(
+            prompt_tokens, completion_tokens, route=self.route_name,
+            seconds=time.perf_counter() - started if started is not None else None,
+            cost=self.route.cost(prompt_tokens, completion_tokens) if self.route else 0.0
+        )
+    
+    def on_llm_error(self, error, *, run_id=None, response=None, **kwargs):
+        if stopped_early(error) and response is not None and response.generations:
+            # A stream closed once it had produced enough still spent what it generated
+            self.on_llm_end(response, run_id=run_id)
+        else:
+            self._started.pop(run_id, None)
+
+class SearchCancelled(RuntimeError):
+    """The work a generator was doing was cancelled (e.g. an unclaimed speculative search)"""
+
+
+class CancellationHandler(BaseCallbackHandler):
+    """Stops a cancelled generator's agent run before its next LLM step
+    
+    Listed ahead of the breaker handler, so a cancelled step never claims a
+    breaker call it won't report back.
+    """
+    
+    raise_error = True
+    
+    def __init__(self, generator: 'AITravelItineraryGenerator'):
+        self.generator = generator
+    
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.generator._check_cancelled()
+
 class AITravelItineraryGenerator:
-    def __init__(self):
+    def __init__(self, cache: Optional[SemanticCache] = None, knowledge_base: Optional[LocalKnowledgeBase] = None,
+                 mode: str = GENERATOR_MODE):
         """Initialize the AI-powered travel itinerary generator"""
+        # Near-duplicate searches ("NYC" / "New York City") are served from here
+        self.cache = cache if cache is not None else SemanticCache()
+        # Known hotels/activities per city, consulted before the agent
+        self.knowledge_base = knowledge_base
+        self.mode = mode
+        # Stale cache entries being re-fetched in the background, by cache key
+        self._refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
         self.setup_environment()
+        # One model per task route (see model_routing.py): small fast model for
+        # hotel/activity extraction, the stronger one for itinerary planning
+        self.routes = load_routes()
+        print("✅ Model routes: " + ", ".join(f"{task} -> {route.model} ({route.max_tokens} tokens)"
+                                             for task, route in self.routes.items()))
+        # Degraded upstreams fail fast instead of holding every request for the full timeout
+        self.breakers = {
+            'gemini': CircuitBreaker('gemini', slow_call_seconds=LLM_SLOW_CALL_SECONDS),
+            'tavily': CircuitBreaker('tavily', slow_call_seconds=SEARCH_SLOW_CALL_SECONDS),
+        }
+        # Set on a clone doing cancellable work; checked before every agent step and top-up round
+        self.cancel_event: Optional[threading.Event] = None
+        # Agent/LLM runs in flight across this generator and all its clones (see limit_upstream)
+        self._upstream = threading.BoundedSemaphore(DEFAULT_POOL_SIZE)
+        self.setup_clients()
+        if mode == 'pipeline':
+            print("✅ Search-then-extract pipeline ready")
+    
+    def limit_upstream(self, runs: int):
+        """Cap concurrent agent/LLM runs, shared with clones made from now on
+        
+        Fan-out pages, batch groups, stale refreshes and speculative searches
+        run on clones outside the generator pool; this keeps their upstream
+        calls within the same limit as pooled requests.
+        """
+        self._upstream = threading.BoundedSemaphore(max(runs, 1))
+    
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchCancelled("Search cancelled")
+    
+    @contextmanager
+    def _upstream_slot(self):
+        start = time.perf_counter()
+        self._upstream.acquire()
+        registry.observe('upstream_slot_wait_seconds', time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._upstream.release()
+    
+    def setup_clients(self):
+        """Build this instance's LLM clients, tools and executors"""
         self.setup_llm_and_tools()
-        self.setup_agent()
+        if self.mode == 'pipeline':
+            self.setup_pipeline()
+        else:
+            self.setup_agent()
+    
+    def clone(self) -> 'AITravelItineraryGenerator':
+        """Another generator with its own LLM clients, tools and executors
+        
+        The cache, knowledge base, circuit breakers and stale-entry refresher
+        are shared, so every clone sees the same cached results and upstream
+        health. See generator_pool.py.
+        """
+        twin = copy.copy(self)
+        twin.setup_clients()
+        return twin
+    
+    def _on_clone(self, method: str, *args) -> Any:
+        """Run one of the generator's methods on a fresh clone
+        
+        Used for work running beside the caller (fan-out threads, background
+        refreshes), so a generator checked out of the pool is only ever used
+        by the thread that checked it out. Cloning costs about a millisecond.
+        """
+        return getattr(self.clone(), method)(*args)
     
     def setup_environment(self):
         """Setup API keys from .env file"""
@@ -43,23 +237,57 @@ class AITravelItineraryGenerator:
         print("✅ API keys loaded successfully from .env file")
     
     def setup_llm_and_tools(self):
-        """Initialize LLM and tools"""
-        # Initialize Google Gemini LLM with Gemini 2.0 Flash model
-        self.llm = ChatGoogleGenerativeAI(
-            google_api_key=self.gemini_api_key,
-            model="gemini-2.0-flash-exp",
-            temperature=0.1,
-            max_tokens=4000
-        )
+        """Initialize LLMs and tools"""
+        # One Gemini client per task route, reporting to the shared breaker
+        self.llms = {
+            task: ChatGoogleGenerativeAI(
+                google_api_key=self.gemini_api_key,
+                model=route.model,
+                temperature=route.temperature,
+                max_tokens=route.max_tokens,
+                callbacks=[
+                    CancellationHandler(self), CircuitBreakerHandler(self.breakers['gemini']),
+                    TokenAccountingHandler(task, route),
+                ]
+            )
+            for task, route in self.routes.items()
+        }
+        self.llm = self.llms[ITINERARY]
         
         # Initialize Tavily search tool with minimal data extraction
-        self.search_tool = TavilySearchResults(
+        tavily = TavilySearchResults(
             api_key=self.tavily_api_key,
             max_results=3,  # Reduced from 10 to 3 for minimal data extraction
             search_depth="basic"  # Changed from "advanced" to "basic" for faster response
         )
         
-        self.tools = [self.search_tool]
+        def search(query: str) -> List[Dict]:
+            # The tool's own run returns repr(error) as if it were results; the API wrapper
+            # raises, so the breaker and the pipeline see failed searches as failures
+            return tavily.api_wrapper.results(query, tavily.max_results, search_depth="basic")
+        
+        self.search_tool = Tool(
+            name=tavily.name,
+            description=tavily.description,
+            func=self.breakers['tavily'].wrap(search)
+        )
+        
+        # The agent sees compacted observations: boilerplate stripped, overlap removed, token-capped.
+        # A failed search (already counted by the breaker) becomes an observation it can react to.
+        compacted = compacting_search(self.search_tool)
+        
+        def agent_search(query: str) -> str:
+            try:
+                return compacted(query)
+            except Exception as e:
+                raise ToolException(f"Search failed: {e}") from e
+        
+        self.tools = [Tool(
+            name=self.search_tool.name,
+            description=self.search_tool.description,
+            func=agent_search,
+            handle_tool_error=True
+        )]
     
     def setup_agent(self):
         """Setup the LangChain agent"""
@@ -91,26 +319,124 @@ Question: {input}
 {agent_scratchpad}
 """)
         
-        # Create ReAct agent
-        self.agent = create_react_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=agent_prompt
-        )
+        # One ReAct agent executor per task route
+        self.executors = {}
+        for task, llm in self.llms.items():
+            agent = create_react_agent(
+                llm=llm,
+                tools=self.tools,
+                prompt=agent_prompt
+            )
+            self.executors[task] = AgentExecutor(
+                agent=agent,
+                tools=self.tools,
+                verbose=True,
+                max_iterations=5,
+                handle_parsing_errors=True
+            )
+        self.agent_executor = self.executors[ITINERARY]
+    
+    def setup_pipeline(self):
+        """Setup the search-then-extract pipeline in place of the agent
         
-        # Create agent executor
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=self.tools,
-            verbose=True,
-            max_iterations=5,
-            handle_parsing_errors=True
-        )
+        It keeps the agent executor's invoke() interface, so every search below
+        works unchanged; the "searches" passed with each call are run directly.
+        """
+        self.executors = {task: SearchExtractPipeline(llm, self.search_tool) for task, llm in self.llms.items()}
+        self.agent_executor = self.executors[ITINERARY]
+    
+    def executor(self, task: str):
+        """Agent executor (or pipeline) running on the task's model route"""
+        return self.executors.get(task, self.agent_executor)
+    
+    def _check_upstreams(self, searches: Optional[List[str]]):
+        """Fail fast with CircuitOpenError if an upstream the call needs is known to be down"""
+        needed = ['gemini', 'tavily'] if searches else ['gemini']
+        for name in needed:
+            if not self.breakers[name].available():
+                raise CircuitOpenError(f"{name} circuit is open")
+    
+    def _invoke(self, task: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a request on the task's executor unless a needed upstream's circuit is open"""
+        self._check_cancelled()
+        self._check_upstreams(inputs.get('searches'))
+        with self._upstream_slot():
+            return self.executor(task).invoke(inputs)
+    
+    def _serve_stale(self, kind: str, location: str, refresh: Tuple, **params) -> Optional[List]:
+        """Expired cached results, served while `refresh` fetches new ones in the background
+        
+        Users get real, slightly old data immediately instead of waiting on (or
+        getting placeholders from) a slow or failing upstream. `refresh` is a
+        (method name, *args) call run on a fresh clone, since this generator
+        goes back to the pool as soon as the stale results are returned.
+        """
+        stale = self.cache.get_stale(kind, location, **params)
+        if stale is None:
+            return None
+        
+        key = (kind, normalize_text(location), tuple(sorted(params.items())))
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return stale
+            self._refreshing.add(key)
+        print(f"♻️  Serving stale {kind} for {location}, refreshing in the background")
+        
+        def run():
+            try:
+                self._on_clone(*refresh)
+            except Exception as e:
+                print(f"⚠️  Background refresh of {kind} for {location} failed: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        self._refresher.submit(run)
+        return stale
+    
+    def has_cached_hotels(self, location: str, budget: str) -> bool:
+        """Whether search_hotels would be served from the cache"""
+        return self.cache.contains('hotels', location, budget=budget)
+    
+    def has_cached_activities(self, location: str, budget: str, duration: int) -> bool:
+        """Whether search_activities would be served from the cache"""
+        return self.cache.contains('activities', location, budget=budget, count=duration * 2)
     
-    def search_hotels(self, location: str, checkin: str, checkout: str, budget: str) -> List[Dict]:
+    def search_hotels(self, location: str, checkin: str, checkout: str, budget: str) -> List[Hotel]:
         """Search for hotels using AI agent with web search"""
+        cached = self.cache.get('hotels', location, budget=budget)
+        if cached is None:
+            cached = self._serve_stale('hotels', location, ('_fetch_hotels', location, budget), budget=budget)
+        if cached is not None:
+            print(f"⚡ Cache hit for {budget} budget hotels in {location}")
+            return cached
+        
+        return self._fetch_hotels(location, budget)
+    
+    def _fetch_hotels(self, location: str, budget: str) -> List[Hotel]:
+        """Hotels from the knowledge base or the agent, cached when real results were found"""
+        served, local = self._serve_local('hotels', location, budget, 3)
+        if served:
+            self.cache.set('hotels', location, served, budget=budget)
+            return served
+        
         print(f"🤖 AI Agent searching for {budget} budget hotels in {location}...")
         
+        query, searches = self._hotel_query(location, budget)
+        try:
+            result = self._invoke(HOTELS, {"input": query, "searches": searches})
+            hotels = self._enforce_budget('hotels', local + self._extract_hotels(result['output'], location), location, budget, 3)
+            if not hotels:
+                return self._get_fallback_hotels(location, 'medium')
+            
+            self.cache.set('hotels', location, hotels, budget=budget)
+            return hotels
+        except Exception as e:
+            print(f"Error in AI hotel search: {e}")
+            return self._get_fallback_hotels(location, budget)
+    
+    def _hotel_query(self, location: str, budget: str) -> Tuple[str, List[str]]:
+        """Agent prompt and web queries for a hotel search"""
         query = f"""
         Find 3 hotels in {location} for {budget} budget. Return ONLY:
         
@@ -125,15 +451,175 @@ Question: {input}
         
         Keep responses minimal and focused.
         """
+        return query, [
+            f"best {budget} budget hotels in {location} price per night",
+            f"{location} {budget} hotels reviews rating",
+        ]
+    
+    def stream_hotels(self, location: str, checkin: str, checkout: str, budget: str) -> Iterator[Hotel]:
+        """Like search_hotels, but yields each hotel as soon as the LLM has written it"""
+        cached = self.cache.get('hotels', location, budget=budget)
+        if cached is None:
+            cached = self._serve_stale('hotels', location, ('_fetch_hotels', location, budget), budget=budget)
+        if cached is not None:
+            print(f"⚡ Cache hit for {budget} budget hotels in {location}")
+            yield from cached
+            return
+        
+        served, local = self._serve_local('hotels', location, budget, 3)
+        if served:
+            self.cache.set('hotels', location, served, budget=budget)
+            yield from served
+            return
+        
+        print(f"🤖 Streaming {budget} budget hotels in {location}...")
         
+        query, searches = self._hotel_query(location, budget)
+        hotels = []
         try:
-            result = self.agent_executor.invoke({"input": query})
-            return self._parse_hotel_results(result['output'], location)
+            for hotel in self._stream_records('hotels', query, searches, location, budget, 3, local):
+                hotels.append(hotel)
+                yield hotel
         except Exception as e:
-            print(f"Error in AI hotel search: {e}")
-            return self._get_fallback_hotels(location, budget)
+            print(f"Error in AI hotel stream: {e}")
+            if not hotels:
+                yield from self._get_fallback_hotels(location, budget)
+            return
+        
+        if hotels:
+            self.cache.set('hotels', location, hotels, budget=budget)
+        else:
+            yield from self._get_fallback_hotels(location, 'medium')
+    
+    def search_hotels_batch(self, searches: List[Dict]) -> List[List[Hotel]]:
+        """Search hotels for several cities, sharing agent runs across cities where possible
+        
+        Each search is a dict with 'location' and 'budget'. Duplicates are searched once,
+        cached cities are served from the cache, and the rest are grouped into combined
+        agent prompts that run concurrently. Results are returned in input order.
+        """
+        keys = [(normalize_text(s['location']), normalize_budget(s['budget'])) for s in searches]
+        unique = {}
+        for key, search in zip(keys, searches):
+            unique.setdefault(key, search)
+        
+        results = {}
+        misses = []
+        for key, search in unique.items():
+            cached = self.cache.get('hotels', search['location'], budget=search['budget'])
+            if cached is None:
+                cached = self._serve_stale(
+                    'hotels', search['location'],
+                    ('_fetch_hotels', search['location'], search['budget']),
+                    budget=search['budget']
+                )
+            if cached is None:
+                cached, _ = self._serve_local('hotels', search['location'], search['budget'], 3)
+                if cached:
+                    # May include agent top-ups, so cache it like _fetch_hotels does
+                    self.cache.set('hotels', search['location'], cached, budget=search['budget'])
+            if cached:
+                results[key] = cached
+            else:
+                misses.append((key, search))
+        
+        print(f"🤖 Batch hotel search: {len(searches)} requested, {len(unique)} unique, {len(misses)} to search")
+        
+        groups = [misses[i:i + HOTEL_BATCH_SIZE] for i in range(0, len(misses), HOTEL_BATCH_SIZE)]
+        if groups:
+            with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+                # Each concurrent agent run gets its own generator
+                for group_results in executor.map(propagate(
+                        lambda group: self._on_clone('_search_hotel_group', group)), groups):
+                    results.update(group_results)
+        
+        # Cities the combined prompt didn't cover get an individual search
+        missing = [(key, search) for key, search in misses if not results.get(key)]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                found = executor.map(propagate(
+                    lambda item: self._on_clone('search_hotels', item[1]['location'], '', '', item[1]['budget'])),
+                    missing
+                )
+                for (key, _), hotels in zip(missing, found):
+                    results[key] = hotels
+        
+        # Duplicate searches share results; give each its own objects
+        return [[replace(hotel) for hotel in results[key]] for key in keys]
+    
+    def _search_hotel_group(self, group: List[tuple]) -> Dict[tuple, List[Hotel]]:
+        """Run one agent prompt covering several cities"""
+        if len(group) == 1:
+            key, search = group[0]
+            return {key: self.search_hotels(search['location'], '', '', search['budget'])}
+        
+        city_lines = "\n".join(f"        - {search['location']} ({search['budget']} budget)" for _, search in group)
+        query = f"""
+        Find 3 hotels in EACH of these cities, matching each city's budget:
+{city_lines}
+        
+        Return ONLY, for each city:
+        
+        CITY: [City name exactly as listed]
+        HOTEL NAME: [Name]
+        PRICE: [Price per night]
+        RATING: [Star rating]
+        
+        Budget filters:
+        * Low: under $100/night
+        * Medium: $100-300/night  
+        * High: $300+/night
+        
+        Keep responses minimal and focused.
+        """
+        
+        try:
+            result = self._invoke(HOTELS, {"input": query, "searches": [
+                f"best {search['budget']} budget hotels in {search['location']} price per night" for _, search in group
+            ]})
+        except Exception as e:
+            print(f"Error in AI batch hotel search: {e}")
+            return {}
+        
+        results = {}
+        searches = dict(group)
+        for key, hotels in self._parse_city_sections(result['output'], group).items():
+            search = searches[key]
+            hotels = self._enforce_budget('hotels', hotels, search['location'], search['budget'], 3)
+            if hotels:
+                self.cache.set('hotels', search['location'], hotels, budget=search['budget'])
+                results[key] = hotels
+        return results
+    
+    def _parse_city_sections(self, ai_output: str, group: List[tuple]) -> Dict[tuple, List[Hotel]]:
+        """Split a combined answer on CITY: labels and parse each section's hotels
+        
+        A header names its city in full ("New York (medium budget)"); a partial
+        name is only accepted when it fits exactly one of the listed cities, so
+        "York" never takes New York's section.
+        """
+        sections = {}
+        for section in ai_output.split('CITY:')[1:]:
+            header, _, body = section.partition('\n')
+            name, _, listed = header.partition('(')
+            city = normalize_text(name)
+            if not city:
+                continue
+            open_searches = [(key, search) for key, search in group if key not in sections]
+            candidates = [(key, search) for key, search in open_searches if key[0] == city]
+            if not candidates:
+                partial = [(key, search) for key, search in open_searches if key[0] in city or city in key[0]]
+                if len({key[0] for key, _ in partial}) == 1:
+                    candidates = partial
+            # The same city may appear with two budgets; prefer the one named in the header
+            budget = normalize_budget(listed.split(')')[0].lower().replace('budget', ''))
+            candidates.sort(key=lambda item: item[0][1] != budget)
+            if candidates:
+                key, search = candidates[0]
+                sections[key] = self._extract_hotels(body, search['location'])
+        return sections
     
-    def search_activities(self, location: str, budget: str, duration: int, selected_hotel: Dict = None) -> List[Dict]:
+    def search_activities(self, location: str, budget: str, duration: int, selected_hotel: Dict = None) -> List[Activity]:
         """Search for exactly 2*duration activities using AI agent with web search"""
         activities_needed = duration * 2  # Exactly 2 activities per day
         
@@ -143,8 +629,48 @@ Question: {input}
             hotel_location = selected_hotel.get('location', '')
             hotel_info = f"near {hotel_name} at {hotel_location}" if hotel_location else f"near {hotel_name}"
         
+        # The agent query is hotel-agnostic, so the hotel is not part of the cache key
+        cached = self.cache.get('activities', location, budget=budget, count=activities_needed)
+        if cached is None:
+            cached = self._serve_stale(
+                'activities', location, ('_fetch_activities', location, budget, activities_needed),
+                budget=budget, count=activities_needed
+            )
+        if cached is not None:
+            print(f"⚡ Cache hit for {activities_needed} activities in {location}")
+            return self._pad_activities(cached, location, budget, activities_needed)
+        
+        return self._fetch_activities(location, budget, activities_needed, hotel_info)
+    
+    def _fetch_activities(self, location: str, budget: str, activities_needed: int, hotel_info: str = "") -> List[Activity]:
+        """Activities from the knowledge base or the agent, cached when real results were found"""
+        served, local = self._serve_local('activities', location, budget, activities_needed)
+        if served:
+            self.cache.set('activities', location, served, budget=budget, count=activities_needed)
+            return self._pad_activities(served, location, budget, activities_needed)
+        
         print(f"🤖 AI Agent searching for {activities_needed} unique activities in {location} {hotel_info}...")
         
+        query, searches = self._activity_query(location, budget, activities_needed)
+        try:
+            result = self._invoke(ACTIVITIES, {"input": query, "searches": searches})
+            activities = self._enforce_budget(
+                'activities', local + self._extract_activities(result['output'], location), location, budget,
+                activities_needed, fill=True
+            )
+            if not activities:
+                activities = self._get_fallback_activities(location, 'medium')
+            else:
+                self.cache.set('activities', location, activities, budget=budget, count=activities_needed)
+            
+            return self._pad_activities(activities, location, budget, activities_needed)
+            
+        except Exception as e:
+            print(f"Error in AI activity search: {e}")
+            return self._get_fallback_activities(location, budget, activities_needed)
+    
+    def _activity_query(self, location: str, budget: str, activities_needed: int) -> Tuple[str, List[str]]:
+        """Agent prompt and web queries for an activity search"""
         query = f"""
         Find exactly {activities_needed} unique activities in {location} for {budget} budget. Return ONLY:
         
@@ -159,24 +685,249 @@ Question: {input}
         Include mix of: attractions, museums, parks, cultural sites.
         Keep responses minimal and ensure all {activities_needed} activities are different.
         """
+        return query, [
+            f"top things to do in {location}",
+            f"{location} {budget} budget attractions prices",
+            f"{location} museums parks cultural sites entry fee",
+        ]
+    
+    def stream_activities(self, location: str, budget: str, duration: int) -> Iterator[Activity]:
+        """Like search_activities, but yields each activity as soon as the LLM has written it"""
+        activities_needed = duration * 2
+        
+        cached = self.cache.get('activities', location, budget=budget, count=activities_needed)
+        if cached is None:
+            cached = self._serve_stale(
+                'activities', location, ('_fetch_activities', location, budget, activities_needed),
+                budget=budget, count=activities_needed
+            )
+        if cached is not None:
+            print(f"⚡ Cache hit for {activities_needed} activities in {location}")
+            yield from self._pad_activities(cached, location, budget, activities_needed)
+            return
         
+        served, local = self._serve_local('activities', location, budget, activities_needed)
+        if served:
+            self.cache.set('activities', location, served, budget=budget, count=activities_needed)
+            yield from self._pad_activities(served, location, budget, activities_needed)
+            return
+        
+        print(f"🤖 Streaming {activities_needed} unique activities in {location}...")
+        
+        query, searches = self._activity_query(location, budget, activities_needed)
+        activities = []
         try:
-            result = self.agent_executor.invoke({"input": query})
-            activities = self._parse_activity_results(result['output'], location)
+            for activity in self._stream_records('activities', query, searches, location, budget,
+                                                 activities_needed, local, fill=True):
+                activities.append(activity)
+                yield activity
+        except Exception as e:
+            print(f"Error in AI activity stream: {e}")
+        else:
+            if activities:
+                self.cache.set('activities', location, list(activities), budget=budget, count=activities_needed)
+        
+        # Fill any remaining slots with fallback activities, as search_activities does
+        streamed = len(activities)
+        yield from self._pad_activities(activities, location, budget, activities_needed)[streamed:]
+    
+    def _stream_records(self, kind: str, query: str, searches: List[str], location: str, budget: str,
+                        count: int, local: List, fill: bool = False) -> Iterator:
+        """Yield in-budget results while the extraction is still streaming, then top up any shortfall
+        
+        The streaming counterpart of _enforce_budget: results priced outside the
+        budget are held back, and only sent if nothing at all fits. Generation
+        stops early once `count` results have been sent.
+        """
+        if kind == 'hotels':
+            tiers, extract = HOTEL_BUDGET_TIERS, self._extract_hotels
+            parser = RecordStreamParser(HOTEL_MARKER, lambda text: normalize_hotels(self._parse_structured_hotels(text)))
+        else:
+            tiers, extract = ACTIVITY_BUDGET_TIERS, self._extract_activities
+            parser = RecordStreamParser(ACTIVITY_MARKER, lambda text: normalize_prices(self._parse_structured_activities(text)))
+        
+        seen = set()
+        sent, rejected = [], []
+        
+        def accept(items: List) -> List:
+            fit, outside = split_by_budget(self._dedupe(items, seen), tiers, budget)
+            rejected.extend(outside)
+            fit = fit[:count - len(sent)]
+            sent.extend(fit)
+            return fit
+        
+        yield from accept(local)
+        
+        if len(sent) < count:
+            text = []
+            chunks = self._completion_stream(kind, query, searches)
+            try:
+                for chunk in chunks:
+                    text.append(chunk)
+                    yield from accept(parser.feed(chunk))
+                    if len(sent) >= count:
+                        break
+                else:
+                    yield from accept(parser.close())
+                    if not parser.records:
+                        # The model ignored the record format; use the buffered parsers' fallbacks
+                        yield from accept(extract(''.join(text), location))
+            finally:
+                chunks.close()
+        
+        missing = count - len(sent)
+        if missing > 0 and (rejected or fill):
+            if rejected:
+                print(f"💸 {len(rejected)} {kind} in {location} outside {budget} budget")
+            yield from accept(self._top_up(kind, location, budget, missing, exclude=sent + rejected))
+        if not sent:
+            yield from rejected[:count]
+    
+    def _completion_stream(self, kind: str, query: str, searches: List[str]) -> Iterator[str]:
+        """Streamed extraction text for a task
+        
+        A ReAct agent's answer only exists after its last turn, so streaming
+        always goes through the search-then-extract pipeline on the task's route.
+        """
+        self._check_cancelled()
+        self._check_upstreams(searches)
+        executor = self.executor(kind)
+        if not isinstance(executor, SearchExtractPipeline):
+            executor = SearchExtractPipeline(self.llms[kind], self.search_tool)
+        with self._upstream_slot():
+            yield from executor.stream({"input": query, "searches": searches})
+    
+    def _serve_local(self, kind: str, location: str, budget: str, count: int) -> Tuple[Optional[List], List]:
+        """Serve hotels/activities from the local knowledge base where it covers the request
+        
+        Returns (served, local): `served` is None when local coverage is under
+        half the count, in which case the full agent search should run, seeded
+        with the in-budget `local` results. Smaller shortfalls are topped up.
+        """
+        if self.knowledge_base is None:
+            return None, []
+        tiers = HOTEL_BUDGET_TIERS if kind == 'hotels' else ACTIVITY_BUDGET_TIERS
+        local = split_by_budget(self.knowledge_base.lookup(kind, location), tiers, budget)[0]
+        if not local:
+            return None, []
+        if len(local) >= count:
+            print(f"📚 Served {count} {kind} for {location} from the local knowledge base")
+            return local[:count], local
+        if len(local) * 2 >= count:
+            print(f"📚 {len(local)}/{count} {kind} for {location} known locally, topping up the rest")
+            return self._enforce_budget(kind, local, location, budget, count, fill=True), local
+        return None, local
+    
+    def _enforce_budget(self, kind: str, items: List, location: str, budget: str, count: int,
+                        fill: bool = False) -> List:
+        """Drop duplicates and results priced outside the budget tier, then top up only the missing count
+        
+        With fill=True a shortfall from the agent returning too few results is
+        topped up as well. If nothing at all fits, the out-of-budget results are
+        kept rather than falling back to placeholders.
+        """
+        tiers = HOTEL_BUDGET_TIERS if kind == 'hotels' else ACTIVITY_BUDGET_TIERS
+        items = self._dedupe(items, set())
+        fit, rejected = split_by_budget(items, tiers, budget)
+        fit = fit[:count]
+        missing = count - len(fit)
+        if missing > 0 and (rejected or fill):
+            if rejected:
+                print(f"💸 {len(rejected)} {kind} in {location} outside {budget} budget")
+            fit.extend(self._top_up(kind, location, budget, missing, exclude=items))
+        return fit or rejected[:count]
+    
+    def _dedupe(self, items: List, seen: set) -> List:
+        """Items whose normalized name isn't in `seen` yet; `seen` is updated in place"""
+        unique = []
+        for item in items:
+            name = normalize_text(item.name)
+            if name and name not in seen:
+                seen.add(name)
+                unique.append(item)
+        return unique
+    
+    def _top_up(self, kind: str, location: str, budget: str, missing: int, exclude: List) -> List:
+        """Search for just `missing` more in-budget results
+        
+        The shortfall is split into pages of TOP_UP_PAGE_SIZE searched
+        concurrently, each with a different focus so pages don't return the same
+        places. Results are deduplicated by normalized name against everything
+        seen so far; pages that come back short get one more round.
+        """
+        seen = {normalize_text(item.name) for item in exclude}
+        added = []
+        for round_number in range(TOP_UP_ROUNDS):
+            remaining = missing - len(added)
+            if remaining <= 0:
+                break
+            self._check_cancelled()
             
-            # Ensure we have exactly the right number of activities
-            if len(activities) < activities_needed:
-                # Add fallback activities to reach the target
-                fallback_activities = self._get_fallback_activities(location, budget, activities_needed - len(activities))
-                activities.extend(fallback_activities)
+            pages = [min(TOP_UP_PAGE_SIZE, remaining - start) for start in range(0, remaining, TOP_UP_PAGE_SIZE)]
+            rotation = HOTEL_FOCUSES if kind == 'hotels' else ACTIVITY_FOCUSES
+            focuses = [rotation[(round_number * len(pages) + i) % len(rotation)] for i in range(len(pages))]
+            names = [item.name for item in exclude + added]
+            print(f"➕ Topping up {remaining} {kind} in {location} with {len(pages)} concurrent searches")
             
-            return activities[:activities_needed]  # Return exactly what we need
+            with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+                found = list(executor.map(propagate(
+                    lambda page: self._on_clone('_top_up_page', kind, location, budget, page[0], page[1], names)),
+                    zip(pages, focuses)
+                ))
             
+            before = len(added)
+            for results in found:
+                added.extend(self._dedupe(results, seen))
+            if len(added) == before:
+                break  # Nothing new left to find
+        
+        return added[:missing]
+    
+    def _top_up_page(self, kind: str, location: str, budget: str, count: int, focus: str,
+                     exclude_names: List[str]) -> List:
+        """One top-up search for `count` in-budget results"""
+        tier = normalize_budget(budget)
+        names = ", ".join(exclude_names)
+        if kind == 'hotels':
+            query = f"""
+        Find {count} more hotels in {location} priced {HOTEL_BUDGET_LABELS.get(tier, budget)},
+        focusing on {focus}.
+        Do not include: {names}
+        Return ONLY:
+        
+        HOTEL NAME: [Name]
+        PRICE: [Price per night]
+        RATING: [Star rating]
+        """
+        else:
+            query = f"""
+        Find {count} more unique activities in {location} costing {ACTIVITY_BUDGET_LABELS.get(tier, budget)},
+        focusing on {focus}.
+        Do not include: {names}
+        Return ONLY:
+        
+        ACTIVITY NAME: [Name]
+        PRICE: [Cost or "Free"]
+        """
+        
+        if kind == 'hotels':
+            searches = [f"{HOTEL_BUDGET_LABELS.get(tier, budget)} hotels in {location} {focus}"]
+        else:
+            searches = [f"{location} {focus} {ACTIVITY_BUDGET_LABELS.get(tier, budget)}"]
+        
+        try:
+            result = self._invoke(kind, {"input": query, "searches": searches})
         except Exception as e:
-            print(f"Error in AI activity search: {e}")
-            return self._get_fallback_activities(location, budget, activities_needed)
+            print(f"Error in AI {kind} top-up search: {e}")
+            return []
+        
+        if kind == 'hotels':
+            found, tiers = self._extract_hotels(result['output'], location), HOTEL_BUDGET_TIERS
+        else:
+            found, tiers = self._extract_activities(result['output'], location), ACTIVITY_BUDGET_TIERS
+        return split_by_budget(found, tiers, budget)[0]
     
-    def generate_itinerary(self, trip_data: Dict, selected_hotel: Dict, activities: List[Dict]) -> Dict:
+    def generate_itinerary(self, trip_data: Dict, selected_hotel: Dict, activities: List[Activity]) -> Itinerary:
         """Generate a comprehensive day-by-day itinerary using AI"""
         print("\n🤖 AI Agent generating your personalized itinerary...")
         
@@ -189,7 +940,7 @@ Question: {input}
         from {trip_data['start_date']} to {trip_data['end_date']} with {trip_data['budget']} budget.
         
         Selected hotel: {hotel_name} {f"at {hotel_location}" if hotel_location else ""}
-        Available activities: {[a.get('name', 'Unknown') for a in activities]}
+        Available activities: {[a.name or 'Unknown' for a in activities]}
         
         Create a logical daily schedule with 2 activities per day considering:
         - Starting point is the selected hotel: {hotel_name}
@@ -206,26 +957,216 @@ Question: {input}
         """
         
         try:
-            ai_schedule = self.agent_executor.invoke({"input": itinerary_query})
+            # Planning over activities we already have; no web search needed
+            ai_schedule = self._invoke(ITINERARY, {"input": itinerary_query, "searches": []})
             optimized_schedule = self._parse_itinerary_schedule(ai_schedule['output'], trip_data, activities)
         except Exception as e:
             print(f"Error generating AI itinerary: {e}")
             optimized_schedule = self._create_basic_schedule(trip_data, activities)
         
-        itinerary = {
-            'destination': trip_data['location'],
-            'dates': f"{trip_data['start_date']} to {trip_data['end_date']}",
-            'duration': f"{trip_data['duration']} days",
-            'budget': trip_data['budget'],
-            'selected_hotel': selected_hotel,
-            'daily_schedule': optimized_schedule,
-            'generated_by': 'AI Agent with real-time web data'
-        }
+        itinerary = Itinerary(
+            destination=trip_data['location'],
+            dates=f"{trip_data['start_date']} to {trip_data['end_date']}",
+            duration=f"{trip_data['duration']} days",
+            budget=trip_data['budget'],
+            selected_hotel=selected_hotel,
+            daily_schedule=optimized_schedule,
+            generated_by='AI Agent with real-time web data'
+        )
+        
+        return itinerary
+    
+    def generate_multi_city_itinerary(self, legs: List[Dict], budget: str) -> Itinerary:
+        """Schedule an ordered list of trip legs locally and merge them into one itinerary
+        
+        Each leg is a dict with 'location', 'start_date', 'end_date', 'selected_hotel',
+        'activities' and optionally its own 'budget'. Legs are scheduled without agent
+        calls, then renumbered into a single day-indexed schedule. Raises ValueError
+        for unparseable dates, a leg ending before it starts, or legs out of order or
+        overlapping (a leg may start on the day the previous one ends).
+        """
+        print(f"\n🗺️  Scheduling {len(legs)}-city itinerary...")
+        
+        leg_trips = []
+        previous = None
+        for number, leg in enumerate(legs, 1):
+            try:
+                start = datetime.strptime(leg['start_date'], "%Y-%m-%d")
+                end = datetime.strptime(leg['end_date'], "%Y-%m-%d")
+            except (TypeError, ValueError):
+                raise ValueError(f"Leg {number} ({leg['location']}) dates must be YYYY-MM-DD") from None
+            if end < start:
+                raise ValueError(f"Leg {number} ({leg['location']}) ends before it starts")
+            if previous is not None:
+                if start < previous[0]:
+                    raise ValueError(f"Leg {number} ({leg['location']}) starts before leg {number - 1}; legs must be in date order")
+                if start < previous[1]:
+                    raise ValueError(f"Leg {number} ({leg['location']}) overlaps leg {number - 1}")
+            previous = (start, end)
+            leg_trips.append({
+                'location': leg['location'],
+                'start_date': leg['start_date'],
+                'end_date': leg['end_date'],
+                'duration': max((end - start).days, 1),
+                'budget': leg.get('budget') or budget
+            })
+        
+        # Local scheduling is cheap; threads would only add overhead
+        leg_schedules = [
+            self._create_basic_schedule(trip, leg.get('activities') or [])
+            for trip, leg in zip(leg_trips, legs)
+        ]
+        
+        daily_schedule = []
+        for leg, trip, schedule in zip(legs, leg_trips, leg_schedules):
+            hotel_name = (leg.get('selected_hotel') or {}).get('name', '')
+            for day_plan in schedule:
+                day_plan.day = len(daily_schedule) + 1
+                day_plan.destination = trip['location']
+                day_plan.hotel = hotel_name
+                day_plan.ai_suggestions = f"Day {day_plan.day}: Explore {trip['location']} with 2 unique activities"
+                daily_schedule.append(day_plan)
+        
+        itinerary = Itinerary(
+            destination=' → '.join(trip['location'] for trip in leg_trips),
+            dates=f"{leg_trips[0]['start_date']} to {leg_trips[-1]['end_date']}" if leg_trips else '',
+            duration=f"{len(daily_schedule)} days",
+            budget=budget,
+            selected_hotel={},
+            legs=[
+                {
+                    'destination': trip['location'],
+                    'dates': f"{trip['start_date']} to {trip['end_date']}",
+                    'duration': f"{trip['duration']} days",
+                    'selected_hotel': leg.get('selected_hotel') or {}
+                }
+                for leg, trip in zip(legs, leg_trips)
+            ],
+            daily_schedule=daily_schedule,
+            generated_by='Local multi-city scheduler'
+        )
+        
+        return itinerary
+    
+    def patch_itinerary(self, itinerary: Itinerary, edits: List[Dict]) -> Itinerary:
+        """Apply edits to an existing itinerary, recomputing only the affected days
         
+        Supported edits (dicts with an 'op' key):
+          replace_activity: day, index, activity
+          move_activity:    day, index, to_day
+          change_hotel:     hotel
+          extend_dates:     end_date, optional activities for the new days
+        Returns the patched itinerary with `updated_days` set.
+        """
+        itinerary = copy.deepcopy(itinerary)
+        schedule = itinerary.daily_schedule
+        affected = set()
+        
+        for edit in edits:
+            op = edit.get('op')
+            if op == 'replace_activity':
+                day_plan = self._day_plan(schedule, edit.get('day'))
+                index = edit.get('index', 0)
+                if not 0 <= index < len(day_plan.activities):
+                    raise ValueError(f"Day {day_plan.day} has no activity at index {index}")
+                activity = replace(edit.get('activity') or Activity(), type='activity')
+                day_plan.activities[index] = activity
+                affected.add(day_plan.day)
+            elif op == 'move_activity':
+                source = self._day_plan(schedule, edit.get('day'))
+                target = self._day_plan(schedule, edit.get('to_day'))
+                index = edit.get('index', 0)
+                if not 0 <= index < len(source.activities):
+                    raise ValueError(f"Day {source.day} has no activity at index {index}")
+                target.activities.append(source.activities.pop(index))
+                affected.update((source.day, target.day))
+            elif op == 'change_hotel':
+                itinerary.selected_hotel = edit.get('hotel') or {}
+                # Distances were relative to the previous hotel
+                for day_plan in schedule:
+                    for activity in day_plan.activities:
+                        if activity.distance not in ('', 'Distance varies'):
+                            activity.distance = 'Distance varies'
+                            affected.add(day_plan.day)
+            elif op == 'extend_dates':
+                affected.update(self._extend_schedule(itinerary, edit))
+            else:
+                raise ValueError(f"Unknown itinerary edit: {op}")
+        
+        for day_plan in schedule:
+            if day_plan.day in affected:
+                location = day_plan.destination or itinerary.destination
+                count = len(day_plan.activities)
+                day_plan.ai_suggestions = f"Day {day_plan.day}: Explore {location} with {count} unique {'activity' if count == 1 else 'activities'}"
+        
+        itinerary.updated_days = sorted(day for day in affected if day <= len(schedule))
         return itinerary
     
-    def _parse_hotel_results(self, ai_output: str, location: str) -> List[Dict]:
+    def _day_plan(self, schedule: List[DayPlan], day: int) -> DayPlan:
+        if not day or not 1 <= day <= len(schedule):
+            raise ValueError(f"Itinerary has no day {day}")
+        return schedule[day - 1]
+    
+    def _extend_schedule(self, itinerary: Itinerary, edit: Dict) -> List[int]:
+        """Grow or shrink the schedule to a new end date, scheduling only new days"""
+        schedule = itinerary.daily_schedule
+        start_date = datetime.strptime(itinerary.dates.split(' to ')[0], "%Y-%m-%d")
+        end_date = datetime.strptime(edit['end_date'], "%Y-%m-%d")
+        duration = max((end_date - start_date).days, 1)
+        itinerary.dates = f"{start_date.strftime('%Y-%m-%d')} to {edit['end_date']}"
+        itinerary.duration = f"{duration} days"
+        
+        if duration <= len(schedule):
+            del schedule[duration:]
+            return []
+        
+        extra_days = duration - len(schedule)
+        last_day = schedule[-1] if schedule else None
+        location = (last_day and last_day.destination) or itinerary.destination
+        budget = itinerary.budget or 'medium'
+        
+        # Activities supplied with the edit first, then the unused rest of the list cached
+        # when these days were generated, and only search for whatever is still missing
+        needed = extra_days * 2
+        seen = {a.name.lower() for day_plan in schedule for a in day_plan.activities}
+        activities = []
+        
+        def take(candidates):
+            for activity in candidates or []:
+                if len(activities) < needed and activity.name.lower() not in seen:
+                    seen.add(activity.name.lower())
+                    activities.append(activity)
+        
+        take(edit.get('activities'))
+        if len(activities) < needed:
+            days_here = sum(1 for day_plan in schedule if (day_plan.destination or itinerary.destination) == location)
+            take(self.cache.get('activities', location, budget=budget, count=days_here * 2))
+        if len(activities) < needed:
+            shortfall = needed - len(activities)
+            take(self.search_activities(location, budget, (shortfall + 1) // 2))
+        
+        new_days = self._create_basic_schedule({
+            'location': location,
+            'start_date': (start_date + timedelta(days=len(schedule))).strftime("%Y-%m-%d"),
+            'duration': extra_days,
+            'budget': budget
+        }, activities)
+        
+        for day_plan in new_days:
+            day_plan.day += len(schedule)
+            if last_day and last_day.destination:
+                day_plan.destination = location
+                day_plan.hotel = last_day.hotel
+        schedule.extend(new_days)
+        return [day_plan.day for day_plan in new_days]
+    
+    def _parse_hotel_results(self, ai_output: str, location: str) -> List[Hotel]:
         """Parse AI agent output for hotel information using improved extraction"""
+        hotels = self._extract_hotels(ai_output, location)
+        return hotels[:3] if hotels else self._get_fallback_hotels(location, 'medium')
+    
+    def _extract_hotels(self, ai_output: str, location: str) -> List[Hotel]:
+        """Extract hotels from AI output, returning an empty list if nothing parses"""
         hotels = []
         try:
             # First try structured parsing with the formatted response
@@ -242,9 +1183,9 @@ Question: {input}
         except Exception as e:
             print(f"Error parsing hotel results: {e}")
         
-        return hotels[:3] if hotels else self._get_fallback_hotels(location, 'medium')
+        return normalize_hotels(hotels)
     
-    def _parse_structured_hotels(self, ai_output: str) -> List[Dict]:
+    def _parse_structured_hotels(self, ai_output: str) -> List[Hotel]:
         """Parse structured hotel format with clear labels"""
         hotels = []
         
@@ -252,13 +1193,7 @@ Question: {input}
         sections = ai_output.split('HOTEL NAME:')
         
         for section in sections[1:]:  # Skip first empty section
-            hotel = {
-                'name': '',
-                'description': '',
-                'price': '',
-                'rating': '',
-                'location': ''
-            }
+            hotel = Hotel()
             
             lines = section.split('\n')
             current_field = 'name'
@@ -270,29 +1205,29 @@ Question: {input}
                     
                 if line.startswith('DESCRIPTION:'):
                     current_field = 'description'
-                    hotel['description'] = line.replace('DESCRIPTION:', '').strip()
+                    hotel.description = line.replace('DESCRIPTION:', '').strip()
                 elif line.startswith('PRICE:'):
                     current_field = 'price'
-                    hotel['price'] = line.replace('PRICE:', '').strip()
+                    hotel.price = line.replace('PRICE:', '').strip()
                 elif line.startswith('RATING:'):
                     current_field = 'rating'
-                    hotel['rating'] = line.replace('RATING:', '').strip()
+                    hotel.rating = line.replace('RATING:', '').strip()
                 elif line.startswith('LOCATION:'):
                     current_field = 'location'
-                    hotel['location'] = line.replace('LOCATION:', '').strip()
-                elif current_field == 'name' and not hotel['name']:
-                    hotel['name'] = line
+                    hotel.location = line.replace('LOCATION:', '').strip()
+                elif current_field == 'name' and not hotel.name:
+                    hotel.name = line
                 elif current_field == 'description' and not line.startswith(('PRICE:', 'RATING:', 'LOCATION:')):
-                    hotel['description'] += ' ' + line
+                    hotel.description += ' ' + line
             
             # Clean up and add if valid
-            if hotel['name']:
-                hotel['description'] = hotel['description'][:300] + "..." if len(hotel['description']) > 300 else hotel['description']
+            if hotel.name:
+                hotel.description = hotel.description[:300] + "..." if len(hotel.description) > 300 else hotel.description
                 hotels.append(hotel)
         
         return hotels
     
-    def _parse_section_based_hotels(self, ai_output: str, location: str) -> List[Dict]:
+    def _parse_section_based_hotels(self, ai_output: str, location: str) -> List[Hotel]:
         """Parse hotels using section-based approach"""
         hotels = []
         sections = ai_output.replace('**', '').replace('*', '').split('\n\n')
@@ -307,18 +1242,12 @@ Question: {input}
             has_hotel_keyword = any(indicator in section.lower() for indicator in hotel_indicators)
             
             if has_hotel_keyword and len(lines) >= 2:
-                hotel = {
-                    'name': '',
-                    'description': '',
-                    'price': '',
-                    'rating': '',
-                    'location': ''
-                }
+                hotel = Hotel()
                 
                 # Extract hotel name (usually first line with hotel keyword)
                 for line in lines:
                     if any(indicator in line.lower() for indicator in hotel_indicators):
-                        hotel['name'] = line.replace(':', '').replace('-', '').strip()
+                        hotel.name = line.replace(':', '').replace('-', '').strip()
                         break
                 
                 # Extract other information
@@ -327,24 +1256,24 @@ Question: {input}
                     line_lower = line.lower()
                     
                     if '$' in line or 'price' in line_lower or '/night' in line_lower or 'cost' in line_lower:
-                        hotel['price'] = line
+                        hotel.price = line
                     elif 'star' in line_lower or 'rating' in line_lower or '/5' in line or 'rated' in line_lower:
-                        hotel['rating'] = line
+                        hotel.rating = line
                     elif any(loc_word in line_lower for loc_word in ['address', 'located', 'street', 'avenue', 'area', 'district']):
-                        hotel['location'] = line
-                    elif line != hotel['name'] and not any(skip in line_lower for skip in ['search', 'result', 'website', 'booking']):
+                        hotel.location = line
+                    elif line != hotel.name and not any(skip in line_lower for skip in ['search', 'result', 'website', 'booking']):
                         description_parts.append(line)
                 
                 # Combine description parts
-                hotel['description'] = ' '.join(description_parts)[:300]
+                hotel.description = ' '.join(description_parts)[:300]
                 
                 # Only add if we have a name
-                if hotel['name']:
+                if hotel.name:
                     hotels.append(hotel)
         
         return hotels
     
-    def _fallback_hotel_extraction(self, ai_output: str, location: str) -> List[Dict]:
+    def _fallback_hotel_extraction(self, ai_output: str, location: str) -> List[Hotel]:
         """Fallback method to extract hotel information"""
         hotels = []
         lines = ai_output.split('\n')
@@ -352,21 +1281,20 @@ Question: {input}
         for i, line in enumerate(lines):
             line = line.strip().replace('**', '').replace('*', '')
             if any(keyword in line.lower() for keyword in ['hotel', 'resort', 'inn', 'lodge']):
-                hotel = {
-                    'name': line,
-                    'description': '',
-                    'price': 'Price varies',
-                    'rating': 'Rating not available',
-                    'location': location
-                }
+                hotel = Hotel(
+                    name=line,
+                    price='Price varies',
+                    rating='Rating not available',
+                    location=location
+                )
                 
                 # Look for additional info in next few lines
                 for j in range(i+1, min(i+4, len(lines))):
                     next_line = lines[j].strip()
                     if next_line and len(next_line) > 10:
-                        hotel['description'] += next_line + ' '
+                        hotel.description += next_line + ' '
                 
-                hotel['description'] = hotel['description'][:200] + "..." if len(hotel['description']) > 200 else hotel['description']
+                hotel.description = hotel.description[:200] + "..." if len(hotel.description) > 200 else hotel.description
                 hotels.append(hotel)
                 
                 if len(hotels) >= 5:
@@ -374,8 +1302,13 @@ Question: {input}
         
         return hotels
     
-    def _parse_activity_results(self, ai_output: str, location: str) -> List[Dict]:
+    def _parse_activity_results(self, ai_output: str, location: str) -> List[Activity]:
         """Parse AI agent output for activity information using improved extraction"""
+        activities = self._extract_activities(ai_output, location)
+        return activities if activities else self._get_fallback_activities(location, 'medium')
+    
+    def _extract_activities(self, ai_output: str, location: str) -> List[Activity]:
+        """Extract activities from AI output, returning an empty list if nothing parses"""
         activities = []
         try:
             # First try structured parsing with the formatted response
@@ -392,9 +1325,9 @@ Question: {input}
         except Exception as e:
             print(f"Error parsing activity results: {e}")
         
-        return activities[:6] if activities else self._get_fallback_activities(location, 'medium')
+        return normalize_prices(activities)
     
-    def _parse_structured_activities(self, ai_output: str) -> List[Dict]:
+    def _parse_structured_activities(self, ai_output: str) -> List[Activity]:
         """Parse structured activity format with clear labels"""
         activities = []
         
@@ -402,14 +1335,7 @@ Question: {input}
         sections = ai_output.split('ACTIVITY NAME:')
         
         for section in sections[1:]:  # Skip first empty section
-            activity = {
-                'name': '',
-                'description': '',
-                'price': '',
-                'hours': '',
-                'distance': '',
-                'transport': ''
-            }
+            activity = Activity()
             
             lines = section.split('\n')
             current_field = 'name'
@@ -421,32 +1347,32 @@ Question: {input}
                     
                 if line.startswith('DESCRIPTION:'):
                     current_field = 'description'
-                    activity['description'] = line.replace('DESCRIPTION:', '').strip()
+                    activity.description = line.replace('DESCRIPTION:', '').strip()
                 elif line.startswith('PRICE:'):
                     current_field = 'price'
-                    activity['price'] = line.replace('PRICE:', '').strip()
+                    activity.price = line.replace('PRICE:', '').strip()
                 elif line.startswith('HOURS:'):
                     current_field = 'hours'
-                    activity['hours'] = line.replace('HOURS:', '').strip()
+                    activity.hours = line.replace('HOURS:', '').strip()
                 elif line.startswith('DISTANCE:'):
                     current_field = 'distance'
-                    activity['distance'] = line.replace('DISTANCE:', '').strip()
+                    activity.distance = line.replace('DISTANCE:', '').strip()
                 elif line.startswith('TRANSPORT:'):
                     current_field = 'transport'
-                    activity['transport'] = line.replace('TRANSPORT:', '').strip()
-                elif current_field == 'name' and not activity['name']:
-                    activity['name'] = line
+                    activity.transport = line.replace('TRANSPORT:', '').strip()
+                elif current_field == 'name' and not activity.name:
+                    activity.name = line
                 elif current_field == 'description' and not line.startswith(('PRICE:', 'HOURS:', 'DISTANCE:', 'TRANSPORT:')):
-                    activity['description'] += ' ' + line
+                    activity.description += ' ' + line
             
             # Clean up and add if valid
-            if activity['name']:
-                activity['description'] = activity['description'][:200] + "..." if len(activity['description']) > 200 else activity['description']
+            if activity.name:
+                activity.description = activity.description[:200] + "..." if len(activity.description) > 200 else activity.description
                 activities.append(activity)
         
         return activities
     
-    def _parse_section_based_activities(self, ai_output: str, location: str) -> List[Dict]:
+    def _parse_section_based_activities(self, ai_output: str, location: str) -> List[Activity]:
         """Parse activities using section-based approach"""
         activities = []
         cleaned_output = ai_output.replace('**', '').replace('*', '')
@@ -465,23 +1391,16 @@ Question: {input}
             has_activity_keyword = any(keyword in section.lower() for keyword in activity_keywords)
             
             if has_activity_keyword and len(lines) >= 1:
-                activity = {
-                    'name': '',
-                    'description': '',
-                    'price': '',
-                    'hours': '',
-                    'distance': '',
-                    'transport': ''
-                }
+                activity = Activity()
                 
                 # Extract activity name (first line with activity keyword)
                 for line in lines:
                     if any(keyword in line.lower() for keyword in activity_keywords):
                         # Clean up the name
-                        activity['name'] = line.replace(':', '').replace('-', '').strip()
+                        activity.name = line.replace(':', '').replace('-', '').strip()
                         # Remove numbering if present
-                        if activity['name'] and activity['name'][0].isdigit():
-                            activity['name'] = '. '.join(activity['name'].split('. ')[1:])
+                        if activity.name and activity.name[0].isdigit():
+                            activity.name = '. '.join(activity.name.split('. ')[1:])
                         break
                 
                 # Extract other information
@@ -490,26 +1409,26 @@ Question: {input}
                     line_lower = line.lower()
                     
                     if '$' in line or 'price' in line_lower or 'cost' in line_lower or 'free' in line_lower or 'admission' in line_lower:
-                        activity['price'] = line
+                        activity.price = line
                     elif any(time_word in line_lower for time_word in ['hour', 'open', 'close', 'am', 'pm', 'timing']):
-                        activity['hours'] = line
+                        activity.hours = line
                     elif any(dist_word in line_lower for dist_word in ['minutes', 'km', 'miles', 'walk', 'distance', 'away']):
-                        activity['distance'] = line
+                        activity.distance = line
                     elif any(transport_word in line_lower for transport_word in ['train', 'bus', 'taxi', 'subway', 'metro', 'transport']):
-                        activity['transport'] = line
-                    elif line != activity['name'] and not any(skip in line_lower for skip in ['search', 'result', 'website', 'booking']):
+                        activity.transport = line
+                    elif line != activity.name and not any(skip in line_lower for skip in ['search', 'result', 'website', 'booking']):
                         description_parts.append(line)
                 
                 # Combine description parts
-                activity['description'] = ' '.join(description_parts)[:200]
+                activity.description = ' '.join(description_parts)[:200]
                 
                 # Only add if we have a name
-                if activity['name']:
+                if activity.name:
                     activities.append(activity)
         
         return activities
     
-    def _fallback_activity_extraction(self, ai_output: str, location: str) -> List[Dict]:
+    def _fallback_activity_extraction(self, ai_output: str, location: str) -> List[Activity]:
         """Fallback method to extract activity information"""
         activities = []
         lines = ai_output.split('\n')
@@ -520,23 +1439,21 @@ Question: {input}
         for i, line in enumerate(lines):
             line = line.strip().replace('**', '').replace('*', '')
             if any(keyword in line.lower() for keyword in activity_keywords):
-                activity = {
-                    'name': line,
-                    'description': '',
-                    'price': 'Price varies',
-                    'hours': 'Check local timings',
-                    'distance': 'Distance varies',
-                    'transport': 'Multiple options',
-                    'type': 'activity'
-                }
+                activity = Activity(
+                    name=line,
+                    price='Price varies',
+                    hours='Check local timings',
+                    distance='Distance varies',
+                    transport='Multiple options'
+                )
                 
                 # Look for additional info in next few lines
                 for j in range(i+1, min(i+3, len(lines))):
                     next_line = lines[j].strip()
                     if next_line and len(next_line) > 5:
-                        activity['description'] += next_line + ' '
+                        activity.description += next_line + ' '
                 
-                activity['description'] = activity['description'][:150] + "..." if len(activity['description']) > 150 else activity['description']
+                activity.description = activity.description[:150] + "..." if len(activity.description) > 150 else activity.description
                 activities.append(activity)
                 
                 if len(activities) >= 10:
@@ -544,7 +1461,7 @@ Question: {input}
         
         return activities
     
-    def _parse_itinerary_schedule(self, ai_output: str, trip_data: Dict, activities: List[Dict]) -> List[Dict]:
+    def _parse_itinerary_schedule(self, ai_output: str, trip_data: Dict, activities: List[Activity]) -> List[DayPlan]:
         """Parse AI-generated schedule into structured format"""
         schedule = []
         start_date = datetime.strptime(trip_data['start_date'], "%Y-%m-%d")
@@ -573,7 +1490,7 @@ Question: {input}
             print(f"Error parsing AI schedule: {e}")
             return self._create_basic_schedule(trip_data, activities)
     
-    def _create_basic_schedule(self, trip_data: Dict, activities: List[Dict]) -> List[Dict]:
+    def _create_basic_schedule(self, trip_data: Dict, activities: List[Activity]) -> List[DayPlan]:
         """Create schedule using pop-based approach: exactly 2 activities + 1 restaurant per day"""
         schedule = []
         start_date = datetime.strptime(trip_data['start_date'], "%Y-%m-%d")
@@ -604,16 +1521,16 @@ Question: {input}
             for _ in range(2):
                 if available_activities:
                     activity = available_activities.pop(0)  # Remove from front of list
-                    activity['type'] = 'activity'
+                    activity.type = 'activity'
                     day_items.append(activity)
-                    print(f"   Day {day + 1}: Added activity '{activity.get('name', 'Unknown')}' (remaining: {len(available_activities)})")
+                    print(f"   Day {day + 1}: Added activity '{activity.name or 'Unknown'}' (remaining: {len(available_activities)})")
             
-            schedule.append({
-                'day': day + 1,
-                'date': current_date.strftime("%Y-%m-%d"),
-                'activities': day_items,  # Contains exactly 2 activities
-                'ai_suggestions': f"Day {day + 1}: Explore {trip_data['location']} with 2 unique activities"
-            })
+            schedule.append(DayPlan(
+                day=day + 1,
+                date=current_date.strftime("%Y-%m-%d"),
+                activities=day_items,  # Contains exactly 2 activities
+                ai_suggestions=f"Day {day + 1}: Explore {trip_data['location']} with 2 unique activities"
+            ))
         
         # Log remaining items (should be empty)
         if available_activities:
@@ -621,7 +1538,16 @@ Question: {input}
         
         return schedule
     
-    def _get_fallback_hotels(self, location: str, budget: str) -> List[Dict]:
+    def _pad_activities(self, activities: List[Activity], location: str, budget: str, activities_needed: int) -> List[Activity]:
+        """Ensure we have exactly the right number of activities"""
+        if len(activities) < activities_needed:
+            # Add fallback activities to reach the target
+            fallback_activities = self._get_fallback_activities(location, budget, activities_needed - len(activities))
+            activities.extend(fallback_activities)
+        
+        return activities[:activities_needed]  # Return exactly what we need
+    
+    def _get_fallback_hotels(self, location: str, budget: str) -> List[Hotel]:
         """Fallback hotels if AI search fails"""
         budget_desc = {
             'low': 'Budget-friendly accommodation',
@@ -630,30 +1556,29 @@ Question: {input}
         }
         
         return [
-            {
-                'name': f'{budget.title()} Hotel {location}',
-                'description': budget_desc[budget] + ' in the heart of the city',
-                'price': 'Price information unavailable',
-                'rating': 'Rating unavailable',
-                'location': location
-            }
+            Hotel(
+                name=f'{budget.title()} Hotel {location}',
+                description=budget_desc[budget] + ' in the heart of the city',
+                price='Price information unavailable',
+                rating='Rating unavailable',
+                location=location
+            )
         ]
     
-    def _get_fallback_activities(self, location: str, budget: str, count: int = 1) -> List[Dict]:
+    def _get_fallback_activities(self, location: str, budget: str, count: int = 1) -> List[Activity]:
         """Fallback activities if AI search fails"""
         activities = []
         activity_types = ['Museum', 'Park', 'Market', 'Gallery', 'Temple', 'Garden', 'Monument', 'Center']
         
         for i in range(count):
             activity_type = activity_types[i % len(activity_types)]
-            activities.append({
-                'name': f'{activity_type} in {location}',
-                'description': f'Visit local {activity_type.lower()} within your {budget} budget',
-                'price': 'Varies',
-                'hours': 'Check local listings',
-                'distance': 'Various locations',
-                'transport': 'Multiple options',
-                'type': 'activity'
-            })
+            activities.append(Activity(
+                name=f'{activity_type} in {location}',
+                description=f'Visit local {activity_type.lower()} within your {budget} budget',
+                price='Varies',
+                hours='Check local listings',
+                distance='Various locations',
+                transport='Multiple options'
+            ))
         
         return activities
\ No newline at end of file
@@ -1,8 +1,103 @@
 import requests
 import csv
+import os
+import sys
 from io import StringIO
 import json
 
+# The columnar store format lives with the backend that memory-maps it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from destination_store import write_destination_store, DEFAULT_STORE_PATH
+
+OUTPUT_DIR = 'hardcoded_destinations'
+WRITE_BUFFER_SIZE = 1 << 16
+
+DESTINATION_TYPE = """export type Destination = {
+  id: string
+  name: string
+  country: string
+  region: string
+  description: string
+  image_url: string
+  price_range: string
+  best_time: string
+  highlights: string[]
+}
+"""
+
+def ts_string(value):
+    """Render a value as a TypeScript string literal"""
+    return json.dumps(value, ensure_ascii=False)
+
+def region_slug(region):
+    """Module file name for a region, e.g. 'North America' -> 'north-america'"""
+    slug = ''.join(c if c.isalnum() else '-' for c in region.lower()).strip('-')
+    return '-'.join(part for part in slug.split('-') if part) or 'other'
+
+def region_module_names(regions):
+    """Unique module name per region; regions whose slugs collide get numbered suffixes
+    
+    'Asia/Pacific' and 'Asia Pacific' both slug to 'asia-pacific', and a region
+    called 'Index' would overwrite index.ts, so names already taken are skipped.
+    """
+    taken = {'index', 'types'}
+    modules = {}
+    for region in sorted(regions):
+        base = region_slug(region)
+        module, suffix = base, 2
+        while module in taken:
+            module = f"{base}-{suffix}"
+            suffix += 1
+        if module != base:
+            print(f"Region {region!r} would overwrite {base}.ts, writing {module}.ts instead")
+        taken.add(module)
+        modules[region] = module
+    return modules
+
+def write_region_module(path, region_destinations):
+    """Stream one region's destinations to a TS module through a buffered writer"""
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write('import type { Destination } from "./types"\n\n')
+        f.write("const destinations: Destination[] = [\n")
+        for dest in region_destinations:
+            f.write("  {\n")
+            f.write(f'    id: {ts_string(dest["id"])},\n')
+            f.write(f'    name: {ts_string(dest["name"])},\n')
+            f.write(f'    country: {ts_string(dest["country"])},\n')
+            f.write(f'    region: {ts_string(dest["region"])},\n')
+            f.write(f'    description: {ts_string(dest["description"])},\n')
+            f.write(f'    image_url: {ts_string(dest["image_url"])},\n')
+            f.write(f'    price_range: {ts_string(dest["price_range"])},\n')
+            f.write(f'    best_time: {ts_string(dest["best_time"])},\n')
+            f.write(f'    highlights: {json.dumps(dest["highlights"], ensure_ascii=False)},\n')
+            f.write("  },\n")
+        f.write("]\n\nexport default destinations\n")
+
+def write_index_module(path, region_modules):
+    """Write the small index module: region metadata plus lazy loaders"""
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write('import type { Destination } from "./types"\n\n')
+        f.write('export type { Destination } from "./types"\n\n')
+        f.write("export const regions = [\n")
+        for region, module, count in region_modules:
+            f.write(f"  {{ name: {ts_string(region)}, module: {ts_string(module)}, count: {count} }},\n")
+        f.write("] as const\n\n")
+        
+        f.write("const regionLoaders: Record<string, () => Promise<Destination[]>> = {\n")
+        for region, module, _ in region_modules:
+            f.write(f'  {ts_string(region)}: () => import("./{module}").then((m) => m.default),\n')
+        f.write("}\n\n")
+        
+        f.write("export async function loadRegion(region: string): Promise<Destination[]> {\n")
+        f.write("  const load = regionLoaders[region]\n")
+        f.write("  return load ? load() : []\n")
+        f.write("}\n\n")
+        
+        f.write("export async function loadDestinations(regionNames: string[] = Object.keys(regionLoaders)): Promise<Destination[]> {\n")
+        f.write("  const chunks = await Promise.all(regionNames.map(loadRegion))\n")
+        f.write("  return chunks.flat()\n")
+        f.write("}\n")
+
 # Fetch the CSV data
 csv_url = "https://hebbkx1anhila5yf.public.blob.vercel-storage.com/destination_dataset-lPNrll30h6qGbEMu2AVFMFowbBBrDh.csv"
 
@@ -46,34 +141,33 @@ try:
     
     print(f"Successfully parsed {len(destinations)} destinations from CSV")
     
-    # Generate TypeScript code for hardcoded destinations
-    ts_code = "const hardcodedDestinations: Destination[] = [\n"
-    
+    # Shard the catalog by region so the frontend only loads what it displays
+    by_region = {}
     for dest in destinations:
-        # Escape quotes and backslashes properly
-        name_escaped = dest['name'].replace('\\', '\\\\').replace('"', '\\"')
-        country_escaped = dest['country'].replace('\\', '\\\\').replace('"', '\\"')
-        description_escaped = dest['description'].replace('\\', '\\\\').replace('"', '\\"')
-        
-        ts_code += "  {\n"
-        ts_code += f'    id: "{dest["id"]}",\n'
-        ts_code += f'    name: "{name_escaped}",\n'
-        ts_code += f'    country: "{country_escaped}",\n'
-        ts_code += f'    region: "{dest["region"]}",\n'
-        ts_code += f'    description: "{description_escaped}",\n'
-        ts_code += f'    image_url: "{dest["image_url"]}",\n'
-        ts_code += f'    price_range: "{dest["price_range"]}",\n'
-        ts_code += f'    best_time: "{dest["best_time"]}",\n'
-        ts_code += f'    highlights: {json.dumps(dest["highlights"])},\n'
-        ts_code += "  },\n"
+        by_region.setdefault(dest['region'] or 'Other', []).append(dest)
+    
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    
+    with open(os.path.join(OUTPUT_DIR, 'types.ts'), 'w', encoding='utf-8') as f:
+        f.write(DESTINATION_TYPE)
+    
+    region_modules = []
+    module_names = region_module_names(by_region)
+    for region in sorted(by_region):
+        module = module_names[region]
+        write_region_module(os.path.join(OUTPUT_DIR, f'{module}.ts'), by_region[region])
+        region_modules.append((region, module, len(by_region[region])))
+        print(f"Generated {OUTPUT_DIR}/{module}.ts ({len(by_region[region])} destinations)")
+    
+    write_index_module(os.path.join(OUTPUT_DIR, 'index.ts'), region_modules)
     
-    ts_code += "];\n"
+    print(f"Generated {OUTPUT_DIR}/index.ts with {len(region_modules)} lazy-loaded regions")
     
-    # Write to file
-    with open('hardcoded_destinations.ts', 'w', encoding='utf-8') as f:
-        f.write(ts_code)
+    # Write the columnar store the FastAPI backend memory-maps at startup
+    store_path = os.getenv('DESTINATION_STORE_PATH', DEFAULT_STORE_PATH)
+    write_destination_store(destinations, store_path)
     
-    print("Generated hardcoded_destinations.ts file")
+    print(f"Generated {store_path} columnar destination store")
     
 except Exception as e:
     print(f"Error: {e}")